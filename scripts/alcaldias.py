@@ -0,0 +1,135 @@
+"""
+Asignación de alcaldía por geometría (punto en polígono)
+Usa los límites oficiales (CVEGEO, NOMGEO) con un índice de rejilla: las celdas
+que no tocan ningún borde se resuelven sin probar polígonos, y en las demás
+solo se prueban los bordes de la franja horizontal del punto
+"""
+import json
+import math
+
+RUTA_LIMITES = 'data/limite-de-las-alcaldas.json'
+TAMAÑO_CELDA = 0.005  # grados
+BANDAS = 256
+
+
+def _anillos(geometria):
+    if geometria['type'] == 'Polygon':
+        return geometria['coordinates']
+    if geometria['type'] == 'MultiPolygon':
+        return [anillo for poligono in geometria['coordinates'] for anillo in poligono]
+    raise ValueError(f"Geometría no soportada: {geometria['type']}")
+
+
+class PoligonoPreparado:
+    """Polígono con sus bordes repartidos en franjas horizontales (regla par-impar)"""
+
+    def __init__(self, clave, nombre, anillos, bandas=BANDAS):
+        self.clave = clave
+        self.nombre = nombre
+        self.bordes = []
+        for anillo in anillos:
+            for (x1, y1), (x2, y2) in zip(anillo, anillo[1:] + anillo[:1]):
+                if y1 != y2:
+                    self.bordes.append((x1, y1, x2, y2))
+
+        xs = [c[0] for anillo in anillos for c in anillo]
+        ys = [c[1] for anillo in anillos for c in anillo]
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+        self.bandas = bandas
+        self._alto = (self.bbox[3] - self.bbox[1]) / bandas or 1.0
+        self.franjas = [[] for _ in range(bandas)]
+        for borde in self.bordes:
+            y_min, y_max = sorted((borde[1], borde[3]))
+            for b in range(self._banda(y_min), self._banda(y_max) + 1):
+                self.franjas[b].append(borde)
+
+    def _banda(self, y):
+        return min(self.bandas - 1, max(0, int((y - self.bbox[1]) / self._alto)))
+
+    def contiene(self, x, y):
+        x_min, y_min, x_max, y_max = self.bbox
+        if not (x_min <= x <= x_max and y_min <= y <= y_max):
+            return False
+        dentro = False
+        for x1, y1, x2, y2 in self.franjas[self._banda(y)]:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                dentro = not dentro
+        return dentro
+
+
+class IndiceAlcaldias:
+    """Asigna a cada punto la alcaldía (CVEGEO) que lo contiene"""
+
+    def __init__(self, ruta=RUTA_LIMITES, tamaño_celda=TAMAÑO_CELDA):
+        self.ruta = ruta
+        with open(ruta, encoding='utf-8') as f:
+            limites = json.load(f)
+        self.poligonos = [
+            PoligonoPreparado(feature['properties']['CVEGEO'], feature['properties']['NOMGEO'],
+                              _anillos(feature['geometry']))
+            for feature in limites['features']
+        ]
+        self.nombres = {p.clave: p.nombre for p in self.poligonos}
+
+        self.tamaño_celda = tamaño_celda
+        self.x0 = min(p.bbox[0] for p in self.poligonos)
+        self.y0 = min(p.bbox[1] for p in self.poligonos)
+        self.columnas = int((max(p.bbox[2] for p in self.poligonos) - self.x0) / tamaño_celda) + 1
+        self.filas = int((max(p.bbox[3] for p in self.poligonos) - self.y0) / tamaño_celda) + 1
+        self._construir_celdas()
+
+    def _celda(self, x, y):
+        return (math.floor((x - self.x0) / self.tamaño_celda),
+                math.floor((y - self.y0) / self.tamaño_celda))
+
+    def _construir_celdas(self):
+        """
+        Cada celda guarda la respuesta directa (si ningún borde la toca) o la
+        lista de polígonos candidatos
+        """
+        n = self.columnas * self.filas
+        candidatos = [[] for _ in range(n)]
+        con_borde = [False] * n
+        for p in self.poligonos:
+            c0, f0 = self._celda(p.bbox[0], p.bbox[1])
+            c1, f1 = self._celda(p.bbox[2], p.bbox[3])
+            for f in range(f0, f1 + 1):
+                for c in range(c0, c1 + 1):
+                    candidatos[f * self.columnas + c].append(p)
+            for x1, y1, x2, y2 in p.bordes:
+                ca, fa = self._celda(min(x1, x2), min(y1, y2))
+                cb, fb = self._celda(max(x1, x2), max(y1, y2))
+                for f in range(fa, fb + 1):
+                    for c in range(ca, cb + 1):
+                        con_borde[f * self.columnas + c] = True
+
+        self.celdas = []
+        for k in range(n):
+            if con_borde[k]:
+                self.celdas.append(candidatos[k])
+                continue
+            # Sin bordes: toda la celda está dentro de un solo polígono o fuera de todos
+            c, f = k % self.columnas, k // self.columnas
+            x = self.x0 + (c + 0.5) * self.tamaño_celda
+            y = self.y0 + (f + 0.5) * self.tamaño_celda
+            self.celdas.append(next((p.clave for p in candidatos[k] if p.contiene(x, y)), None))
+
+    def asignar(self, lon, lat):
+        """CVEGEO de la alcaldía que contiene al punto, o None si está fuera de CDMX"""
+        if math.isnan(lon) or math.isnan(lat):
+            return None
+        c, f = self._celda(lon, lat)
+        if not (0 <= c < self.columnas and 0 <= f < self.filas):
+            return None
+        celda = self.celdas[f * self.columnas + c]
+        if celda is None or isinstance(celda, str):
+            return celda
+        for poligono in celda:
+            if poligono.contiene(lon, lat):
+                return poligono.clave
+        return None
+
+    def asignar_lote(self, puntos):
+        """Asigna una secuencia de (lon, lat)"""
+        asignar = self.asignar
+        return [asignar(lon, lat) for lon, lat in puntos]
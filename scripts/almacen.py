@@ -0,0 +1,393 @@
+"""
+Almacén local consultable de delitos (SQLite)
+Guarda los robos, asaltos y homicidios ya filtrados y clasificados, con índices
+por fecha, tipo, alcaldía y celda de rejilla, para responder reportes en
+milisegundos sin volver a leer el CSV
+
+Uso:
+  python scripts/csv_to_geojson.py --sqlite          # construye data/delitos-cdmx.sqlite
+  python scripts/almacen.py visitantes               # mismo reporte que analyze_seguridad_visitantes.py
+  python scripts/almacen.py alcaldias --tipo asalto --año 2023
+  python scripts/almacen.py meses --tipo homicidio
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from collections import Counter
+
+from alcaldias import IndiceAlcaldias
+from clasificador import CLASIFICADOR
+from escaneo import Agregador
+from rejilla import indice_celda
+
+RUTA_SQLITE = 'data/delitos-cdmx.sqlite'
+VERSION = 1
+RESOLUCION_CELDA = 0.005  # grados, la más fina de rejilla.RESOLUCIONES
+LOTE = 10000
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS delitos (
+    id INTEGER PRIMARY KEY,
+    dia INTEGER NOT NULL,       -- date.toordinal()
+    fecha TEXT NOT NULL,
+    año INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    hora TEXT,
+    tipo TEXT NOT NULL,         -- robo, asalto u homicidio
+    es_grave INTEGER NOT NULL,
+    delito TEXT NOT NULL,
+    categoria TEXT,
+    alcaldia TEXT,
+    colonia TEXT,
+    cvegeo TEXT,                -- solo con limites_alcaldias
+    lon REAL,                   -- NULL si las coordenadas no son válidas
+    lat REAL,
+    celda_i INTEGER,            -- indice_celda(lat, RESOLUCION_CELDA)
+    celda_j INTEGER             -- indice_celda(lon, RESOLUCION_CELDA)
+);
+CREATE TABLE IF NOT EXISTS registros_por_año (
+    año INTEGER PRIMARY KEY,
+    registros INTEGER NOT NULL  -- todos los registros con fecha válida, clasificados o no
+);
+CREATE TABLE IF NOT EXISTS metadatos (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+INDICES = """
+CREATE INDEX IF NOT EXISTS delitos_dia ON delitos (dia);
+CREATE INDEX IF NOT EXISTS delitos_tipo_dia ON delitos (tipo, dia);
+CREATE INDEX IF NOT EXISTS delitos_alcaldia_tipo ON delitos (alcaldia, tipo);
+CREATE INDEX IF NOT EXISTS delitos_celda ON delitos (celda_i, celda_j);
+"""
+
+COLUMNAS = ['dia', 'fecha', 'año', 'mes', 'hora', 'tipo', 'es_grave', 'delito', 'categoria',
+            'alcaldia', 'colonia', 'cvegeo', 'lon', 'lat', 'celda_i', 'celda_j']
+_INSERTAR = f"INSERT INTO delitos ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+_SUMAR_AÑO = ("INSERT INTO registros_por_año (año, registros) VALUES (?, ?) "
+              "ON CONFLICT (año) DO UPDATE SET registros = registros + excluded.registros")
+
+
+class AlmacenDelitos(Agregador):
+    """
+    Agregador que carga los delitos clasificados desde año_minimo en SQLite
+    A diferencia del GeoJSON también guarda los que no tienen coordenadas
+    válidas (lon/lat en NULL), para poder contestar los mismos conteos que los
+    scripts de análisis
+    """
+
+    def __init__(self, ruta, año_minimo=2019, limites_alcaldias=None, continuar=False, fragmento=False,
+                 año_maximo=None, tipos=None):
+        self.ruta = ruta
+        self.año_minimo = año_minimo
+        self.año_maximo = año_maximo
+        self.tipos = tipos
+        self.limites_alcaldias = limites_alcaldias
+        self.continuar = continuar
+        self.fragmento = fragmento
+        self.indice_alcaldias = None
+        self.pendientes = []
+        self.años = Counter()
+        self._conexion = None
+
+    def __getstate__(self):
+        # Los parciales viajan entre procesos sin la conexión abierta
+        estado = self.__dict__.copy()
+        estado['_conexion'] = None
+        estado['indice_alcaldias'] = None
+        return estado
+
+    @property
+    def _destino(self):
+        # Una reconstrucción completa se escribe aparte y se reemplaza al cerrar
+        return self.ruta if self.continuar else self.ruta + '.tmp'
+
+    def _abrir(self):
+        if not self.continuar and os.path.exists(self._destino):
+            os.remove(self._destino)
+        self._conexion = sqlite3.connect(self._destino)
+        if not self.continuar:
+            # El temporal se descarta si algo falla, no hace falta el diario
+            self._conexion.execute('PRAGMA journal_mode = OFF')
+            self._conexion.execute('PRAGMA synchronous = OFF')
+        self._conexion.executescript(ESQUEMA)
+
+    def procesar(self, registro):
+        fecha = registro.fecha
+        if fecha is None:
+            return
+        self.años[fecha.year] += 1
+        if fecha.year < self.año_minimo or (self.año_maximo is not None and fecha.year > self.año_maximo):
+            return
+
+        delito = registro.campo('delito')
+        clasificacion = CLASIFICADOR.clasificar(delito)
+        if not clasificacion.tipo or (self.tipos and clasificacion.tipo not in self.tipos):
+            return
+
+        lon = lat = celda_i = celda_j = cvegeo = None
+        if registro.coordenadas_validas:
+            lon, lat = registro.lon, registro.lat
+            celda_i = indice_celda(lat, RESOLUCION_CELDA)
+            celda_j = indice_celda(lon, RESOLUCION_CELDA)
+            if self.limites_alcaldias:
+                if self.indice_alcaldias is None:
+                    self.indice_alcaldias = IndiceAlcaldias(self.limites_alcaldias)
+                cvegeo = self.indice_alcaldias.asignar(lon, lat)
+
+        self.pendientes.append((
+            registro.dia, registro.fecha_str, fecha.year, fecha.month, registro.campo('HoraHecho'),
+            clasificacion.tipo, int(clasificacion.es_grave), delito,
+            registro.campo('categoria_delito'), registro.campo('AlcaldiaHechos'),
+            registro.campo('colonia_datos'), cvegeo, lon, lat, celda_i, celda_j
+        ))
+        if len(self.pendientes) >= LOTE:
+            self._vaciar()
+
+    def _vaciar(self):
+        if self._conexion is None:
+            self._abrir()
+        self._conexion.executemany(_INSERTAR, self.pendientes)
+        self.pendientes = []
+
+    def nuevo_parcial(self, indice):
+        return AlmacenDelitos(f'{self.ruta}.parte{indice}', self.año_minimo, self.limites_alcaldias,
+                              fragmento=True, año_maximo=self.año_maximo, tipos=self.tipos)
+
+    def combinar(self, parcial):
+        """Copia las filas de un parcial (en el orden del archivo) y borra su base"""
+        if self._conexion is None:
+            self._abrir()
+        self._vaciar()
+        destino = parcial._destino
+        if os.path.exists(destino):
+            self._conexion.commit()
+            self._conexion.execute('ATTACH DATABASE ? AS parte', (destino,))
+            self._conexion.execute(f"INSERT INTO delitos ({', '.join(COLUMNAS)}) "
+                                   f"SELECT {', '.join(COLUMNAS)} FROM parte.delitos ORDER BY id")
+            self._conexion.commit()
+            self._conexion.execute('DETACH DATABASE parte')
+            os.remove(destino)
+        self.años.update(parcial.años)
+
+    def finalizar(self):
+        if self._conexion is None:
+            self._abrir()
+        self._vaciar()
+        conexion = self._conexion
+        if self.fragmento:
+            conexion.commit()
+            conexion.close()
+            self._conexion = None
+            return
+
+        conexion.executemany(_SUMAR_AÑO, sorted(self.años.items()))
+        # Con la carga completa es más rápido crear los índices al final
+        conexion.executescript(INDICES)
+        conexion.executemany('INSERT OR REPLACE INTO metadatos (clave, valor) VALUES (?, ?)', [
+            ('version', str(VERSION)),
+            ('año_minimo', str(self.año_minimo)),
+            ('resolucion_celda', str(RESOLUCION_CELDA)),
+        ])
+        conexion.commit()
+        conexion.execute('ANALYZE')
+        conexion.close()
+        self._conexion = None
+        if not self.continuar:
+            os.replace(self._destino, self.ruta)
+
+    def descartar(self):
+        """Deshace la carga: borra el temporal o revierte lo agregado en modo continuar"""
+        self.pendientes = []
+        if self._conexion is not None:
+            self._conexion.rollback()
+            self._conexion.close()
+            self._conexion = None
+        if not self.continuar and os.path.exists(self._destino):
+            os.remove(self._destino)
+
+
+class ConsultasDelitos:
+    """Consultas sobre el almacén; todos los filtros son opcionales"""
+
+    def __init__(self, ruta=RUTA_SQLITE):
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(ruta)
+        self.conexion = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def _filtros(self, tipo=None, año=None, desde_año=None, con_coordenadas=None, alcaldia=None):
+        condiciones, valores = [], []
+        if tipo:
+            condiciones.append('tipo = ?')
+            valores.append(tipo)
+        if año:
+            condiciones.append('año = ?')
+            valores.append(año)
+        if desde_año:
+            condiciones.append('año >= ?')
+            valores.append(desde_año)
+        if con_coordenadas is not None:
+            condiciones.append('lon IS NOT NULL' if con_coordenadas else 'lon IS NULL')
+        if alcaldia:
+            condiciones.append('alcaldia = ?')
+            valores.append(alcaldia)
+        return (' WHERE ' + ' AND '.join(condiciones)) if condiciones else '', valores
+
+    def registros(self, desde_año=None):
+        """Registros con fecha válida (clasificados o no) desde un año"""
+        fila = self.conexion.execute('SELECT SUM(registros) FROM registros_por_año WHERE año >= ?',
+                                     (desde_año or 0,)).fetchone()
+        return fila[0] or 0
+
+    def conteo(self, **filtros):
+        donde, valores = self._filtros(**filtros)
+        return self.conexion.execute(f'SELECT COUNT(*) FROM delitos{donde}', valores).fetchone()[0]
+
+    def por_tipo(self, **filtros):
+        donde, valores = self._filtros(**filtros)
+        return dict(self.conexion.execute(f'SELECT tipo, COUNT(*) FROM delitos{donde} GROUP BY tipo',
+                                          valores))
+
+    def top_delitos(self, limite=10, **filtros):
+        """Etiquetas más frecuentes, agrupadas en mayúsculas como los scripts de análisis"""
+        donde, valores = self._filtros(**filtros)
+        conteo = Counter()
+        # upper() de SQLite no convierte acentos: agrupar en Python
+        # (en orden de primera aparición, igual que los Counter de los scripts)
+        for delito, n in self.conexion.execute(f'SELECT delito, COUNT(*) FROM delitos{donde} '
+                                               f'GROUP BY delito ORDER BY MIN(id)', valores):
+            conteo[delito.upper()] += n
+        return conteo.most_common(limite)
+
+    def top_alcaldias(self, limite=15, **filtros):
+        donde, valores = self._filtros(**filtros)
+        donde += (' AND ' if donde else ' WHERE ') + "alcaldia != '' AND UPPER(alcaldia) != 'NA'"
+        return self.conexion.execute(
+            f'SELECT alcaldia, COUNT(*) AS n FROM delitos{donde} GROUP BY alcaldia '
+            f'ORDER BY n DESC, MIN(id) LIMIT ?', valores + [limite]).fetchall()
+
+    def por_mes(self, **filtros):
+        donde, valores = self._filtros(**filtros)
+        return self.conexion.execute(f'SELECT año, mes, COUNT(*) FROM delitos{donde} '
+                                     f'GROUP BY año, mes ORDER BY año, mes', valores).fetchall()
+
+    def por_celda(self, **filtros):
+        """Conteo por celda de RESOLUCION_CELDA grados: (celda_i, celda_j, conteo)"""
+        donde, valores = self._filtros(con_coordenadas=True, **filtros)
+        return self.conexion.execute(f'SELECT celda_i, celda_j, COUNT(*) FROM delitos{donde} '
+                                     f'GROUP BY celda_i, celda_j', valores).fetchall()
+
+    def asaltos_graves_buffers(self, desde_año=None):
+        """Asaltos a transeúnte, pasajero, taxi, metro, microbús o casa con coordenadas"""
+        donde, valores = self._filtros(tipo='asalto', desde_año=desde_año, con_coordenadas=True)
+        total = 0
+        for delito, n in self.conexion.execute(f'SELECT delito, COUNT(*) FROM delitos{donde} '
+                                               f'GROUP BY delito', valores):
+            if any(x in delito.upper() for x in ['TRANSEUNTE', 'PASAJERO', 'TAXI', 'METRO',
+                                                  'MICROBUS', 'CASA HABITACION']):
+                total += n
+        return total
+
+
+def reporte_visitantes(consultas, año_minimo=2019):
+    """Mismo reporte que analyze_seguridad_visitantes.py, desde el almacén"""
+    por_tipo = consultas.por_tipo(desde_año=año_minimo)
+    total_robos = por_tipo.get('robo', 0)
+    total_asaltos = por_tipo.get('asalto', 0)
+    total_homicidios = por_tipo.get('homicidio', 0)
+    total_general = total_robos + total_asaltos + total_homicidios
+
+    print(f"\n{'='*80}")
+    print(f"ANÁLISIS DE DELITOS PARA VISITANTES ({año_minimo})")
+    print(f"{'='*80}")
+    print(f"Total de registros desde {año_minimo}: {consultas.registros(año_minimo):,}")
+
+    print(f"\nDelitos relevantes con coordenadas válidas: "
+          f"{consultas.conteo(desde_año=año_minimo, con_coordenadas=True):,}")
+    print(f"\nDesglose:")
+    print(f"  - ROBOS (sin violencia): {total_robos:,}")
+    print(f"  - ASALTOS (con violencia): {total_asaltos:,}")
+    print(f"  - HOMICIDIOS: {total_homicidios:,}")
+    print(f"  - TOTAL: {total_general:,}")
+
+    for titulo, tipo, limite in [("TOP 10 ROBOS (sin violencia)", 'robo', 10),
+                                 ("TOP 10 ASALTOS (con violencia)", 'asalto', 10),
+                                 ("TIPOS DE HOMICIDIOS", 'homicidio', None)]:
+        print(f"\n{'='*80}")
+        print(titulo)
+        print(f"{'='*80}")
+        for i, (delito, count) in enumerate(consultas.top_delitos(limite, tipo=tipo, desde_año=año_minimo), 1):
+            print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
+
+    print(f"\n{'='*80}")
+    print("TOP 15 ALCALDÍAS CON MÁS DELITOS (robos, asaltos, homicidios)")
+    print(f"{'='*80}")
+    for i, (alcaldia, count) in enumerate(consultas.top_alcaldias(15, desde_año=año_minimo,
+                                                                 con_coordenadas=True), 1):
+        print(f"{i:2}. {alcaldia:<40} {count:>6,}")
+
+    print(f"\n{'='*80}")
+    print("DELITOS GRAVES PARA BUFFERS DE RIESGO")
+    print(f"{'='*80}")
+    homicidios = consultas.conteo(tipo='homicidio', desde_año=año_minimo, con_coordenadas=True)
+    asaltos_graves = consultas.asaltos_graves_buffers(año_minimo)
+    print(f"Total de delitos graves para buffers: {homicidios + asaltos_graves:,}")
+    print(f"  - Homicidios: {total_homicidios:,}")
+    print(f"  - Asaltos graves (transeúnte, pasajero, casa): {asaltos_graves:,}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Consultas sobre el almacén SQLite de delitos')
+    parser.add_argument('--db', default=RUTA_SQLITE)
+    sub = parser.add_subparsers(dest='consulta', required=True)
+
+    visitantes = sub.add_parser('visitantes', help='reporte de analyze_seguridad_visitantes.py')
+    visitantes.add_argument('--desde', type=int, default=2019)
+    for nombre, ayuda in [('tipos', 'conteo por tipo'), ('delitos', 'etiquetas más frecuentes'),
+                          ('alcaldias', 'alcaldías con más delitos'), ('meses', 'conteo por mes')]:
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument('--tipo', choices=['robo', 'asalto', 'homicidio'])
+        p.add_argument('--año', type=int)
+        p.add_argument('--desde', type=int)
+        p.add_argument('--alcaldia')
+        p.add_argument('--limite', type=int, default=15)
+    args = parser.parse_args()
+
+    try:
+        consultas = ConsultasDelitos(args.db)
+    except FileNotFoundError:
+        print(f"Error: No se encontró {args.db}. Genéralo con: python scripts/csv_to_geojson.py --sqlite")
+        sys.exit(1)
+
+    with consultas:
+        if args.consulta == 'visitantes':
+            reporte_visitantes(consultas, args.desde)
+            filtros = None
+        else:
+            filtros = {'año': args.año, 'desde_año': args.desde, 'alcaldia': args.alcaldia}
+
+        if args.consulta == 'tipos':
+            for tipo, n in sorted(consultas.por_tipo(tipo=args.tipo, **filtros).items()):
+                print(f"{tipo:<12} {n:>10,}")
+        elif args.consulta == 'delitos':
+            for delito, n in consultas.top_delitos(args.limite, tipo=args.tipo, **filtros):
+                print(f"{delito[:70]:<70} {n:>8,}")
+        elif args.consulta == 'alcaldias':
+            filtros.pop('alcaldia')
+            for alcaldia, n in consultas.top_alcaldias(args.limite, tipo=args.tipo, **filtros):
+                print(f"{alcaldia:<40} {n:>8,}")
+        elif args.consulta == 'meses':
+            for año, mes, n in consultas.por_mes(tipo=args.tipo, **filtros):
+                print(f"{año}-{mes:02d} {n:>8,}")
@@ -1,7 +1,8 @@
-import csv
 from collections import Counter
-from datetime import datetime
-import re
+
+from cache_analisis import analizar_y_reportar
+from clasificador import CLASIFICADOR
+from escaneo import Agregador, RUTA_CSV_PGJ
 
 # Delitos relevantes para visitantes (robos, asaltos, homicidios)
 delitos_visitantes = {
@@ -24,142 +25,155 @@ delitos_visitantes = {
     ]
 }
 
-# Contadores
-registros_2019 = 0
-con_coordenadas = 0
-delitos_visitantes_counter = Counter()
-delitos_por_tipo = {
-    'ROBOS': Counter(),
-    'ASALTOS': Counter(),
-    'HOMICIDIOS': Counter()
+# Tipo del clasificador -> grupo del reporte
+TIPOS_VISITANTES = {
+    'robo': 'ROBOS',
+    'asalto': 'ASALTOS',
+    'homicidio': 'HOMICIDIOS'
 }
-delitos_detalle = []
-
-print("Analizando delitos relevantes para visitantes (robos, asaltos, homicidios)...\n")
-
-with open('data/da_carpetas-de-investigacion-pgj-cdmx (1).csv', 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    
-    for row in reader:
-        fecha_str = row.get('FechaHecho', '').strip()
-        if not fecha_str or fecha_str == 'NA':
-            continue
-        
-        try:
-            fecha = datetime.strptime(fecha_str, '%Y-%m-%d')
-            if fecha.year >= 2019:
-                registros_2019 += 1
-                
-                delito = row.get('delito', '').strip().upper()
-                if not delito:
-                    continue
-                
-                # Verificar coordenadas
-                try:
-                    lon = float(row.get('longitud', 0) or 0)
-                    lat = float(row.get('latitud', 0) or 0)
-                    tiene_coords = (lon != 0 and lat != 0 and -100 < lon < -98 and 19 < lat < 20)
-                except:
-                    tiene_coords = False
-                
-                # Clasificar delito
-                tipo_encontrado = None
-                
-                # Homicidios (más específico primero)
-                if 'HOMICIDIO' in delito and 'CULPOSO' not in delito:
-                    tipo_encontrado = 'HOMICIDIOS'
-                    delitos_por_tipo['HOMICIDIOS'][delito] += 1
-                
-                # Asaltos (robos con violencia)
-                elif 'ROBO' in delito and 'VIOLENCIA' in delito:
-                    tipo_encontrado = 'ASALTOS'
-                    delitos_por_tipo['ASALTOS'][delito] += 1
-                
-                # Robos (sin violencia o generales)
-                elif 'ROBO' in delito:
-                    tipo_encontrado = 'ROBOS'
-                    delitos_por_tipo['ROBOS'][delito] += 1
-                
-                if tipo_encontrado and tiene_coords:
-                    delitos_visitantes_counter[delito] += 1
-                    con_coordenadas += 1
-                    delitos_detalle.append({
-                        'tipo': tipo_encontrado,
-                        'delito': row.get('delito', ''),
-                        'fecha': fecha_str,
-                        'lon': lon,
-                        'lat': lat,
-                        'alcaldia': row.get('AlcaldiaHechos', ''),
-                        'colonia': row.get('colonia_datos', '')
-                    })
-        except:
-            pass
-        
-        if registros_2019 % 50000 == 0 and registros_2019 > 0:
-            print(f"  Procesados: {registros_2019:,} registros desde 2019...")
-
-print(f"\n{'='*80}")
-print("ANÁLISIS DE DELITOS PARA VISITANTES (2019)")
-print(f"{'='*80}")
-print(f"Total de registros desde 2019: {registros_2019:,}")
-
-total_robos = sum(delitos_por_tipo['ROBOS'].values())
-total_asaltos = sum(delitos_por_tipo['ASALTOS'].values())
-total_homicidios = sum(delitos_por_tipo['HOMICIDIOS'].values())
-total_general = total_robos + total_asaltos + total_homicidios
-
-print(f"\nDelitos relevantes con coordenadas válidas: {con_coordenadas:,}")
-print(f"\nDesglose:")
-print(f"  - ROBOS (sin violencia): {total_robos:,}")
-print(f"  - ASALTOS (con violencia): {total_asaltos:,}")
-print(f"  - HOMICIDIOS: {total_homicidios:,}")
-print(f"  - TOTAL: {total_general:,}")
-
-print(f"\n{'='*80}")
-print("TOP 10 ROBOS (sin violencia)")
-print(f"{'='*80}")
-for i, (delito, count) in enumerate(delitos_por_tipo['ROBOS'].most_common(10), 1):
-    print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
-
-print(f"\n{'='*80}")
-print("TOP 10 ASALTOS (con violencia)")
-print(f"{'='*80}")
-for i, (delito, count) in enumerate(delitos_por_tipo['ASALTOS'].most_common(10), 1):
-    print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
-
-print(f"\n{'='*80}")
-print("TIPOS DE HOMICIDIOS")
-print(f"{'='*80}")
-for i, (delito, count) in enumerate(delitos_por_tipo['HOMICIDIOS'].most_common(), 1):
-    print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
-
-# Análisis por alcaldía
-print(f"\n{'='*80}")
-print("TOP 15 ALCALDÍAS CON MÁS DELITOS (robos, asaltos, homicidios)")
-print(f"{'='*80}")
-alcaldias_counter = Counter()
-for d in delitos_detalle:
-    if d['alcaldia'] and d['alcaldia'].upper() != 'NA':
-        alcaldias_counter[d['alcaldia']] += 1
-
-for i, (alcaldia, count) in enumerate(alcaldias_counter.most_common(15), 1):
-    print(f"{i:2}. {alcaldia:<40} {count:>6,}")
-
-# Análisis de delitos graves para buffers (homicidios + asaltos más graves)
-print(f"\n{'='*80}")
-print("DELITOS GRAVES PARA BUFFERS DE RIESGO")
-print(f"{'='*80}")
-delitos_graves_buffers = []
-for d in delitos_detalle:
-    if d['tipo'] == 'HOMICIDIOS':
-        delitos_graves_buffers.append(d)
-    elif d['tipo'] == 'ASALTOS' and any(x in d['delito'].upper() for x in [
-        'TRANSEUNTE', 'PASAJERO', 'TAXI', 'METRO', 'MICROBUS', 'CASA HABITACION'
-    ]):
-        delitos_graves_buffers.append(d)
-
-print(f"Total de delitos graves para buffers: {len(delitos_graves_buffers):,}")
-print(f"  - Homicidios: {total_homicidios:,}")
-print(f"  - Asaltos graves (transeúnte, pasajero, casa): {len(delitos_graves_buffers) - total_homicidios:,}")
-
 
+AÑO_MINIMO = 2019
+
+# Asaltos que cuentan como graves para buffers (además de los homicidios)
+ASALTOS_GRAVES = ['TRANSEUNTE', 'PASAJERO', 'TAXI', 'METRO', 'MICROBUS', 'CASA HABITACION']
+
+
+class AnalisisVisitantes(Agregador):
+    """Robos, asaltos y homicidios desde 2019 (delitos relevantes para visitantes)"""
+
+    def __init__(self):
+        # Contadores
+        self.registros_2019 = 0
+        self.con_coordenadas = 0
+        self.delitos_visitantes_counter = Counter()
+        self.delitos_por_tipo = {
+            'ROBOS': Counter(),
+            'ASALTOS': Counter(),
+            'HOMICIDIOS': Counter()
+        }
+        # Solo de los delitos relevantes con coordenadas
+        self.alcaldias_counter = Counter()
+        self.graves_buffers = 0
+
+    def procesar(self, registro):
+        fecha = registro.fecha
+        if fecha is None or fecha.year < AÑO_MINIMO:
+            return
+
+        self.registros_2019 += 1
+        if self.registros_2019 % 50000 == 0:
+            print(f"  Procesados: {self.registros_2019:,} registros desde 2019...")
+
+        etiqueta = registro.campo('delito')
+        delito = etiqueta.upper()
+        if not delito:
+            return
+
+        # Verificar coordenadas
+        tiene_coords = registro.coordenadas_validas
+
+        # Clasificar delito (homicidios, asaltos con violencia y robos)
+        tipo_encontrado = TIPOS_VISITANTES.get(CLASIFICADOR.clasificar(etiqueta).tipo)
+        if tipo_encontrado:
+            self.delitos_por_tipo[tipo_encontrado][delito] += 1
+
+        if tipo_encontrado and tiene_coords:
+            self.delitos_visitantes_counter[delito] += 1
+            self.con_coordenadas += 1
+            alcaldia = registro.fila.get('AlcaldiaHechos', '')
+            if alcaldia and alcaldia.upper() != 'NA':
+                self.alcaldias_counter[alcaldia] += 1
+            if tipo_encontrado == 'HOMICIDIOS' or (tipo_encontrado == 'ASALTOS' and any(
+                    x in registro.fila.get('delito', '').upper() for x in ASALTOS_GRAVES)):
+                self.graves_buffers += 1
+
+    def combinar(self, parcial):
+        self.registros_2019 += parcial.registros_2019
+        self.con_coordenadas += parcial.con_coordenadas
+        self.delitos_visitantes_counter.update(parcial.delitos_visitantes_counter)
+        for tipo, contador in parcial.delitos_por_tipo.items():
+            self.delitos_por_tipo[tipo].update(contador)
+        self.alcaldias_counter.update(parcial.alcaldias_counter)
+        self.graves_buffers += parcial.graves_buffers
+
+    def parametros(self):
+        return {'año_minimo': AÑO_MINIMO}
+
+    def estado(self):
+        return {
+            'registros': self.registros_2019,
+            'con_coordenadas': self.con_coordenadas,
+            'delitos': self.delitos_visitantes_counter,
+            'por_tipo': self.delitos_por_tipo,
+            'alcaldias': self.alcaldias_counter,
+            'graves_buffers': self.graves_buffers,
+        }
+
+    def cargar_estado(self, estado):
+        self.registros_2019 = estado['registros']
+        self.con_coordenadas = estado['con_coordenadas']
+        self.delitos_visitantes_counter = Counter(estado['delitos'])
+        self.delitos_por_tipo = {tipo: Counter(c) for tipo, c in estado['por_tipo'].items()}
+        self.alcaldias_counter = Counter(estado['alcaldias'])
+        self.graves_buffers = estado['graves_buffers']
+
+    def reporte(self):
+        registros_2019 = self.registros_2019
+        con_coordenadas = self.con_coordenadas
+        delitos_por_tipo = self.delitos_por_tipo
+
+        print(f"\n{'='*80}")
+        print("ANÁLISIS DE DELITOS PARA VISITANTES (2019)")
+        print(f"{'='*80}")
+        print(f"Total de registros desde 2019: {registros_2019:,}")
+
+        total_robos = sum(delitos_por_tipo['ROBOS'].values())
+        total_asaltos = sum(delitos_por_tipo['ASALTOS'].values())
+        total_homicidios = sum(delitos_por_tipo['HOMICIDIOS'].values())
+        total_general = total_robos + total_asaltos + total_homicidios
+
+        print(f"\nDelitos relevantes con coordenadas válidas: {con_coordenadas:,}")
+        print(f"\nDesglose:")
+        print(f"  - ROBOS (sin violencia): {total_robos:,}")
+        print(f"  - ASALTOS (con violencia): {total_asaltos:,}")
+        print(f"  - HOMICIDIOS: {total_homicidios:,}")
+        print(f"  - TOTAL: {total_general:,}")
+
+        print(f"\n{'='*80}")
+        print("TOP 10 ROBOS (sin violencia)")
+        print(f"{'='*80}")
+        for i, (delito, count) in enumerate(delitos_por_tipo['ROBOS'].most_common(10), 1):
+            print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
+
+        print(f"\n{'='*80}")
+        print("TOP 10 ASALTOS (con violencia)")
+        print(f"{'='*80}")
+        for i, (delito, count) in enumerate(delitos_por_tipo['ASALTOS'].most_common(10), 1):
+            print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
+
+        print(f"\n{'='*80}")
+        print("TIPOS DE HOMICIDIOS")
+        print(f"{'='*80}")
+        for i, (delito, count) in enumerate(delitos_por_tipo['HOMICIDIOS'].most_common(), 1):
+            print(f"{i:2}. {delito[:70]:<70} {count:>6,}")
+
+        # Análisis por alcaldía
+        print(f"\n{'='*80}")
+        print("TOP 15 ALCALDÍAS CON MÁS DELITOS (robos, asaltos, homicidios)")
+        print(f"{'='*80}")
+        for i, (alcaldia, count) in enumerate(self.alcaldias_counter.most_common(15), 1):
+            print(f"{i:2}. {alcaldia:<40} {count:>6,}")
+
+        # Análisis de delitos graves para buffers (homicidios + asaltos más graves)
+        print(f"\n{'='*80}")
+        print("DELITOS GRAVES PARA BUFFERS DE RIESGO")
+        print(f"{'='*80}")
+        print(f"Total de delitos graves para buffers: {self.graves_buffers:,}")
+        print(f"  - Homicidios: {total_homicidios:,}")
+        print(f"  - Asaltos graves (transeúnte, pasajero, casa): {self.graves_buffers - total_homicidios:,}")
+
+
+if __name__ == '__main__':
+    print("Analizando delitos relevantes para visitantes (robos, asaltos, homicidios)...\n")
+
+    analizar_y_reportar(RUTA_CSV_PGJ, [AnalisisVisitantes()])
@@ -0,0 +1,265 @@
+"""
+Benchmark del pipeline CSV -> GeoJSON con datos sintéticos
+Genera CSVs con la forma del de la PGJ (mezcla realista de delitos, fechas y
+coordenadas inválidas), mide cada etapa de procesar_csv y guarda un reporte JSON
+
+Uso:
+  python scripts/benchmark_pipeline.py                      # 100k, 1M y 5M filas
+  python scripts/benchmark_pipeline.py --filas 100000 --reporte bench.json
+
+Los CSV sintéticos y el reporte van por omisión al directorio temporal del
+sistema, fuera del repositorio
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+
+from clasificador import CLASIFICADOR
+from csv_to_geojson import procesar_csv
+from escaneo import Registro
+
+TAMAÑOS = (100000, 1000000, 5000000)
+DIRECTORIO = os.path.join(tempfile.gettempdir(), 'zonas-seguras-bench')
+RUTA_REPORTE = os.path.join(DIRECTORIO, 'bench_output.json')
+
+COLUMNAS = [
+    'anio_inicio', 'mes_inicio', 'fecha_inicio', 'hora_inicio', 'anio_hecho', 'mes_hecho',
+    'FechaHecho', 'HoraHecho', 'delito', 'categoria_delito', 'competencia', 'fiscalia',
+    'agencia', 'unidad_investigacion', 'colonia_catalogo', 'alcaldia_catalogo',
+    'municipio_hechos', 'AlcaldiaHechos', 'colonia_datos', 'latitud', 'longitud'
+]
+
+# (delito, categoría, peso aproximado en el dump real)
+DELITOS = [
+    ('VIOLENCIA FAMILIAR', 'DELITO DE BAJO IMPACTO', 14),
+    ('ROBO DE OBJETOS', 'DELITO DE BAJO IMPACTO', 8),
+    ('FRAUDE', 'DELITO DE BAJO IMPACTO', 8),
+    ('AMENAZAS', 'DELITO DE BAJO IMPACTO', 7),
+    ('ROBO A NEGOCIO SIN VIOLENCIA', 'DELITO DE BAJO IMPACTO', 6),
+    ('ROBO A TRANSEUNTE EN VIA PUBLICA CON VIOLENCIA', 'ROBO A TRANSEUNTE EN VÍA PÚBLICA CON Y SIN VIOLENCIA', 5),
+    ('ROBO DE ACCESORIOS DE AUTO', 'DELITO DE BAJO IMPACTO', 4),
+    ('ROBO DE VEHICULO DE SERVICIO PARTICULAR SIN VIOLENCIA', 'ROBO DE VEHÍCULO CON Y SIN VIOLENCIA', 4),
+    ('DAÑO EN PROPIEDAD AJENA INTENCIONAL', 'DELITO DE BAJO IMPACTO', 4),
+    ('LESIONES INTENCIONALES POR GOLPES', 'DELITO DE BAJO IMPACTO', 3),
+    ('ROBO A TRANSEUNTE DE CELULAR CON VIOLENCIA', 'ROBO A TRANSEUNTE EN VÍA PÚBLICA CON Y SIN VIOLENCIA', 3),
+    ('ROBO A PASAJERO A BORDO DEL METRO SIN VIOLENCIA', 'DELITO DE BAJO IMPACTO', 2),
+    ('ROBO DE VEHICULO DE SERVICIO PARTICULAR CON VIOLENCIA', 'ROBO DE VEHÍCULO CON Y SIN VIOLENCIA', 2),
+    ('ROBO A CASA HABITACION SIN VIOLENCIA', 'DELITO DE BAJO IMPACTO', 2),
+    ('ROBO A NEGOCIO CON VIOLENCIA', 'ROBO A NEGOCIO CON VIOLENCIA', 1),
+    ('ROBO A PASAJERO A BORDO DE MICROBUS CON VIOLENCIA', 'ROBO A PASAJERO A BORDO DE MICROBUS CON Y SIN VIOLENCIA', 1),
+    ('HOMICIDIO CULPOSO POR TRÁNSITO VEHICULAR (ATROPELLADO)', 'DELITO DE BAJO IMPACTO', 1),
+    ('HOMICIDIO POR ARMA DE FUEGO', 'HOMICIDIO DOLOSO', 1),
+    ('LESIONES DOLOSAS POR DISPARO DE ARMA DE FUEGO', 'LESIONES DOLOSAS POR DISPARO DE ARMA DE FUEGO', 1),
+    ('VIOLACION', 'VIOLACIÓN', 1),
+    ('FEMINICIDIO', 'HOMICIDIO DOLOSO', 1),
+    ('SECUESTRO EXPRESS (PARA COMETER ROBO O EXTORSIÓN)', 'SECUESTRO', 1),
+]
+
+ALCALDIAS = [
+    'IZTAPALAPA', 'CUAUHTEMOC', 'GUSTAVO A MADERO', 'BENITO JUAREZ', 'COYOACAN',
+    'ALVARO OBREGON', 'MIGUEL HIDALGO', 'TLALPAN', 'VENUSTIANO CARRANZA', 'AZCAPOTZALCO',
+    'IZTACALCO', 'XOCHIMILCO', 'TLAHUAC', 'LA MAGDALENA CONTRERAS', 'CUAJIMALPA DE MORELOS',
+    'MILPA ALTA', 'NA'
+]
+
+COLONIAS = ['CENTRO', 'DOCTORES', 'ROMA NORTE', 'DEL VALLE CENTRO', 'AGRÍCOLA ORIENTAL',
+            'SANTA MARÍA LA RIBERA', 'NARVARTE PONIENTE', 'MORELOS', 'GUERRERO', 'OBRERA',
+            'DESARROLLO URBANO QUETZALCOATL', 'SAN FELIPE DE JESÚS', 'NA']
+
+
+def ruta_sintetica(filas, semilla, directorio=DIRECTORIO):
+    return os.path.join(directorio, f'pgj-sintetico-{filas}-{semilla}.csv')
+
+
+def generar_csv_sintetico(ruta, filas, semilla=2019):
+    """
+    Escribe un CSV con la forma del de la PGJ
+    ~10% sin coordenadas, ~2% 'NA', ~1% fuera de CDMX, ~1% fechas inválidas,
+    ~15% anteriores a 2019 y algunas descripciones con comas y saltos de línea
+    """
+    aleatorio = random.Random(semilla)
+    etiquetas = [d for d, _, _ in DELITOS]
+    categorias = {d: c for d, c, _ in DELITOS}
+    pesos = [p for _, _, p in DELITOS]
+    inicio = date(2016, 1, 1)
+    dias = (date(2025, 6, 30) - inicio).days
+
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(COLUMNAS)
+        for _ in range(filas):
+            fecha = inicio + timedelta(days=aleatorio.randrange(dias))
+            fecha_str = fecha.isoformat()
+            r = aleatorio.random()
+            if r < 0.005:
+                fecha_str = 'NA'
+            elif r < 0.01:
+                fecha_str = f'{fecha.year}-13-{fecha.day:02d}'
+
+            r = aleatorio.random()
+            if r < 0.10:
+                lat, lon = '', ''
+            elif r < 0.12:
+                lat, lon = 'NA', 'NA'
+            elif r < 0.13:
+                lat, lon = f'{aleatorio.uniform(20.5, 21):.6f}', f'{aleatorio.uniform(-101, -100.5):.6f}'
+            else:
+                lat, lon = f'{aleatorio.gauss(19.40, 0.08):.6f}', f'{aleatorio.gauss(-99.13, 0.07):.6f}'
+
+            delito = aleatorio.choices(etiquetas, pesos)[0]
+            colonia = aleatorio.choice(COLONIAS)
+            if aleatorio.random() < 0.002:
+                colonia = f'{colonia}, "SECCIÓN"\nNORTE'
+            alcaldia = aleatorio.choice(ALCALDIAS)
+            hora = f'{aleatorio.randrange(24):02d}:{aleatorio.randrange(60):02d}:00'
+            writer.writerow([
+                fecha.year, fecha.month, fecha_str, hora, fecha.year, fecha.month,
+                fecha_str, hora, delito, categorias[delito], 'FUERO COMUN',
+                'INVESTIGACIÓN EN ' + alcaldia, 'AGENCIA 1', 'UI-1SD', colonia, alcaldia,
+                'CIUDAD DE MEXICO', alcaldia, colonia, lat, lon
+            ])
+    return ruta
+
+
+# Etapas acumulativas: el costo de cada una es la diferencia con la anterior
+
+def _etapa_parseo(input_file, año_minimo):
+    filas = 0
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for _ in csv.DictReader(f):
+            filas += 1
+    return filas
+
+
+def _etapa_validacion(input_file, año_minimo):
+    """Parseo + validación de fecha, año mínimo y coordenadas (Registro)"""
+    validos = 0
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for fila in csv.DictReader(f):
+            registro = Registro(fila)
+            if (registro.coordenadas_validas and registro.fecha is not None
+                    and registro.fecha.year >= año_minimo):
+                validos += 1
+    return validos
+
+
+def _etapa_clasificacion(input_file, año_minimo):
+    clasificados = 0
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for fila in csv.DictReader(f):
+            registro = Registro(fila)
+            if (registro.coordenadas_validas and registro.fecha is not None
+                    and registro.fecha.year >= año_minimo
+                    and CLASIFICADOR.clasificar(registro.campo('delito')).tipo):
+                clasificados += 1
+    return clasificados
+
+
+def _etapa_completa(input_file, año_minimo, **opciones):
+    """procesar_csv real, incluida la serialización"""
+    salida = input_file + '.geojson'
+    with redirect_stdout(io.StringIO()):
+        procesar_csv(input_file, salida, año_minimo=año_minimo, **opciones)
+    return os.path.getsize(salida)
+
+
+ETAPAS = [
+    ('parseo', _etapa_parseo, {}),
+    ('validacion_fecha_coordenadas', _etapa_validacion, {}),
+    ('clasificacion', _etapa_clasificacion, {}),
+    ('serializacion', _etapa_completa, {}),
+]
+
+
+def _medir(etapa, input_file, año_minimo, opciones, conexion):
+    """Corre una etapa en un proceso nuevo para que el pico de RSS sea solo suyo"""
+    inicio = time.perf_counter()
+    resultado = etapa(input_file, año_minimo, **opciones)
+    segundos = time.perf_counter() - inicio
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024  # macOS reporta bytes
+    conexion.send((segundos, rss_kb, resultado))
+    conexion.close()
+
+
+def medir_etapa(etapa, input_file, año_minimo=2019, opciones=None):
+    contexto = get_context('spawn')
+    recibir, enviar = contexto.Pipe(duplex=False)
+    proceso = contexto.Process(target=_medir, args=(etapa, input_file, año_minimo, opciones or {}, enviar))
+    proceso.start()
+    enviar.close()
+    segundos, rss_kb, resultado = recibir.recv()
+    proceso.join()
+    return {'segundos': round(segundos, 4), 'rss_max_mb': round(rss_kb / 1024, 1), 'resultado': resultado}
+
+
+def benchmark(tamaños=TAMAÑOS, semilla=2019, directorio=DIRECTORIO, año_minimo=2019, columnar=False,
+              mmap=False):
+    """Mide cada etapa para cada tamaño y regresa el reporte"""
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semilla': semilla,
+        'año_minimo': año_minimo,
+        'tamaños': [],
+    }
+    etapas = list(ETAPAS)
+    if columnar:
+        etapas.append(('completo_columnar', _etapa_completa, {'modo': 'columnar'}))
+    if mmap:
+        etapas.append(('completo_mmap', _etapa_completa, {'lector': 'mmap'}))
+
+    for filas in tamaños:
+        ruta = ruta_sintetica(filas, semilla, directorio)
+        if not os.path.exists(ruta):
+            print(f"Generando {ruta}...")
+            generar_csv_sintetico(ruta, filas, semilla)
+
+        print(f"\nBenchmark con {filas:,} filas ({os.path.getsize(ruta) / 1e6:.1f} MB)")
+        resultado = {'filas': filas, 'bytes': os.path.getsize(ruta), 'etapas': {}}
+        anterior = 0.0
+        for nombre, etapa, opciones in etapas:
+            medicion = medir_etapa(etapa, ruta, año_minimo, opciones)
+            acumulado = medicion['segundos']
+            if etapa is not _etapa_completa or not opciones:
+                medicion['segundos_etapa'] = round(max(0.0, acumulado - anterior), 4)
+                anterior = acumulado
+            medicion['filas_por_segundo'] = round(filas / acumulado) if acumulado else None
+            resultado['etapas'][nombre] = medicion
+            print(f"  {nombre:<30} {acumulado:>8.2f} s  {medicion['filas_por_segundo'] or 0:>10,} filas/s  "
+                  f"RSS {medicion['rss_max_mb']:>8.1f} MB")
+        reporte['tamaños'].append(resultado)
+    return reporte
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, nargs='+', default=list(TAMAÑOS),
+                        help='tamaños de CSV sintético a medir')
+    parser.add_argument('--semilla', type=int, default=2019)
+    parser.add_argument('--directorio', default=DIRECTORIO, help='dónde guardar los CSV sintéticos')
+    parser.add_argument('--columnar', action='store_true', help='medir también el modo columnar (numpy)')
+    parser.add_argument('--mmap', action='store_true', help='medir también el lector con mapa de memoria')
+    parser.add_argument('--reporte', default=RUTA_REPORTE, help='archivo JSON de resultados')
+    args = parser.parse_args()
+
+    reporte = benchmark(args.filas, args.semilla, args.directorio, columnar=args.columnar, mmap=args.mmap)
+    os.makedirs(os.path.dirname(args.reporte) or '.', exist_ok=True)
+    with open(args.reporte, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"\nReporte guardado en {args.reporte}")
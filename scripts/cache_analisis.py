@@ -0,0 +1,119 @@
+"""
+Caché de los resultados de los análisis (analyze_*.py)
+Cada análisis guarda sus contadores ya agregados junto con una clave que
+combina la huella del CSV, los parámetros del análisis y el código de las
+reglas de clasificación; si la clave coincide, el reporte se genera desde la
+caché sin leer el CSV. Si cambia cualquiera de las tres, se recalcula
+"""
+import hashlib
+import json
+import os
+import sys
+
+import clasificador
+import escaneo
+import fechas
+from escaneo import escanear_csv
+from incremental import huella_muestras
+
+RUTA_CACHE = 'data/analisis.cache.json'
+VERSION = 1
+
+
+def huella_fuente(input_file):
+    """Tamaño, fecha de modificación y muestras del contenido del CSV"""
+    info = os.stat(input_file)
+    return {
+        'entrada': os.path.abspath(input_file),
+        'tamaño': info.st_size,
+        'modificado': info.st_mtime_ns,
+        'muestras': huella_muestras(input_file, info.st_size),
+    }
+
+
+def huella_reglas(analisis):
+    """
+    Hash del código que decide cada conteo: clasificador, validación de Registro
+    (escaneo), lectura de fechas y el módulo del análisis (sus reglas y listas)
+    """
+    h = hashlib.sha256()
+    for modulo in (clasificador, escaneo, fechas, sys.modules[type(analisis).__module__]):
+        with open(modulo.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def clave_analisis(fuente, analisis):
+    datos = json.dumps([VERSION, fuente, type(analisis).__name__, analisis.parametros(),
+                        huella_reglas(analisis)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+
+def _cargar(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def cargar_vigentes(fuente, analisis, ruta=RUTA_CACHE):
+    """Llena desde la caché los análisis cuya clave sigue vigente y regresa los que faltan"""
+    cache = _cargar(ruta)
+    pendientes = []
+    for a in analisis:
+        entrada = cache.get(type(a).__name__)
+        if entrada and entrada['clave'] == clave_analisis(fuente, a):
+            a.cargar_estado(entrada['estado'])
+        else:
+            pendientes.append(a)
+    return pendientes
+
+
+def guardar(input_file, analisis, fuente, ruta=RUTA_CACHE):
+    """
+    Guarda el estado de análisis recién calculados; fuente es la huella tomada
+    antes de leer el CSV (si el archivo cambió durante la lectura no se guarda)
+    """
+    if huella_fuente(input_file) != fuente:
+        return False
+    cache = _cargar(ruta)
+    for a in analisis:
+        cache[type(a).__name__] = {'clave': clave_analisis(fuente, a), 'estado': a.estado()}
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(ruta + '.tmp', ruta)
+    return True
+
+
+def analizar(input_file, analisis, ruta=RUTA_CACHE, metricas=None):
+    """
+    Llena cada análisis desde la caché o, si no está vigente, con una sola
+    lectura del CSV para todos los que falten (y actualiza la caché)
+    Regresa la lista de análisis que se recalcularon
+    """
+    fuente = huella_fuente(input_file)
+    pendientes = cargar_vigentes(fuente, analisis, ruta)
+    if pendientes:
+        escanear_csv(input_file, pendientes, metricas=metricas)
+        guardar(input_file, pendientes, fuente, ruta)
+    return pendientes
+
+
+def analizar_y_reportar(input_file, analisis, ruta=RUTA_CACHE):
+    """Punto de entrada de los analyze_*.py; --sin-cache recalcula todo"""
+    from instrumentacion import Metricas, instrumentar
+
+    metricas = Metricas.desde_argv()
+    with instrumentar(metricas):
+        if '--sin-cache' in sys.argv:
+            fuente = huella_fuente(input_file)
+            escanear_csv(input_file, analisis, metricas=metricas)
+            guardar(input_file, analisis, fuente, ruta)
+        elif not analizar(input_file, analisis, ruta, metricas):
+            print(f"(resultados desde la caché {ruta}; --sin-cache para recalcular)")
+    for a in analisis:
+        a.reporte()
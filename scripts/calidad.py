@@ -0,0 +1,197 @@
+"""
+Control de calidad antes de serializar: duplicados y apilamientos de coordenadas
+Cada delito se reduce a un hash de 64 bits de (fecha, hora, delito, lon, lat)
+normalizados y se guarda en una tabla de hashes compacta (8 bytes por casilla
+en vez de una tupla de textos por registro); si la clave ya se vio, el delito
+es un duplicado y no se escribe. Las coordenadas repetidas muchas veces (p. ej.
+el centroide que se usa cuando no hay ubicación) se reportan como sospechosas
+"""
+import hashlib
+import json
+import os
+import sys
+from array import array
+
+from fechas import parsear_fecha
+
+UMBRAL_APILAMIENTO = 100  # delitos en exactamente la misma coordenada para marcarla
+DECIMALES_COORDENADA = 5  # ~1 m: dos capturas del mismo punto cuentan como la misma
+MAX_EJEMPLOS = 20
+VERSION = 1
+
+
+def _hash(texto):
+    """Hash estable entre procesos y corridas (hash() de Python cambia con cada intérprete)"""
+    valor = int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little')
+    return valor or 1  # 0 marca casilla vacía en TablaHashes
+
+
+def normalizar_hora(hora):
+    """'9:05:00' y '09:05' son la misma hora"""
+    partes = hora.strip().split(':')
+    try:
+        return f'{int(partes[0]):02d}:{int(partes[1]):02d}'
+    except (ValueError, IndexError):
+        return hora.strip()
+
+
+def clave_registro(fecha, hora, delito, lon, lat):
+    """Hash de la clave normalizada de un delito"""
+    dia = parsear_fecha(fecha)
+    return _hash('|'.join((
+        dia.isoformat() if dia else fecha.strip(),
+        normalizar_hora(hora),
+        ' '.join(delito.upper().split()),
+        f'{lon:.{DECIMALES_COORDENADA}f}',
+        f'{lat:.{DECIMALES_COORDENADA}f}',
+    )))
+
+
+class TablaHashes:
+    """
+    Conjunto (con conteo) de hashes de 64 bits con direccionamiento abierto
+    Ocupa ~12 bytes por casilla con factor de carga máximo de 1/2
+    """
+
+    def __init__(self, capacidad=1 << 16):
+        self.hashes = array('Q', bytes(8 * capacidad))
+        self.conteos = array('I', bytes(4 * capacidad))
+        self.tamaño = 0
+
+    def __len__(self):
+        return self.tamaño
+
+    def _casilla(self, valor):
+        hashes = self.hashes
+        mascara = len(hashes) - 1
+        i = valor & mascara
+        while hashes[i] and hashes[i] != valor:
+            i = (i + 1) & mascara
+        return i
+
+    def agregar(self, valor):
+        """Suma una aparición del hash y regresa cuántas lleva"""
+        i = self._casilla(valor)
+        if not self.hashes[i]:
+            if 2 * (self.tamaño + 1) > len(self.hashes):
+                self._crecer()
+                i = self._casilla(valor)
+            self.hashes[i] = valor
+            self.tamaño += 1
+        self.conteos[i] += 1
+        return self.conteos[i]
+
+    def _crecer(self):
+        hashes, conteos = self.hashes, self.conteos
+        self.hashes = array('Q', bytes(16 * len(hashes)))
+        self.conteos = array('I', bytes(8 * len(hashes)))
+        for valor, conteo in zip(hashes, conteos):
+            if valor:
+                i = self._casilla(valor)
+                self.hashes[i] = valor
+                self.conteos[i] = conteo
+
+    def guardar(self, f):
+        f.write(len(self.hashes).to_bytes(8, 'little'))
+        f.write(self.tamaño.to_bytes(8, 'little'))
+        for datos in (self.hashes, self.conteos):
+            if sys.byteorder != 'little':
+                datos = array(datos.typecode, datos)
+                datos.byteswap()
+            datos.tofile(f)
+
+    @classmethod
+    def cargar(cls, f):
+        capacidad = int.from_bytes(f.read(8), 'little')
+        tabla = cls(0)
+        tabla.tamaño = int.from_bytes(f.read(8), 'little')
+        for datos in (tabla.hashes, tabla.conteos):
+            datos.fromfile(f, capacidad)
+            if sys.byteorder != 'little':
+                datos.byteswap()
+        return tabla
+
+
+class ControlCalidad:
+    """
+    Revisa cada feature antes de escribirlo; revisar() regresa False si es duplicado
+    El reporte va a <ruta> y las tablas de hashes a <ruta sin extensión>.claves
+    para poder continuar una corrida incremental
+    """
+
+    def __init__(self, ruta, continuar=False):
+        self.ruta = ruta
+        self.claves = TablaHashes()
+        self.coordenadas = TablaHashes()
+        self.apilamientos = {}  # (lon, lat) -> registros, solo las que pasan el umbral
+        self.revisados = 0
+        self.duplicados = {}    # tipo -> duplicados eliminados
+        self.ejemplos = []
+        if continuar:
+            self._cargar()
+
+    @property
+    def ruta_claves(self):
+        return os.path.splitext(self.ruta)[0] + '.claves'
+
+    def _cargar(self):
+        with open(self.ruta, encoding='utf-8') as f:
+            previo = json.load(f)
+        self.revisados = previo['revisados']
+        self.duplicados = previo['duplicados_por_tipo']
+        self.ejemplos = previo['ejemplos_duplicados']
+        self.apilamientos = {(a['lon'], a['lat']): a['registros'] for a in previo['apilamientos']}
+        with open(self.ruta_claves, 'rb') as f:
+            self.claves = TablaHashes.cargar(f)
+            self.coordenadas = TablaHashes.cargar(f)
+
+    def revisar(self, feature):
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        self.revisados += 1
+        clave = clave_registro(props['fecha'], props['hora'], props['delito'], lon, lat)
+        if self.claves.agregar(clave) > 1:
+            self.duplicados[props['tipo']] = self.duplicados.get(props['tipo'], 0) + 1
+            if len(self.ejemplos) < MAX_EJEMPLOS:
+                self.ejemplos.append({'fecha': props['fecha'], 'hora': props['hora'],
+                                      'delito': props['delito'], 'lon': lon, 'lat': lat})
+            return False
+
+        punto = (round(lon, DECIMALES_COORDENADA), round(lat, DECIMALES_COORDENADA))
+        registros = self.coordenadas.agregar(_hash(f'{punto[0]:.{DECIMALES_COORDENADA}f}|'
+                                                   f'{punto[1]:.{DECIMALES_COORDENADA}f}'))
+        if registros >= UMBRAL_APILAMIENTO:
+            self.apilamientos[punto] = registros
+        return True
+
+    @property
+    def total_duplicados(self):
+        return sum(self.duplicados.values())
+
+    def apilamientos_ordenados(self):
+        return sorted(self.apilamientos.items(), key=lambda item: (-item[1], item[0]))
+
+    def guardar(self):
+        apilamientos = [{'lon': lon, 'lat': lat, 'registros': n}
+                        for (lon, lat), n in self.apilamientos_ordenados()]
+        reporte = {
+            'version': VERSION,
+            'revisados': self.revisados,
+            'conservados': self.revisados - self.total_duplicados,
+            'duplicados': self.total_duplicados,
+            'duplicados_por_tipo': self.duplicados,
+            'claves_distintas': len(self.claves),
+            'ejemplos_duplicados': self.ejemplos,
+            'umbral_apilamiento': UMBRAL_APILAMIENTO,
+            'coordenadas_apiladas': len(apilamientos),
+            'registros_apilados': sum(a['registros'] for a in apilamientos),
+            'apilamientos': apilamientos,  # de más a menos registros
+        }
+        with open(self.ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=1)
+        os.replace(self.ruta + '.tmp', self.ruta)
+
+        with open(self.ruta_claves + '.tmp', 'wb') as f:
+            self.claves.guardar(f)
+            self.coordenadas.guardar(f)
+        os.replace(self.ruta_claves + '.tmp', self.ruta_claves)
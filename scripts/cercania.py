@@ -0,0 +1,350 @@
+"""
+Consultas de cercanía sobre los delitos clasificados
+"¿Cuántos delitos violentos hay a 500 m de este hotel en el último año?"
+Los puntos de la exportación binaria (escritor_binario.py) se proyectan a
+metros y se ordenan por celda de una rejilla; una consulta solo revisa las
+filas de celdas que toca el círculo, cada una un rango contiguo de los arreglos
+
+Uso:
+  python scripts/cercania.py contar 19.4326 -99.1332 --radio 500 --tipo asalto --dias 365
+  python scripts/cercania.py cercanos 19.4326 -99.1332 --k 5
+  python scripts/cercania.py servir --puerto 8765
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from escritor_binario import CODIGOS_JS, MAGIA, TIPOS, VERSIONES_LEGIBLES
+
+RUTA_BINARIO = 'data/delitos-cdmx.bin'
+CELDA_METROS = 250
+RADIO_TIERRA = 6371008.8
+PUERTO = 8765
+MAX_LOTE = 10000
+
+
+class IndiceCercania:
+    """Índice de rejilla sobre coordenadas proyectadas (equirectangular local, en metros)"""
+
+    def __init__(self, lat, lon, dia, tipo, grave, delito=None, alcaldia=None, diccionarios=None,
+                 celda=CELDA_METROS):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self.celda = celda
+        self.lat0 = float(lat.mean()) if len(lat) else 19.4
+        self.lon0 = float(lon.mean()) if len(lon) else -99.1
+        self._escala_x = math.radians(1) * RADIO_TIERRA * math.cos(math.radians(self.lat0))
+        self._escala_y = math.radians(1) * RADIO_TIERRA
+        x, y = self.proyectar(lat, lon)
+
+        self.x0 = float(x.min()) if len(x) else 0.0
+        self.y0 = float(y.min()) if len(y) else 0.0
+        cx = ((x - self.x0) // celda).astype(np.int64)
+        cy = ((y - self.y0) // celda).astype(np.int64)
+        self.columnas = int(cx.max()) + 1 if len(cx) else 1
+        self.filas = int(cy.max()) + 1 if len(cy) else 1
+
+        # Orden por celda (fila por fila): las celdas x0..x1 de una fila quedan contiguas
+        ids = cy * self.columnas + cx
+        orden = np.argsort(ids, kind='stable')
+        self.orden = orden
+        self.x = x[orden]
+        self.y = y[orden]
+        self.dia = np.asarray(dia, dtype=np.int32)[orden]
+        self.tipo = np.asarray(tipo, dtype=np.uint8)[orden]
+        self.grave = np.asarray(grave, dtype=bool)[orden]
+        self.lat = lat[orden]
+        self.lon = lon[orden]
+        self.delito = None if delito is None else np.asarray(delito)[orden]
+        self.alcaldia = None if alcaldia is None else np.asarray(alcaldia)[orden]
+        self.diccionarios = diccionarios or {}
+        self.inicios = np.searchsorted(ids[orden], np.arange(self.filas * self.columnas + 1))
+        self.ultimo_dia = int(self.dia.max()) if len(self.dia) else None
+
+    def __len__(self):
+        return len(self.x)
+
+    @classmethod
+    def desde_binario(cls, ruta=RUTA_BINARIO, celda=CELDA_METROS):
+        """Carga la exportación binaria (<ruta> y <ruta>.json)"""
+        with open(ruta + '.json', encoding='utf-8') as f:
+            indice = json.load(f)
+        datos = np.fromfile(ruta, dtype=np.uint8)
+        if bytes(datos[:4]) != MAGIA or indice['version'] not in VERSIONES_LEGIBLES:
+            raise ValueError(f"{ruta} no es una exportación binaria compatible")
+        total = indice['registros']
+        columnas = {}
+        for c in indice['columnas']:
+            dtype = np.dtype(CODIGOS_JS[c['tipo']]).newbyteorder('<')
+            columnas[c['nombre']] = np.frombuffer(datos, dtype, total, c['offset'])
+
+        base = date.fromisoformat(indice['dia_base']).toordinal()
+        graves = np.array(indice['delito_es_grave'] or [False], dtype=bool)
+        return cls(columnas['lat'], columnas['lon'], columnas['dia'].astype(np.int32) + base,
+                   columnas['tipo'], graves[columnas['delito']], columnas['delito'], columnas['alcaldia'],
+                   indice['diccionarios'], celda)
+
+    def proyectar(self, lat, lon):
+        x = (np.asarray(lon, dtype=np.float64) - self.lon0) * self._escala_x
+        y = (np.asarray(lat, dtype=np.float64) - self.lat0) * self._escala_y
+        return x, y
+
+    def _dias(self, desde=None, hasta=None, dias=None):
+        """Convierte los filtros de fecha a ordinales; dias cuenta hacia atrás desde el último dato"""
+        if isinstance(desde, str):
+            desde = date.fromisoformat(desde).toordinal()
+        if isinstance(hasta, str):
+            hasta = date.fromisoformat(hasta).toordinal()
+        if dias is not None and self.ultimo_dia is not None:
+            desde = max(desde or 0, self.ultimo_dia - dias + 1)
+        return desde, hasta
+
+    def _candidatos(self, x, y, radio):
+        """Índices (en el orden interno) de las celdas que toca el círculo"""
+        c0 = max(int((x - radio - self.x0) // self.celda), 0)
+        c1 = min(int((x + radio - self.x0) // self.celda), self.columnas - 1)
+        f0 = max(int((y - radio - self.y0) // self.celda), 0)
+        f1 = min(int((y + radio - self.y0) // self.celda), self.filas - 1)
+        if c0 > c1 or f0 > f1:
+            return np.empty(0, dtype=np.int64)
+        inicios = self.inicios
+        rangos = [np.arange(inicios[f * self.columnas + c0], inicios[f * self.columnas + c1 + 1])
+                  for f in range(f0, f1 + 1)]
+        return np.concatenate(rangos)
+
+    def _filtrar(self, indices, tipos, desde, hasta, graves):
+        mascara = np.ones(len(indices), dtype=bool)
+        if tipos:
+            mascara &= np.isin(self.tipo[indices], [TIPOS.index(t) for t in tipos])
+        if desde is not None:
+            mascara &= self.dia[indices] >= desde
+        if hasta is not None:
+            mascara &= self.dia[indices] <= hasta
+        if graves:
+            mascara &= self.grave[indices]
+        return indices[mascara]
+
+    def _dentro(self, lat, lon, radio, tipos=None, desde=None, hasta=None, dias=None, graves=False):
+        """(índices, distancias) de los delitos a no más de `radio` metros"""
+        desde, hasta = self._dias(desde, hasta, dias)
+        x, y = self.proyectar(lat, lon)
+        x, y = float(x), float(y)
+        indices = self._filtrar(self._candidatos(x, y, radio), tipos, desde, hasta, graves)
+        distancias = np.hypot(self.x[indices] - x, self.y[indices] - y)
+        cerca = distancias <= radio
+        return indices[cerca], distancias[cerca]
+
+    def contar(self, lat, lon, radio, tipos=None, desde=None, hasta=None, dias=None, graves=False):
+        """Delitos a no más de `radio` metros; tipos es una lista de 'robo'/'asalto'/'homicidio'"""
+        indices, _ = self._dentro(lat, lon, radio, tipos, desde, hasta, dias, graves)
+        return len(indices)
+
+    def contar_por_tipo(self, lat, lon, radio, **filtros):
+        indices, _ = self._dentro(lat, lon, radio, **filtros)
+        conteos = np.bincount(self.tipo[indices], minlength=len(TIPOS))
+        return {tipo: int(n) for tipo, n in zip(TIPOS, conteos)}
+
+    def cercanos(self, lat, lon, k=5, radio_maximo=None, tipos=None, desde=None, hasta=None, dias=None,
+                 graves=False):
+        """Los k delitos más cercanos como [(distancia en metros, registro)], del más cercano al más lejano"""
+        desde, hasta = self._dias(desde, hasta, dias)
+        x, y = self.proyectar(lat, lon)
+        x, y = float(x), float(y)
+        extension = math.hypot(self.columnas, self.filas) * self.celda + abs(x) + abs(y)
+        limite = radio_maximo if radio_maximo is not None else extension
+        radio = min(self.celda, limite)
+        while True:
+            indices = self._filtrar(self._candidatos(x, y, radio), tipos, desde, hasta, graves)
+            distancias = np.hypot(self.x[indices] - x, self.y[indices] - y)
+            dentro = distancias <= radio
+            # Solo es definitivo si hay k puntos dentro del círculo (no solo en sus celdas)
+            if dentro.sum() >= k or radio >= limite:
+                indices, distancias = indices[dentro], distancias[dentro]
+                break
+            radio = min(radio * 2, limite)
+        orden = np.lexsort((indices, distancias))[:k]
+        return [(float(distancias[i]), self.registro(int(indices[i]))) for i in orden]
+
+    def contar_lote(self, puntos, radio, **filtros):
+        """Conteo para muchos puntos [(lat, lon), ...] con los mismos filtros"""
+        return [self.contar(lat, lon, radio, **filtros) for lat, lon in puntos]
+
+    def registro(self, i):
+        """Registro i (en el orden interno) como dict"""
+        resultado = {
+            'lat': round(float(self.lat[i]), 6),
+            'lon': round(float(self.lon[i]), 6),
+            'fecha': date.fromordinal(int(self.dia[i])).isoformat(),
+            'tipo': TIPOS[self.tipo[i]],
+            'es_grave': bool(self.grave[i]),
+        }
+        if self.delito is not None and 'delito' in self.diccionarios:
+            resultado['delito'] = self.diccionarios['delito'][self.delito[i]]
+        if self.alcaldia is not None and 'alcaldia' in self.diccionarios:
+            resultado['alcaldia'] = self.diccionarios['alcaldia'][self.alcaldia[i]]
+        return resultado
+
+
+# Servidor HTTP local
+
+def finito(valor):
+    """float de un parámetro; inf y nan no caen en ninguna celda de la rejilla"""
+    numero = float(valor)
+    if not math.isfinite(numero):
+        raise ValueError(f"se esperaba un número finito: {valor}")
+    return numero
+
+
+def _filtros(parametros):
+    """Filtros comunes de una consulta (query string o cuerpo JSON)"""
+    tipos = parametros.get('tipos') or parametros.get('tipo')
+    if isinstance(tipos, str):
+        tipos = [t for t in tipos.split(',') if t]
+    for tipo in tipos or []:
+        if tipo not in TIPOS:
+            raise ValueError(f"tipo desconocido: {tipo}")
+    dias = parametros.get('dias')
+    return {
+        'tipos': tipos or None,
+        'desde': parametros.get('desde') or None,
+        'hasta': parametros.get('hasta') or None,
+        'dias': int(dias) if dias not in (None, '') else None,
+        'graves': str(parametros.get('graves', '')).lower() in ('1', 'true', 'si', 'sí'),
+    }
+
+
+def crear_servidor(indice, puerto=PUERTO, host='127.0.0.1'):
+    """
+    GET  /contar?lat=&lon=&radio=500[&tipos=robo,asalto&dias=365&desde=&hasta=&graves=1]
+    GET  /cercanos?lat=&lon=&k=5[&radio=...&mismos filtros]
+    POST /lote {"puntos": [[lat, lon], ...], "radio": 500, ...filtros}
+    """
+
+    class Manejador(BaseHTTPRequestHandler):
+        def _responder(self, estado, cuerpo):
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+            self.send_response(estado)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(datos)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parametros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                lat, lon = finito(parametros['lat']), finito(parametros['lon'])
+                filtros = _filtros(parametros)
+                if url.path == '/contar':
+                    radio = finito(parametros.get('radio', 500))
+                    self._responder(200, {'radio': radio, 'total': indice.contar(lat, lon, radio, **filtros),
+                                          'por_tipo': indice.contar_por_tipo(lat, lon, radio, **filtros)})
+                elif url.path == '/cercanos':
+                    radio = parametros.get('radio')
+                    k = int(parametros.get('k', 5))
+                    if k < 1:
+                        raise ValueError(f"k debe ser al menos 1: {k}")
+                    cercanos = indice.cercanos(lat, lon, k, finito(radio) if radio else None, **filtros)
+                    self._responder(200, {'cercanos': [{'distancia': round(d, 1), **r} for d, r in cercanos]})
+                else:
+                    self._responder(404, {'error': f'ruta desconocida: {url.path}'})
+            except (KeyError, ValueError, TypeError, OverflowError) as e:
+                self._responder(400, {'error': f'parámetro inválido o faltante: {e}'})
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/lote':
+                self._responder(404, {'error': f'ruta desconocida: {self.path}'})
+                return
+            try:
+                cuerpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                puntos = cuerpo['puntos']
+                if len(puntos) > MAX_LOTE:
+                    raise ValueError(f"máximo {MAX_LOTE} puntos por lote")
+                # json.loads acepta Infinity y NaN
+                puntos = [(finito(lat), finito(lon)) for lat, lon in puntos]
+                radio = finito(cuerpo.get('radio', 500))
+                conteos = indice.contar_lote(puntos, radio, **_filtros(cuerpo))
+                self._responder(200, {'radio': radio, 'conteos': conteos})
+            except (KeyError, ValueError, TypeError, OverflowError) as e:
+                self._responder(400, {'error': f'cuerpo inválido: {e}'})
+
+        def log_message(self, formato, *args):
+            pass  # sin una línea por consulta en la terminal
+
+    return ThreadingHTTPServer((host, puerto), Manejador)
+
+
+def _medir(indice, consultas, radio):
+    """Consultas por segundo con puntos al azar alrededor de los datos"""
+    generador = np.random.default_rng(2019)
+    muestra = generador.integers(0, len(indice), consultas)
+    puntos = list(zip(indice.lat[muestra] + generador.normal(0, 0.005, consultas),
+                      indice.lon[muestra] + generador.normal(0, 0.005, consultas)))
+    inicio = time.perf_counter()
+    indice.contar_lote(puntos, radio, dias=365)
+    segundos = time.perf_counter() - inicio
+    print(f"{consultas:,} conteos de {radio:g} m en {segundos:.2f} s ({consultas / segundos:,.0f} consultas/s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Consultas de cercanía sobre la exportación binaria de delitos')
+    parser.add_argument('--binario', default=RUTA_BINARIO)
+    sub = parser.add_subparsers(dest='consulta', required=True)
+
+    for nombre, ayuda in [('contar', 'delitos dentro de un radio'), ('cercanos', 'los k delitos más cercanos')]:
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument('lat', type=finito)
+        p.add_argument('lon', type=finito)
+        p.add_argument('--radio', type=finito, default=500 if nombre == 'contar' else None)
+        p.add_argument('--tipo', action='append', choices=TIPOS, help='se puede repetir')
+        p.add_argument('--desde', help='AAAA-MM-DD')
+        p.add_argument('--hasta', help='AAAA-MM-DD')
+        p.add_argument('--dias', type=int, help='solo los últimos N días de datos')
+        p.add_argument('--graves', action='store_true')
+        if nombre == 'cercanos':
+            p.add_argument('--k', type=int, default=5)
+    servir = sub.add_parser('servir', help='servidor HTTP local')
+    servir.add_argument('--puerto', type=int, default=PUERTO)
+    servir.add_argument('--host', default='127.0.0.1')
+    medir = sub.add_parser('medir', help='consultas por segundo')
+    medir.add_argument('--consultas', type=int, default=10000)
+    medir.add_argument('--radio', type=float, default=500)
+    args = parser.parse_args()
+
+    try:
+        indice = IndiceCercania.desde_binario(args.binario)
+    except FileNotFoundError:
+        print(f"Error: No se encontró {args.binario}. Genéralo con: python scripts/csv_to_geojson.py")
+        sys.exit(1)
+
+    if args.consulta in ('contar', 'cercanos'):
+        filtros = {'tipos': args.tipo, 'desde': args.desde, 'hasta': args.hasta, 'dias': args.dias,
+                   'graves': args.graves}
+        if args.consulta == 'contar':
+            por_tipo = indice.contar_por_tipo(args.lat, args.lon, args.radio, **filtros)
+            print(f"Delitos a {args.radio:g} m de ({args.lat}, {args.lon}): {sum(por_tipo.values()):,}")
+            for tipo, n in por_tipo.items():
+                print(f"  - {tipo}: {n:,}")
+        else:
+            for distancia, registro in indice.cercanos(args.lat, args.lon, args.k, args.radio, **filtros):
+                print(f"{distancia:>8.1f} m  {registro['fecha']}  {registro['tipo']:<10} "
+                      f"{registro.get('delito', '')[:50]}")
+    elif args.consulta == 'servir':
+        servidor = crear_servidor(indice, args.puerto, args.host)
+        print(f"{len(indice):,} delitos indexados; escuchando en http://{args.host}:{args.puerto} (Ctrl+C para salir)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+    else:
+        _medir(indice, args.consultas, args.radio)
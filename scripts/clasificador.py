@@ -0,0 +1,99 @@
+"""
+Clasificador de delitos compartido por todos los scripts
+Compila las reglas una sola vez y memoriza el resultado por etiqueta de delito
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Delitos graves para buffers de riesgo (se evalúan como expresiones regulares)
+DELITOS_GRAVES_LISTA = [
+    'HOMICIDIO DOLOSO',
+    'HOMICIDIO POR ARMA DE FUEGO',
+    'HOMICIDIO POR ARMA BLANCA',
+    'FEMINICIDIO',
+    'VIOLACION',
+    'VIOLACION EQUIPARADA',
+    'VIOLACION TUMULTUARIA',
+    'SECUESTRO',
+    'PLAGIO O SECUESTRO',
+    'SECUESTRO EXPRESS',
+    'ROBO A TRANSEUNTE EN VIA PUBLICA CON VIOLENCIA',
+    'ROBO A TRANSEUNTE DE CELULAR CON VIOLENCIA',
+    'ROBO A NEGOCIO CON VIOLENCIA',
+    'ROBO A CASA HABITACION CON VIOLENCIA',
+    'ROBO A CUENTAHABIENTE SALIENDO DEL CAJERO CON VIOLENCIA',
+    'ROBO A PASAJERO A BORDO DEL METRO CON VIOLENCIA',
+    'ROBO A PASAJERO A BORDO DE MICROBUS CON VIOLENCIA',
+    'ROBO A PASAJERO A BORDO DE TAXI CON VIOLENCIA',
+    'ROBO DE VEHICULO.*CON VIOLENCIA',
+    'LESIONES DOLOSAS POR DISPARO DE ARMA DE FUEGO'
+]
+
+# Grupos de delitos graves para el resumen general
+DELITOS_GRAVES_KEYWORDS = ['HOMICIDIO', 'FEMINICIDIO', 'VIOLACION', 'ROBO.*VIOLENCIA', 'SECUESTRO']
+
+# Palabras que hacen grave a un delito (salvo los culposos)
+GRAVES = ['HOMICIDIO', 'FEMINICIDIO', 'VIOLACION', 'SECUESTRO']
+
+TAMAÑO_CACHE = 4096
+
+Clasificacion = namedtuple('Clasificacion', ['tipo', 'es_grave', 'grave_buffer', 'grupo_grave'])
+Clasificacion.__doc__ = """Resultado de clasificar una etiqueta de delito
+tipo: 'robo', 'asalto', 'homicidio' o None
+es_grave: grave para buffers del mapa (csv_to_geojson)
+grave_buffer: coincide con DELITOS_GRAVES_LISTA (analyze_2019)
+grupo_grave: primera de DELITOS_GRAVES_KEYWORDS que coincide, o None"""
+
+SIN_CLASIFICAR = Clasificacion(None, False, False, None)
+
+
+class ClasificadorDelitos:
+    """Reglas de clasificación compiladas con caché acotada por etiqueta"""
+
+    def __init__(self, tamaño_cache=TAMAÑO_CACHE):
+        # Una sola expresión para saber si es grave para buffers
+        self._grave_buffer = re.compile('|'.join(f'(?:{p.upper()})' for p in DELITOS_GRAVES_LISTA))
+        # Los grupos se prueban en orden: gana el primero que coincide
+        self._grupos = [(k, re.compile(k)) for k in DELITOS_GRAVES_KEYWORDS]
+        self.clasificar = lru_cache(maxsize=tamaño_cache)(self._clasificar)
+
+    def _clasificar(self, delito):
+        """Aplica todas las reglas a una etiqueta (sin caché)"""
+        if not delito:
+            return SIN_CLASIFICAR
+
+        delito_upper = delito.upper()
+        homicidio = 'HOMICIDIO' in delito_upper
+        culposo = 'CULPOSO' in delito_upper
+        robo_violento = 'ROBO' in delito_upper and 'VIOLENCIA' in delito_upper
+
+        # Homicidios (excluir culposos), asaltos (robos con violencia) y robos
+        if homicidio and not culposo:
+            tipo = 'homicidio'
+        elif robo_violento:
+            tipo = 'asalto'
+        elif 'ROBO' in delito_upper:
+            tipo = 'robo'
+        else:
+            tipo = None
+
+        es_grave = robo_violento or (not culposo and any(g in delito_upper for g in GRAVES))
+
+        grupo_grave = None
+        for keyword, patron in self._grupos:
+            if patron.search(delito_upper):
+                grupo_grave = keyword
+                break
+
+        return Clasificacion(tipo, es_grave,
+                             self._grave_buffer.search(delito_upper) is not None,
+                             grupo_grave)
+
+    def clasificar_lote(self, delitos):
+        """Clasifica una secuencia de etiquetas; cada etiqueta distinta se evalúa una vez"""
+        clasificar = self.clasificar
+        return [clasificar(d) for d in delitos]
+
+
+CLASIFICADOR = ClasificadorDelitos()
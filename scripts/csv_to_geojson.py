@@ -2,9 +2,23 @@
 Script para convertir el CSV de delitos de la Fiscalía a GeoJSON
 Filtra solo robos, asaltos y homicidios con coordenadas válidas
 """
-import csv
-import json
-from datetime import datetime
+import os
+import shutil
+import sys
+
+from alcaldias import IndiceAlcaldias
+from almacen import AlmacenDelitos
+from calidad import ControlCalidad, UMBRAL_APILAMIENTO
+from clasificador import CLASIFICADOR
+from escaneo import Agregador, Escaneo, escanear_csv, es_comprimido
+from escritor_binario import EscritorBinario
+from escritor_geojson import EscritorGeoJSON
+from hotspots import EscritorHotspots
+from incremental import guardar_manifiesto, planear, ruta_manifiesto
+from instrumentacion import instrumentar_etapa
+from particiones import EscritorParticiones
+from rejilla import EscritorRejilla
+from teselas import EscritorTeselas
 
 def es_coordenada_valida(lon, lat):
     """Valida que las coordenadas estén en el rango de CDMX"""
@@ -18,158 +32,432 @@ def es_coordenada_valida(lon, lat):
 
 def clasificar_delito(delito_str):
     """Clasifica el delito en robo, asalto o homicidio"""
-    if not delito_str:
-        return None
-    
-    delito_upper = delito_str.upper()
-    
-    # Homicidios (excluir culposos)
-    if 'HOMICIDIO' in delito_upper and 'CULPOSO' not in delito_upper:
-        return 'homicidio'
-    
-    # Asaltos (robos con violencia)
-    if 'ROBO' in delito_upper and 'VIOLENCIA' in delito_upper:
-        return 'asalto'
-    
-    # Robos (sin violencia o generales)
-    if 'ROBO' in delito_upper:
-        return 'robo'
-    
-    return None
+    return CLASIFICADOR.clasificar(delito_str).tipo
 
 def es_delito_grave(delito_str):
     """Determina si un delito es grave (para buffers)"""
-    if not delito_str:
-        return False
-    
-    delito_upper = delito_str.upper()
-    graves = ['HOMICIDIO', 'FEMINICIDIO', 'VIOLACION', 'SECUESTRO']
-    
-    for grave in graves:
-        if grave in delito_upper and 'CULPOSO' not in delito_upper:
-            return True
-    
-    # Robos con violencia también son graves
-    if 'ROBO' in delito_upper and 'VIOLENCIA' in delito_upper:
-        return True
-    
-    return False
-
-def procesar_csv(input_file, output_file, año_minimo=2019):
-    """Procesa el CSV y genera un GeoJSON"""
-    features = []
-    contador = {
-        'total': 0,
-        'con_coordenadas': 0,
-        'filtrados': 0,
-        'robos': 0,
-        'asaltos': 0,
-        'homicidios': 0
-    }
-    
-    print(f"Procesando {input_file}...")
-    print(f"Filtrando delitos desde {año_minimo} en adelante...\n")
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            contador['total'] += 1
-            
-            # Validar coordenadas
-            lon = row.get('longitud', '').strip()
-            lat = row.get('latitud', '').strip()
-            
-            if not es_coordenada_valida(lon, lat):
-                continue
-            
-            contador['con_coordenadas'] += 1
-            
-            # Validar fecha
-            fecha_str = row.get('FechaHecho', '').strip()
-            if not fecha_str or fecha_str == 'NA':
-                continue
-            
-            try:
-                fecha = datetime.strptime(fecha_str, '%Y-%m-%d')
-                if fecha.year < año_minimo:
-                    continue
-            except:
-                continue
-            
-            # Clasificar delito
-            delito = row.get('delito', '').strip()
-            tipo = clasificar_delito(delito)
-            
-            if not tipo:
-                continue
-            
-            contador['filtrados'] += 1
-            contador[tipo + 's'] += 1  # robos, asaltos, homicidios
-            
-            # Crear feature GeoJSON
-            feature = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [float(lon), float(lat)]
-                },
-                "properties": {
-                    "fecha": fecha_str,
-                    "delito": delito,
-                    "categoria": row.get('categoria_delito', '').strip(),
-                    "alcaldia": row.get('AlcaldiaHechos', '').strip(),
-                    "colonia": row.get('colonia_datos', '').strip(),
-                    "tipo": tipo,
-                    "es_grave": es_delito_grave(delito),
-                    "hora": row.get('HoraHecho', '').strip(),
-                    "año": fecha.year,
-                    "mes": fecha.month
-                }
+    return CLASIFICADOR.clasificar(delito_str).es_grave
+
+class GeneradorGeoJSON(Agregador):
+    """Agregador que arma el GeoJSON de robos, asaltos y homicidios"""
+
+    def __init__(self, output_file, año_minimo=2019, compacto=False, precision=None,
+                 salida_binaria=None, continuar=False, fragmento=False, salida_rejilla=None,
+                 limites_alcaldias=None, salida_teselas=None, salida_particiones=None,
+                 salida_hotspots=None, salida_riesgo=None, salida_calidad=None, salida_horarios=None,
+                 año_maximo=None, tipos=None):
+        # output_file=None omite el GeoJSON y deja solo las demás salidas
+        self.output_file = output_file
+        self.año_minimo = año_minimo
+        self.año_maximo = año_maximo
+        self.tipos = tipos  # None para los tres
+        self.compacto = compacto
+        self.precision = precision
+        self.salida_binaria = salida_binaria
+        self.salida_rejilla = salida_rejilla
+        self.salida_teselas = salida_teselas
+        self.salida_particiones = salida_particiones
+        self.salida_hotspots = salida_hotspots
+        self.salida_riesgo = salida_riesgo
+        self.salida_horarios = salida_horarios
+        self.continuar = continuar
+        self.fragmento = fragmento
+        self.salidas = None
+        self.max_fecha = ''
+        # Con limites_alcaldias cada feature lleva el CVEGEO asignado por geometría
+        self.limites_alcaldias = limites_alcaldias
+        self.indice_alcaldias = None
+        # Con salida_calidad se descartan los duplicados antes de escribir (calidad.py)
+        self.salida_calidad = salida_calidad
+        self.calidad = ControlCalidad(salida_calidad, continuar) if salida_calidad else None
+        self.contador = {
+            'total': 0,
+            'con_coordenadas': 0,
+            'filtrados': 0,
+            'robos': 0,
+            'asaltos': 0,
+            'homicidios': 0,
+            'sin_alcaldia': 0,
+            'duplicados': 0
+        }
+
+    def procesar(self, registro):
+        contador = self.contador
+        contador['total'] += 1
+
+        # Validar coordenadas
+        if not registro.coordenadas_validas:
+            return
+
+        contador['con_coordenadas'] += 1
+
+        # Validar fecha
+        fecha = registro.fecha
+        if fecha is None or fecha.year < self.año_minimo:
+            return
+        if self.año_maximo is not None and fecha.year > self.año_maximo:
+            return
+
+        # Clasificar delito
+        delito = registro.campo('delito')
+        clasificacion = CLASIFICADOR.clasificar(delito)
+        tipo = clasificacion.tipo
+
+        if not tipo or (self.tipos and tipo not in self.tipos):
+            return
+
+        contador['filtrados'] += 1
+        contador[tipo + 's'] += 1  # robos, asaltos, homicidios
+
+        # Crear feature GeoJSON
+        feature = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [registro.lon, registro.lat]
+            },
+            "properties": {
+                "fecha": registro.fecha_str,
+                "delito": delito,
+                "categoria": registro.campo('categoria_delito'),
+                "alcaldia": registro.campo('AlcaldiaHechos'),
+                "colonia": registro.campo('colonia_datos'),
+                "tipo": tipo,
+                "es_grave": clasificacion.es_grave,
+                "hora": registro.campo('HoraHecho'),
+                "año": fecha.year,
+                "mes": fecha.month
             }
-            
-            features.append(feature)
-            
-            # Mostrar progreso cada 10k registros
-            if contador['filtrados'] % 10000 == 0:
-                print(f"  Procesados: {contador['filtrados']:,} delitos válidos...")
+        }
+
+        # Mostrar progreso cada 10k registros (un duplicado descartado no avanza el conteo)
+        if self.agregar(feature) and contador['filtrados'] % 10000 == 0:
+            print(f"  Procesados: {contador['filtrados']:,} delitos válidos...")
+
+    def _abrir_salidas(self):
+        self.salidas = []
+        if self.output_file:
+            self.salidas.append(EscritorGeoJSON(self.output_file, self.compacto, self.precision,
+                                                continuar=self.continuar, fragmento=self.fragmento))
+        if self.salida_binaria:
+            self.salidas.append(EscritorBinario(self.salida_binaria, continuar=self.continuar,
+                                                fragmento=self.fragmento))
+        if self.salida_rejilla:
+            self.salidas.append(EscritorRejilla(self.salida_rejilla, continuar=self.continuar,
+                                                fragmento=self.fragmento))
+        if self.salida_teselas:
+            self.salidas.append(EscritorTeselas(self.salida_teselas, continuar=self.continuar,
+                                                fragmento=self.fragmento))
+        if self.salida_particiones:
+            self.salidas.append(EscritorParticiones(self.salida_particiones, continuar=self.continuar,
+                                                    fragmento=self.fragmento))
+        if self.salida_hotspots:
+            self.salidas.append(EscritorHotspots(self.salida_hotspots, continuar=self.continuar,
+                                                 fragmento=self.fragmento))
+        # riesgo y horarios necesitan NumPy: se importan solo si se pidieron (igual que modo='columnar')
+        if self.salida_riesgo:
+            from riesgo import EscritorRiesgo
+            self.salidas.append(EscritorRiesgo(self.salida_riesgo, continuar=self.continuar,
+                                               fragmento=self.fragmento))
+        if self.salida_horarios:
+            from horarios import EscritorHorarios
+            self.salidas.append(EscritorHorarios(self.salida_horarios, continuar=self.continuar,
+                                                 fragmento=self.fragmento))
+
+    def agregar(self, feature):
+        """Escribe un feature en cuanto se genera; False si se descartó por duplicado"""
+        if self.salidas is None:
+            if not self.fragmento and self.output_file:
+                print(f"Escribiendo GeoJSON en {self.output_file}...")
+            self._abrir_salidas()
+        if self.calidad and not self.calidad.revisar(feature):
+            # Ya se contó como filtrado; los conteos reflejan solo lo que se escribe
+            tipo = feature['properties']['tipo']
+            self.contador['filtrados'] -= 1
+            self.contador[tipo + 's'] -= 1
+            self.contador['duplicados'] += 1
+            return False
+        if self.limites_alcaldias:
+            if self.indice_alcaldias is None:
+                self.indice_alcaldias = IndiceAlcaldias(self.limites_alcaldias)
+            lon, lat = feature['geometry']['coordinates']
+            cvegeo = self.indice_alcaldias.asignar(lon, lat)
+            feature['properties']['cvegeo'] = cvegeo
+            if cvegeo is None:
+                self.contador['sin_alcaldia'] += 1
+        fecha = feature['properties']['fecha']
+        if len(fecha) == 10 and fecha > self.max_fecha:
+            self.max_fecha = fecha
+        for salida in self.salidas:
+            salida.escribir(feature)
+        return True
+
+    def finalizar(self):
+        # Cerrar la FeatureCollection (y el binario, si se pidió)
+        if self.salidas is None:
+            self._abrir_salidas()
+        if not self.fragmento and self.output_file:
+            print(f"\nGuardando GeoJSON en {self.output_file}...")
+        for salida in self.salidas:
+            salida.cerrar()
+        if self.calidad:
+            self.calidad.guardar()
+
+    def nuevo_parcial(self, indice):
+        return GeneradorGeoJSON(self.output_file and f'{self.output_file}.parte{indice}', self.año_minimo,
+                                self.compacto, self.precision,
+                                self.salida_binaria and f'{self.salida_binaria}.parte{indice}',
+                                fragmento=True,
+                                salida_rejilla=self.salida_rejilla and f'{self.salida_rejilla}.parte{indice}',
+                                limites_alcaldias=self.limites_alcaldias,
+                                salida_teselas=self.salida_teselas and f'{self.salida_teselas}.parte{indice}',
+                                salida_particiones=(self.salida_particiones and
+                                                    f'{self.salida_particiones}.parte{indice}'),
+                                salida_hotspots=self.salida_hotspots and f'{self.salida_hotspots}.parte{indice}',
+                                salida_riesgo=self.salida_riesgo and f'{self.salida_riesgo}.parte{indice}',
+                                salida_horarios=self.salida_horarios and f'{self.salida_horarios}.parte{indice}',
+                                año_maximo=self.año_maximo, tipos=self.tipos)
+
+    def combinar(self, parcial):
+        for clave, valor in parcial.contador.items():
+            self.contador[clave] += valor
+        self.max_fecha = max(self.max_fecha, parcial.max_fecha)
+        if self.salidas is None:
+            self._abrir_salidas()
+        for salida, fragmento in zip(self.salidas, parcial.salidas):
+            salida.combinar(fragmento)
+
+    def descartar(self):
+        """Elimina la salida parcial si el procesamiento falló"""
+        if self.salidas is None and self.fragmento:
+            # Copia de un fragmento que se escribió en otro proceso: solo se conocen sus rutas
+            for ruta in (self.output_file, self.salida_binaria, self.salida_rejilla, self.salida_teselas,
+                         self.salida_particiones, self.salida_hotspots, self.salida_riesgo,
+                         self.salida_horarios):
+                if ruta and os.path.isdir(ruta):
+                    shutil.rmtree(ruta, ignore_errors=True)
+                elif ruta and os.path.exists(ruta):
+                    os.remove(ruta)
+            return
+        for salida in self.salidas or []:
+            salida.descartar()
+
+    def reporte(self):
+        """Muestra las estadísticas de la conversión"""
+        contador = self.contador
+        print("\n" + "="*80)
+        print("ESTADÍSTICAS")
+        print("="*80)
+        print(f"Total de registros en CSV: {contador['total']:,}")
+        print(f"Registros con coordenadas válidas: {contador['con_coordenadas']:,}")
+        tipos = '/'.join(t + 's' for t in self.tipos) if self.tipos else 'robos/asaltos/homicidios'
+        periodo = (f"de {self.año_minimo} a {self.año_maximo}" if self.año_maximo is not None
+                   else f"desde {self.año_minimo}")
+        print(f"Delitos filtrados ({tipos} {periodo}): {contador['filtrados']:,}")
+        print(f"\nDesglose por tipo:")
+        print(f"  - Robos: {contador['robos']:,}")
+        print(f"  - Asaltos: {contador['asaltos']:,}")
+        print(f"  - Homicidios: {contador['homicidios']:,}")
+        if self.calidad:
+            calidad = self.calidad
+            print(f"\nDuplicados eliminados: {contador['duplicados']:,}")
+            for tipo, n in sorted(calidad.duplicados.items()):
+                print(f"  - {tipo}: {n:,}")
+            apilados = calidad.apilamientos_ordenados()
+            print(f"Coordenadas con {UMBRAL_APILAMIENTO}+ delitos (posibles ubicaciones por defecto): {len(apilados):,}")
+            for (lon, lat), n in apilados[:5]:
+                print(f"  - ({lat}, {lon}): {n:,}")
+        if self.limites_alcaldias:
+            print(f"\nFuera de los límites de alcaldías (sin CVEGEO): {contador['sin_alcaldia']:,}")
+        if self.output_file:
+            print(f"\nGeoJSON guardado exitosamente en: {self.output_file}")
+        if self.salida_binaria:
+            print(f"Binario columnar guardado en: {self.salida_binaria} (+ .json)")
+        if self.salida_rejilla:
+            print(f"Conteos por celda guardados en: {self.salida_rejilla}")
+        if self.salida_teselas:
+            print(f"Shards por alcaldía y tesela guardados en: {self.salida_teselas}/ (manifest.json)")
+        if self.salida_particiones:
+            print(f"Particiones por año guardadas en: {self.salida_particiones}/ (indice.json)")
+        if self.salida_hotspots:
+            print(f"Zonas críticas guardadas en: {self.salida_hotspots}")
+        if self.salida_calidad:
+            print(f"Reporte de calidad guardado en: {self.salida_calidad}")
+        if self.salida_riesgo:
+            print(f"Superficie de riesgo guardada en: {self.salida_riesgo}/ (indice.json)")
+        if self.salida_horarios:
+            print(f"Cubos por día y hora guardados en: {self.salida_horarios} (+ .npz)")
+        print("="*80)
+
+def procesar_csv(input_file, output_file, año_minimo=2019, modo='filas',
+                 compacto=False, precision=None, salida_binaria=None, incremental=False,
+                 procesos=None, salida_rejilla=None, limites_alcaldias=None, metricas=None,
+                 salida_sqlite=None, salida_teselas=None, salida_particiones=None,
+                 salida_hotspots=None, salida_riesgo=None, salida_calidad=None, lector='csv',
+                 salida_horarios=None, año_maximo=None, tipos=None, analisis=None):
+    """
+    Procesa el CSV y genera un GeoJSON
+    input_file puede ser una lista de CSV (se leen en orden, como uno solo) y cada uno .gz o .zip
+    output_file=None omite el GeoJSON (al menos debe pedirse otra salida)
+    modo='columnar' usa la ingesta con NumPy (mismo resultado, mucho más rápida)
+    compacto=True escribe sin indentación y con coordenadas redondeadas
+    salida_binaria agrega la exportación columnar para el frontend
+    incremental=True solo procesa los registros agregados desde la última corrida
+    procesos > 1 reparte la lectura (modo 'filas') entre varios procesos
+    salida_rejilla agrega los conteos precalculados por celda de rejilla
+    limites_alcaldias asigna a cada delito el CVEGEO de la alcaldía que lo contiene
+    metricas (instrumentacion.Metricas) registra tiempos por etapa y registros rechazados
+    salida_sqlite carga los delitos clasificados en el almacén consultable (almacen.py); no con salida_calidad
+    salida_teselas es un directorio con el GeoJSON partido por alcaldía y por quadkey
+    salida_particiones es un directorio con un NDJSON por año ordenado por fecha e indexado por mes
+    salida_hotspots agrega las zonas críticas por tipo y ventana de tiempo (hotspots.py)
+    salida_riesgo es un directorio con la densidad de riesgo por mes como raster (riesgo.py)
+    salida_calidad descarta los duplicados antes de escribir y guarda ahí el reporte (calidad.py)
+    lector='mmap' lee el CSV mapeado en memoria, separando solo las columnas que se usan
+    salida_horarios agrega los conteos por alcaldía/celda, tipo, día de la semana y hora (horarios.py)
+    año_maximo y tipos ('robo', 'asalto', 'homicidio') acotan los delitos que se escriben
+    analisis son agregadores extra (p. ej. los de analyze_*.py) que reciben la misma lectura
+    Regresa el GeneradorGeoJSON con los conteos
+    """
+    entradas = [input_file] if isinstance(input_file, str) else list(input_file)
+    if not entradas:
+        raise ValueError("no se dio ningún CSV de entrada")
+    input_file = entradas[0]
+    un_csv = len(entradas) == 1 and not es_comprimido(input_file)
+    # El manifiesto (junto al GeoJSON) describe una sola lectura de un archivo sin comprimir
+    continuable = un_csv and output_file is not None
+    if tipos:
+        desconocidos = set(tipos) - {'robo', 'asalto', 'homicidio'}
+        if desconocidos:
+            raise ValueError(f"tipos desconocidos: {', '.join(sorted(desconocidos))}")
+    if año_maximo is not None and año_maximo < año_minimo:
+        raise ValueError(f"año_maximo ({año_maximo}) es menor que año_minimo ({año_minimo})")
+    if incremental and not continuable:
+        raise ValueError("incremental necesita un solo CSV sin comprimir y la salida GeoJSON")
+    if procesos and procesos > 1 and not un_csv:
+        raise ValueError("procesos > 1 necesita un solo CSV sin comprimir")
+    if lector == 'mmap' and any(es_comprimido(e) for e in entradas):
+        raise ValueError("lector='mmap' necesita CSV sin comprimir")
+    if salida_calidad and procesos and procesos > 1:
+        # Un duplicado puede caer en otro rango que ya se escribió en su fragmento
+        raise ValueError("salida_calidad necesita leer el archivo en orden (no funciona con procesos > 1)")
+    if salida_sqlite and salida_calidad:
+        # El almacén lee cada registro (también los que no tienen coordenadas) sin pasar por
+        # ControlCalidad: guardaría los duplicados que las demás salidas descartan
+        raise ValueError("salida_sqlite no descarta duplicados: no se puede combinar con salida_calidad")
+    if (salida_sqlite or analisis) and modo == 'columnar':
+        raise ValueError("salida_sqlite y analisis necesitan la lectura por filas (no funcionan con modo='columnar')")
+    if not any([output_file, salida_binaria, salida_rejilla, salida_sqlite, salida_teselas,
+                salida_particiones, salida_hotspots, salida_riesgo, salida_horarios, analisis]):
+        raise ValueError("no se pidió ninguna salida")
+
+    print(f"Procesando {', '.join(entradas)}...")
+    if año_maximo is not None:
+        print(f"Filtrando delitos de {año_minimo} a {año_maximo}...\n")
+    else:
+        print(f"Filtrando delitos desde {año_minimo} en adelante...\n")
     
-    # Crear FeatureCollection
-    geojson = {
-        "type": "FeatureCollection",
-        "features": features
+    parametros = {
+        'año_minimo': año_minimo,
+        'compacto': compacto,
+        'precision': precision,
+        'salida_binaria': salida_binaria,
+        'salida_rejilla': salida_rejilla,
+        'limites_alcaldias': limites_alcaldias,
+        'salida_sqlite': salida_sqlite,
+        'salida_teselas': salida_teselas,
+        'salida_particiones': salida_particiones,
+        'salida_hotspots': salida_hotspots,
+        'salida_riesgo': salida_riesgo,
+        'salida_calidad': salida_calidad,
+        'salida_horarios': salida_horarios,
+        'año_maximo': año_maximo,
+        'tipos': sorted(tipos) if tipos else None,
     }
-    
-    # Guardar GeoJSON
-    print(f"\nGuardando GeoJSON en {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(geojson, f, ensure_ascii=False, indent=2)
-    
-    # Mostrar estadísticas
-    print("\n" + "="*80)
-    print("ESTADÍSTICAS")
-    print("="*80)
-    print(f"Total de registros en CSV: {contador['total']:,}")
-    print(f"Registros con coordenadas válidas: {contador['con_coordenadas']:,}")
-    print(f"Delitos filtrados (robos/asaltos/homicidios desde {año_minimo}): {contador['filtrados']:,}")
-    print(f"\nDesglose por tipo:")
-    print(f"  - Robos: {contador['robos']:,}")
-    print(f"  - Asaltos: {contador['asaltos']:,}")
-    print(f"  - Homicidios: {contador['homicidios']:,}")
-    print(f"\nGeoJSON guardado exitosamente en: {output_file}")
-    print("="*80)
+    plan = None
+    if incremental:
+        salidas = [output_file] + ([salida_binaria, salida_binaria + '.json'] if salida_binaria else [])
+        salidas += [salida_rejilla] if salida_rejilla else []
+        salidas += [salida_sqlite] if salida_sqlite else []
+        salidas += [os.path.join(salida_teselas, 'manifest.json')] if salida_teselas else []
+        salidas += [os.path.join(salida_particiones, 'indice.json')] if salida_particiones else []
+        salidas += [salida_hotspots, salida_hotspots + '.puntos'] if salida_hotspots else []
+        salidas += [os.path.join(salida_riesgo, 'celdas.npz')] if salida_riesgo else []
+        salidas += [salida_calidad, os.path.splitext(salida_calidad)[0] + '.claves'] if salida_calidad else []
+        salidas += [salida_horarios, os.path.splitext(salida_horarios)[0] + '.npz'] if salida_horarios else []
+        plan, motivo = planear(input_file, salidas, parametros)
+        if plan:
+            print(f"Modo incremental: continuando desde el byte {plan.desde:,} "
+                  f"(última fecha {plan.max_fecha or 'N/A'})\n")
+        else:
+            print(f"Reconstrucción completa: {motivo}\n")
+        if plan and analisis:
+            # Los análisis no guardan estado entre corridas: necesitan todo el archivo
+            raise ValueError("analisis no funciona con una corrida incremental que continúa")
 
-if __name__ == '__main__':
-    input_file = 'data/da_carpetas-de-investigacion-pgj-cdmx (1).csv'
-    output_file = 'data/delitos-cdmx.geojson'
-    
+    generador = GeneradorGeoJSON(output_file, año_minimo, compacto, precision, salida_binaria,
+                                 continuar=plan is not None, salida_rejilla=salida_rejilla,
+                                 limites_alcaldias=limites_alcaldias, salida_teselas=salida_teselas,
+                                 salida_particiones=salida_particiones, salida_hotspots=salida_hotspots,
+                                 salida_riesgo=salida_riesgo, salida_calidad=salida_calidad,
+                                 salida_horarios=salida_horarios, año_maximo=año_maximo, tipos=tipos)
+    agregadores = [generador] + list(analisis or [])
+    if salida_sqlite:
+        agregadores.append(AlmacenDelitos(salida_sqlite, año_minimo, limites_alcaldias,
+                                          continuar=plan is not None, año_maximo=año_maximo, tipos=tipos))
+    rechazos = None
+    if metricas and (plan or modo != 'columnar'):
+        # La ingesta columnar no arma Registro, así que ahí no hay desglose de rechazos
+        rechazos = metricas.rechazos_para(año_minimo, año_maximo, tipos)
+        agregadores.append(rechazos)
+    duplicados_previos = plan.contador.get('duplicados', 0) if plan else 0
     try:
-        procesar_csv(input_file, output_file, año_minimo=2019)
-    except FileNotFoundError:
-        print(f"Error: No se encontró el archivo {input_file}")
-        print("Asegúrate de que el CSV esté en la carpeta data/")
-    except Exception as e:
-        print(f"Error: {e}")
-
-
+        if plan:
+            generador.contador.update(plan.contador)
+            generador.max_fecha = plan.max_fecha
+            escaneo = escanear_csv(input_file, agregadores, desde=plan.desde,
+                                   encabezado=plan.encabezado, metricas=metricas, lector=lector)
+        elif modo == 'columnar':
+            from ingesta_columnar import procesar_bloques
+            filas = 0
+            for entrada in entradas:
+                with instrumentar_etapa(metricas, 'ingesta_columnar'):
+                    escaneo = procesar_bloques(entrada, generador, CLASIFICADOR)
+                filas += escaneo.filas
+                if metricas:
+                    metricas.entrada = entrada
+                    metricas.filas += escaneo.filas
+                    metricas.bytes += escaneo.fin
+            escaneo = Escaneo(filas, escaneo.fin, escaneo.encabezado)
+            with instrumentar_etapa(metricas, 'finalizar GeneradorGeoJSON'):
+                generador.finalizar()
+        elif procesos and procesos > 1:
+            from paralelo import escanear_paralelo
+            escaneo = escanear_paralelo(input_file, agregadores, procesos, metricas=metricas, lector=lector)
+        else:
+            filas = 0
+            for k, entrada in enumerate(entradas, 1):
+                escaneo = escanear_csv(entrada, agregadores, metricas=metricas, lector=lector,
+                                       finalizar=k == len(entradas))
+                filas += escaneo.filas
+            escaneo = Escaneo(filas, escaneo.fin, escaneo.encabezado)
+    except BaseException:
+        for agregador in agregadores:
+            if hasattr(agregador, 'descartar'):
+                agregador.descartar()
+        raise
+    if rechazos:
+        rechazos.descontar_duplicados(generador.contador['duplicados'] - duplicados_previos)
+    if continuable:
+        guardar_manifiesto(output_file, input_file, parametros, escaneo,
+                           generador.contador, generador.max_fecha)
+    elif output_file and os.path.exists(ruta_manifiesto(output_file)):
+        # Un manifiesto viejo haría que una corrida incremental continuara sobre otra lectura
+        os.remove(ruta_manifiesto(output_file))
+    generador.reporte()
+    return generador
 
+if __name__ == '__main__':
+    # Mismas opciones que scripts/pipeline.py, con todas las salidas del frontend por omisión
+    from pipeline import main
+    sys.exit(main())
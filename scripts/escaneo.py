@@ -0,0 +1,236 @@
+"""
+Motor de escaneo compartido para el CSV de la Fiscalía
+Lee el archivo una sola vez y alimenta a todos los agregadores registrados
+"""
+import csv
+import gzip
+import io
+import sys
+import time
+import zipfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+from fechas import dia_fecha, parsear_fecha
+from lector_mmap import LectorMmap, MapaCSV
+
+RUTA_CSV_PGJ = 'data/da_carpetas-de-investigacion-pgj-cdmx (1).csv'
+
+Escaneo = namedtuple('Escaneo', ['filas', 'fin', 'encabezado'])
+
+
+def es_comprimido(input_file):
+    return input_file.lower().endswith(('.gz', '.zip'))
+
+
+@contextmanager
+def abrir_entrada(input_file):
+    """
+    Abre el CSV en binario; .gz y .zip se descomprimen al vuelo, sin escribirlos a disco
+    De un .zip se lee el primer .csv que contenga
+    """
+    nombre = input_file.lower()
+    if nombre.endswith('.gz'):
+        with gzip.open(input_file, 'rb') as f:
+            yield f
+    elif nombre.endswith('.zip'):
+        with zipfile.ZipFile(input_file) as archivo:
+            miembros = [m for m in archivo.namelist() if m.lower().endswith('.csv')]
+            if not miembros:
+                raise ValueError(f"{input_file} no contiene ningún .csv")
+            with archivo.open(miembros[0]) as f:
+                yield f
+    else:
+        with open(input_file, 'rb') as f:
+            yield f
+
+
+class Registro:
+    """Fila del CSV con la fecha y las coordenadas ya validadas"""
+    __slots__ = ('fila', 'fecha_str', 'fecha', 'lon', 'lat', 'coordenadas_validas')
+
+    def __init__(self, fila):
+        self.fila = fila
+
+        # Validar fecha (una sola vez para todos los agregadores, con caché por texto)
+        self.fecha_str = (fila.get('FechaHecho') or '').strip()
+        self.fecha = parsear_fecha(self.fecha_str)
+
+        # Validar coordenadas dentro del rango de CDMX
+        self.lon = None
+        self.lat = None
+        self.coordenadas_validas = False
+        try:
+            lon = float(fila.get('longitud', '') or 0)
+            lat = float(fila.get('latitud', '') or 0)
+        except ValueError:
+            return
+        self.lon = lon
+        self.lat = lat
+        self.coordenadas_validas = (lon != 0 and lat != 0 and
+                                    -100 < lon < -98 and 19 < lat < 20)
+
+    @property
+    def dia(self):
+        """Fecha como número de día (date.toordinal), o None si no es válida"""
+        return dia_fecha(self.fecha_str) if self.fecha is not None else None
+
+    def campo(self, nombre):
+        """Regresa el valor de una columna sin espacios"""
+        return (self.fila.get(nombre) or '').strip()
+
+
+class Agregador:
+    """Base para los consumidores del escaneo"""
+
+    def procesar(self, registro):
+        """Recibe cada registro del CSV"""
+        raise NotImplementedError
+
+    def finalizar(self):
+        """Se llama una vez que se leyó todo el archivo"""
+        pass
+
+    def nuevo_parcial(self, indice):
+        """Copia vacía con la misma configuración para procesar el rango `indice` en paralelo"""
+        return type(self)()
+
+    def combinar(self, parcial):
+        """Suma a este agregador el resultado de un parcial (en el orden del archivo)"""
+        raise NotImplementedError
+
+    def parametros(self):
+        """Filtros que cambian el resultado (parte de la clave de caché, ver cache_analisis.py)"""
+        return {}
+
+    def estado(self):
+        """Resultado ya agregado como datos JSON, para guardarlo en caché"""
+        raise NotImplementedError
+
+    def cargar_estado(self, estado):
+        """Restaura el resultado guardado por estado()"""
+        raise NotImplementedError
+
+
+def _alimentar(reader, agregadores):
+    total = 0
+    for fila in reader:
+        total += 1
+        registro = Registro(fila)
+        for agregador in agregadores:
+            agregador.procesar(registro)
+    return total
+
+
+def escanear_csv(input_file, agregadores, encoding='utf-8', desde=0, encabezado=None, metricas=None,
+                 lector='csv', finalizar=True):
+    """
+    Lee el CSV una vez y entrega cada registro a todos los agregadores
+    desde/encabezado permiten continuar una lectura previa a partir de un byte
+    metricas (instrumentacion.Metricas) mide el tiempo de cada etapa y de cada agregador
+    lector='mmap' mapea el archivo y solo separa las columnas que se usan (lector_mmap.py)
+    input_file puede ser .gz o .zip (no con lector='mmap')
+    finalizar=False deja abiertos los agregadores para seguir con otro archivo
+    Regresa Escaneo(filas, fin, encabezado), donde fin es el byte donde terminó la lectura
+    """
+    if lector == 'mmap':
+        if es_comprimido(input_file):
+            raise ValueError(f"lector='mmap' necesita un CSV sin comprimir: {input_file}")
+        with MapaCSV(input_file) as mapa:
+            reader = LectorMmap(mapa, desde, encabezado=encabezado, encoding=encoding)
+            if metricas is None:
+                total = _alimentar(reader, agregadores)
+            else:
+                total = _escanear_medido(reader, lambda: reader.posicion - desde, agregadores, metricas)
+            fin = reader.posicion
+            encabezado = reader.encabezado
+    else:
+        with abrir_entrada(input_file) as binario:
+            if desde:
+                binario.seek(desde)
+            f = io.TextIOWrapper(binario, encoding=encoding)
+            reader = csv.DictReader(f, fieldnames=encabezado)
+            if metricas is None:
+                total = _alimentar(reader, agregadores)
+            else:
+                total = _escanear_medido(reader, lambda: binario.tell() - desde, agregadores, metricas)
+            fin = binario.tell()
+            encabezado = reader.fieldnames
+            f.detach()
+
+    for agregador in agregadores if finalizar else []:
+        if metricas is None:
+            agregador.finalizar()
+        else:
+            with metricas.etapa(f'finalizar {type(agregador).__name__}'):
+                agregador.finalizar()
+
+    if metricas is not None:
+        metricas.entrada = input_file
+        metricas.filas += total
+        metricas.bytes += fin - desde
+
+    return Escaneo(total, fin, encabezado)
+
+
+def _escanear_medido(reader, leidos, agregadores, metricas):
+    """Mismo ciclo que escanear_csv, tomando el tiempo entre cada paso; leidos() da los bytes leídos"""
+    reloj = time.perf_counter
+    nombres = ['lectura_csv', 'validacion'] + [type(a).__name__ for a in agregadores]
+    tiempos = [0.0] * len(nombres)
+    procesar = [a.procesar for a in agregadores]
+    total = 0
+
+    t0 = reloj()
+    for fila in reader:
+        t1 = reloj()
+        tiempos[0] += t1 - t0
+        registro = Registro(fila)
+        t0 = reloj()
+        tiempos[1] += t0 - t1
+        for i, procesar_registro in enumerate(procesar, 2):
+            procesar_registro(registro)
+            t1 = reloj()
+            tiempos[i] += t1 - t0
+            t0 = t1
+        total += 1
+        if total % 10000 == 0:
+            metricas.progreso(metricas.filas + total, leidos())
+            t0 = reloj()
+
+    for nombre, segundos in zip(nombres, tiempos):
+        metricas.sumar(nombre, segundos)
+    return total
+
+
+if __name__ == '__main__':
+    # Refresco completo: GeoJSON y los tres análisis con una sola lectura
+    from analyze_csv_detailed import AnalisisDetallado
+    from analyze_2019 import Analisis2019
+    from analyze_seguridad_visitantes import AnalisisVisitantes
+    from cache_analisis import cargar_vigentes, guardar, huella_fuente
+    from csv_to_geojson import GeneradorGeoJSON
+    from instrumentacion import Metricas, instrumentar
+
+    output_file = 'data/delitos-cdmx.geojson'
+    generador = GeneradorGeoJSON(output_file, año_minimo=2019)
+    analisis = [AnalisisDetallado(), Analisis2019(), AnalisisVisitantes()]
+    # Los análisis con caché vigente no necesitan pasar por la lectura
+    fuente = huella_fuente(RUTA_CSV_PGJ)
+    pendientes = cargar_vigentes(fuente, analisis)
+    metricas = Metricas.desde_argv()
+    agregadores = [generador] + pendientes + ([metricas.rechazos_para(2019)] if metricas else [])
+
+    print(f"Escaneando {RUTA_CSV_PGJ} (una sola lectura)...\n")
+    with instrumentar(metricas):
+        lector = 'mmap' if '--mmap' in sys.argv else 'csv'
+        if '--paralelo' in sys.argv:
+            from paralelo import escanear_paralelo
+            escanear_paralelo(RUTA_CSV_PGJ, agregadores, metricas=metricas, lector=lector)
+        else:
+            escanear_csv(RUTA_CSV_PGJ, agregadores, metricas=metricas, lector=lector)
+    guardar(RUTA_CSV_PGJ, pendientes, fuente)
+
+    generador.reporte()
+    for a in analisis:
+        a.reporte()
@@ -0,0 +1,197 @@
+"""
+Exportación binaria columnar de los delitos para el frontend
+Cada columna es un arreglo tipado contiguo (little-endian) que se puede leer
+directamente como Float32Array / Uint16Array / Uint8Array sin parsear JSON
+
+Formato de <salida>.bin:
+  encabezado de 16 bytes: 'ZSB1', versión (uint32), registros (uint32),
+  día base (uint32, días desde 1970-01-01)
+  columnas en el orden de COLUMNAS, alineadas a su tamaño
+Los diccionarios de texto y los offsets de cada columna van en <salida>.bin.json
+"""
+import json
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+
+from fechas import dia_fecha
+
+MAGIA = b'ZSB1'
+VERSION = 2  # 2: alcaldia pasó de Uint8 a Uint16
+VERSIONES_LEGIBLES = (1, 2)
+TIPOS = ['robo', 'asalto', 'homicidio']
+SIN_HORA = 0xFFFF
+_EPOCH = date(1970, 1, 1).toordinal()
+
+# (nombre, código de array, tipo de arreglo en JS)
+COLUMNAS = [
+    ('lat', 'f', 'Float32'),
+    ('lon', 'f', 'Float32'),
+    ('dia', 'H', 'Uint16'),        # días desde el día base
+    ('hora', 'H', 'Uint16'),       # minutos desde medianoche, SIN_HORA si falta
+    ('delito', 'H', 'Uint16'),     # índice en diccionarios.delito
+    ('colonia', 'H', 'Uint16'),    # índice en diccionarios.colonia
+    ('categoria', 'H', 'Uint16'),  # índice en diccionarios.categoria
+    ('tipo', 'B', 'Uint8'),        # índice en TIPOS
+    ('alcaldia', 'H', 'Uint16'),   # índice en diccionarios.alcaldia (el texto trae variantes y municipios)
+]
+CODIGOS_JS = {'Float32': 'f', 'Uint16': 'H', 'Uint8': 'B'}
+
+
+def _a_minutos(hora_str):
+    partes = hora_str.split(':')
+    try:
+        horas, minutos = int(partes[0]), int(partes[1])
+    except (ValueError, IndexError):
+        return SIN_HORA
+    if 0 <= horas < 24 and 0 <= minutos < 60:
+        return horas * 60 + minutos
+    return SIN_HORA
+
+
+class Diccionario:
+    """Asigna un índice consecutivo a cada texto distinto"""
+
+    def __init__(self, nombre, limite):
+        self.nombre = nombre
+        self.limite = limite
+        self.indices = {}
+        self.valores = []
+
+    def indice(self, valor):
+        i = self.indices.get(valor)
+        if i is None:
+            i = len(self.valores)
+            if i >= self.limite:
+                raise ValueError(f"Demasiados valores distintos de {self.nombre} para el formato binario")
+            self.indices[valor] = i
+            self.valores.append(valor)
+        return i
+
+
+class EscritorBinario:
+    """Acumula los features en arreglos tipados y los escribe al cerrar"""
+
+    def __init__(self, output_file, continuar=False, fragmento=False):
+        self.output_file = output_file
+        self.fragmento = fragmento
+        self.columnas = {nombre: array(codigo) for nombre, codigo, _ in COLUMNAS}
+        self.ordinales = array('l')
+        self.diccionarios = {
+            'delito': Diccionario('delito', 0xFFFF),
+            'colonia': Diccionario('colonia', 0xFFFF),
+            'categoria': Diccionario('categoria', 0xFFFF),
+            'alcaldia': Diccionario('alcaldia', 0xFFFF),
+        }
+        self.graves = {}
+        if continuar:
+            self._cargar()
+
+    def _cargar(self):
+        """Carga una exportación previa para agregarle registros"""
+        with open(self.output_file + '.json', encoding='utf-8') as f:
+            indice = json.load(f)
+        with open(self.output_file, 'rb') as f:
+            datos = f.read()
+        if datos[:4] != MAGIA or indice['version'] not in VERSIONES_LEGIBLES:
+            raise ValueError(f"{self.output_file} no es una exportación binaria compatible")
+
+        total = indice['registros']
+        # Cada columna se lee con el tipo con que se escribió (la versión 1 tenía alcaldia en Uint8)
+        previas = {c['nombre']: (c['offset'], CODIGOS_JS[c['tipo']]) for c in indice['columnas']}
+        for nombre, codigo, _ in COLUMNAS:
+            offset, codigo_previo = previas[nombre]
+            columna = array(codigo_previo)
+            columna.frombytes(datos[offset:offset + total * columna.itemsize])
+            if sys.byteorder != 'little':
+                columna.byteswap()
+            self.columnas[nombre] = columna if codigo_previo == codigo else array(codigo, columna)
+
+        base = date.fromisoformat(indice['dia_base']).toordinal()
+        self.ordinales.extend(base + dia for dia in self.columnas['dia'])
+        self.columnas['dia'] = array('H')
+        for nombre, valores in indice['diccionarios'].items():
+            for valor in valores:
+                self.diccionarios[nombre].indice(valor)
+        self.graves = dict(zip(indice['diccionarios']['delito'], indice['delito_es_grave']))
+
+    def escribir(self, feature):
+        """Agrega un feature (mismo formato que EscritorGeoJSON)"""
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        c = self.columnas
+        d = self.diccionarios
+
+        c['lat'].append(lat)
+        c['lon'].append(lon)
+        self.ordinales.append(dia_fecha(props['fecha']))
+        c['hora'].append(_a_minutos(props['hora']))
+        c['delito'].append(d['delito'].indice(props['delito']))
+        c['colonia'].append(d['colonia'].indice(props['colonia']))
+        c['categoria'].append(d['categoria'].indice(props['categoria']))
+        c['tipo'].append(TIPOS.index(props['tipo']))
+        c['alcaldia'].append(d['alcaldia'].indice(props['alcaldia']))
+        # es_grave depende solo de la etiqueta del delito
+        self.graves[props['delito']] = props['es_grave']
+
+    def combinar(self, fragmento):
+        """Agrega los registros de otro escritor reasignando los índices de sus diccionarios"""
+        for nombre, diccionario in fragmento.diccionarios.items():
+            indices = [self.diccionarios[nombre].indice(v) for v in diccionario.valores]
+            self.columnas[nombre].extend(indices[i] for i in fragmento.columnas[nombre])
+        for nombre in ('lat', 'lon', 'hora', 'tipo'):
+            self.columnas[nombre].extend(fragmento.columnas[nombre])
+        self.ordinales.extend(fragmento.ordinales)
+        self.graves.update(fragmento.graves)
+
+    def cerrar(self):
+        """Escribe <salida>.bin y su diccionario <salida>.bin.json"""
+        if self.fragmento:
+            return
+        total = len(self.ordinales)
+        base = min(self.ordinales) if total else _EPOCH
+        if total and max(self.ordinales) - base > 0xFFFF:
+            raise ValueError("El rango de fechas no cabe en días uint16")
+        self.columnas['dia'] = array('H', (o - base for o in self.ordinales))
+
+        temporal = self.output_file + '.tmp'
+        offsets = {}
+        with open(temporal, 'wb') as f:
+            f.write(MAGIA + struct.pack('<III', VERSION, total, base - _EPOCH))
+            posicion = 16
+            for nombre, codigo, _ in COLUMNAS:
+                datos = self.columnas[nombre]
+                if sys.byteorder != 'little':
+                    datos = array(codigo, datos)
+                    datos.byteswap()
+                # Alinear para que el arreglo tipado se pueda crear sin copiar
+                relleno = -posicion % datos.itemsize
+                f.write(b'\0' * relleno)
+                posicion += relleno
+                offsets[nombre] = posicion
+                datos.tofile(f)
+                posicion += len(datos) * datos.itemsize
+        os.replace(temporal, self.output_file)
+
+        delitos = self.diccionarios['delito'].valores
+        indice = {
+            'version': VERSION,
+            'registros': total,
+            'dia_base': date.fromordinal(base).isoformat(),
+            'columnas': [
+                {'nombre': nombre, 'tipo': tipo_js, 'offset': offsets[nombre]}
+                for nombre, _, tipo_js in COLUMNAS
+            ],
+            'tipos': TIPOS,
+            'sin_hora': SIN_HORA,
+            'diccionarios': {nombre: d.valores for nombre, d in self.diccionarios.items()},
+            'delito_es_grave': [self.graves[delito] for delito in delitos],
+        }
+        with open(self.output_file + '.json', 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, separators=(',', ':'))
+
+    def descartar(self):
+        """No hay archivo abierto hasta cerrar: solo libera los arreglos"""
+        self.columnas = None
@@ -0,0 +1,141 @@
+"""
+Escritor de GeoJSON en streaming
+Escribe cada feature en cuanto se genera, sin armar la FeatureCollection en memoria
+"""
+import json
+import os
+import shutil
+
+PRECISION_COMPACTA = 6  # ~0.1 m en CDMX
+
+
+class EscritorGeoJSON:
+    """
+    FeatureCollection escrita feature por feature
+    Por defecto el resultado es idéntico a json.dump(..., indent=2);
+    compacto=True quita la indentación y redondea las coordenadas a `precision`
+    continuar=True agrega features a un archivo ya escrito con el mismo formato
+    fragmento=True escribe solo los features (para combinarlos con combinar())
+    """
+
+    def __init__(self, output_file, compacto=False, precision=None, continuar=False,
+                 fragmento=False):
+        self.output_file = output_file
+        self.compacto = compacto
+        if precision is None and compacto:
+            precision = PRECISION_COMPACTA
+        self.precision = precision
+        self.total = 0
+        self._pie = b']}' if compacto else b'\n  ]\n}'
+        self.fragmento = fragmento
+        if continuar:
+            self._reabrir()
+            return
+        if fragmento:
+            # Cada feature lleva su separador; se ajusta al combinar
+            self._temporal = None
+            self._previos = True
+            self._f = open(output_file, 'wb')
+            return
+        # Se escribe a un temporal y se renombra al cerrar: si el proceso falla
+        # no queda un GeoJSON a medias en lugar del anterior
+        self._temporal = output_file + '.tmp'
+        self._previos = False
+        self._f = open(self._temporal, 'wb')
+        if compacto:
+            self._f.write(b'{"type":"FeatureCollection","features":[')
+        else:
+            self._f.write(b'{\n  "type": "FeatureCollection",\n  "features": [')
+
+    def _reabrir(self):
+        """Abre un GeoJSON existente para seguir agregando features al final"""
+        self._temporal = None
+        self._f = open(self.output_file, 'r+b')
+        tamaño = self._f.seek(0, os.SEEK_END)
+        self._f.seek(max(0, tamaño - 8))
+        final = self._f.read()
+        vacio = final.endswith(b'[]}' if self.compacto else b'[]\n}')
+        pie = (b']}' if self.compacto else b']\n}') if vacio else self._pie
+        if not final.endswith(pie):
+            self._f.close()
+            raise ValueError(f"{self.output_file} no termina como lo escribe EscritorGeoJSON")
+        self._previos = not vacio
+        self._fin_previo = tamaño - len(pie)
+        self._pie_previo = pie
+        self._f.seek(self._fin_previo)
+        self._f.truncate()
+
+    def _redondear(self, feature):
+        coords = feature['geometry']['coordinates']
+        redondeadas = [round(c, self.precision) for c in coords]
+        return {**feature, 'geometry': {**feature['geometry'], 'coordinates': redondeadas}}
+
+    def escribir(self, feature):
+        """Agrega un feature al archivo"""
+        if self.precision is not None:
+            feature = self._redondear(feature)
+
+        primero = self.total == 0 and not self._previos
+        if self.compacto:
+            texto = json.dumps(feature, ensure_ascii=False, separators=(',', ':'))
+            texto = texto if primero else ',' + texto
+        else:
+            texto = json.dumps(feature, ensure_ascii=False, indent=2)
+            texto = ('\n    ' if primero else ',\n    ') + texto.replace('\n', '\n    ')
+        self._f.write(texto.encode('utf-8'))
+        self.total += 1
+
+    def combinar(self, fragmento):
+        """Copia al final los features de un fragmento ya cerrado y lo elimina"""
+        if fragmento.total:
+            with open(fragmento.output_file, 'rb') as f:
+                if self.total == 0 and not self._previos:
+                    f.read(1)  # el primer feature no lleva coma
+                shutil.copyfileobj(f, self._f)
+            self.total += fragmento.total
+        os.remove(fragmento.output_file)
+
+    def cerrar(self):
+        """Cierra la colección y reemplaza el archivo de salida"""
+        if self.fragmento:
+            self._f.close()
+            return
+        if self.total or self._previos:
+            self._f.write(self._pie)
+        else:
+            self._f.write(b']}' if self.compacto else b']\n}')
+        self._f.close()
+        if self._temporal:
+            os.replace(self._temporal, self.output_file)
+
+    def descartar(self):
+        """Cierra sin publicar el archivo (por ejemplo, si hubo un error)"""
+        if self.fragmento:
+            if hasattr(self, '_f'):  # los que vuelven de otro proceso ya están cerrados
+                self._f.close()
+            if os.path.exists(self.output_file):
+                os.remove(self.output_file)
+        elif self._temporal:
+            self._f.close()
+            os.remove(self._temporal)
+        else:
+            # Dejar el archivo como estaba antes de continuarlo
+            self._f.seek(self._fin_previo)
+            self._f.truncate()
+            self._f.write(self._pie_previo)
+            self._f.close()
+
+    def __getstate__(self):
+        # Los fragmentos viajan entre procesos ya cerrados
+        estado = dict(self.__dict__)
+        estado.pop('_f', None)
+        return estado
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        if tipo_error is None:
+            self.cerrar()
+        else:
+            self.descartar()
@@ -0,0 +1,94 @@
+"""
+Fechas del CSV de la Fiscalía
+El dump trae pocas fechas distintas (unos miles de días) repetidas millones de
+veces, así que cada texto se parsea una sola vez y se guarda en caché. Los días
+se manejan como enteros (ordinal de date) para no acumular objetos
+"""
+from datetime import date, datetime
+from functools import lru_cache
+
+TAMAÑO_CACHE = 1 << 16
+FORMATO = '%Y-%m-%d'
+
+
+def _parsear(texto):
+    # Camino rápido: AAAA-MM-DD exacto
+    if (len(texto) == 10 and texto[4] == '-' and texto[7] == '-' and texto.isascii()
+            and texto[:4].isdigit() and texto[5:7].isdigit() and texto[8:].isdigit()):
+        try:
+            return date(int(texto[:4]), int(texto[5:7]), int(texto[8:]))
+        except ValueError:
+            return None
+    if not texto or texto == 'NA':
+        return None
+    # Otros textos que strptime también acepta (p. ej. 2019-2-3)
+    try:
+        return datetime.strptime(texto, FORMATO).date()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=TAMAÑO_CACHE)
+def parsear_fecha(texto):
+    """date de un texto '%Y-%m-%d' (mismo criterio que strptime), o None si no es válida"""
+    return _parsear(texto)
+
+
+@lru_cache(maxsize=TAMAÑO_CACHE)
+def dia_fecha(texto):
+    """Número de día (date.toordinal) de un texto '%Y-%m-%d', o None si no es válida"""
+    fecha = parsear_fecha(texto)
+    return fecha.toordinal() if fecha is not None else None
+
+
+class RangoFechas:
+    """Mínimo, máximo y conteo de días en streaming (memoria constante)"""
+    __slots__ = ('minimo', 'maximo', 'conteo')
+
+    def __init__(self):
+        self.minimo = None
+        self.maximo = None
+        self.conteo = 0
+
+    def agregar(self, dia):
+        if self.conteo == 0:
+            self.minimo = self.maximo = dia
+        elif dia < self.minimo:
+            self.minimo = dia
+        elif dia > self.maximo:
+            self.maximo = dia
+        self.conteo += 1
+
+    def combinar(self, otro):
+        if otro.conteo == 0:
+            return
+        if self.conteo == 0:
+            self.minimo, self.maximo = otro.minimo, otro.maximo
+        else:
+            self.minimo = min(self.minimo, otro.minimo)
+            self.maximo = max(self.maximo, otro.maximo)
+        self.conteo += otro.conteo
+
+    def estado(self):
+        return [self.minimo, self.maximo, self.conteo]
+
+    @classmethod
+    def desde_estado(cls, estado):
+        rango = cls()
+        rango.minimo, rango.maximo, rango.conteo = estado
+        return rango
+
+    @property
+    def desde(self):
+        return date.fromordinal(self.minimo) if self.conteo else None
+
+    @property
+    def hasta(self):
+        return date.fromordinal(self.maximo) if self.conteo else None
+
+    @property
+    def dias(self):
+        return self.maximo - self.minimo if self.conteo else 0
+
+    def __bool__(self):
+        return self.conteo > 0
@@ -0,0 +1,230 @@
+"""
+Cubos de hora del día × día de la semana
+Cuenta los delitos en arreglos densos indexados por [alcaldía o celda, tipo,
+día de la semana, hora] en la misma pasada que arma el GeoJSON, así una vista
+de riesgo por horario es una consulta al arreglo y no otra lectura del CSV
+
+Salidas:
+  <ruta>.json  dimensiones, alcaldías, celdas y el cubo por alcaldía (para el frontend)
+  <ruta>.npz   los dos cubos completos (uint32) para análisis y para continuar
+
+Uso:
+  python scripts/horarios.py --alcaldia CUAUHTEMOC --tipo asalto
+  python scripts/horarios.py --punto 19.4326 -99.1332
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from fechas import dia_fecha
+from riesgo import BBOX
+
+RUTA_HORARIOS = 'data/horarios.json'
+TIPOS = ['robo', 'asalto', 'homicidio']
+DIAS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+RESOLUCION = 0.01  # grados (~1 km), celdas sobre el mismo bbox que riesgo.py
+VERSION = 1
+
+
+@lru_cache(maxsize=4096)
+def hora_del_dia(texto):
+    """Hora 0-23 de un texto 'HH:MM[:SS]', o None si no es válida"""
+    partes = texto.split(':')
+    try:
+        hora, minutos = int(partes[0]), int(partes[1])
+    except (ValueError, IndexError):
+        return None
+    return hora if 0 <= hora < 24 and 0 <= minutos < 60 else None
+
+
+def dimensiones(bbox=BBOX, resolucion=RESOLUCION):
+    """(filas, columnas) de la rejilla; la fila 0 es la del sur"""
+    oeste, sur, este, norte = bbox
+    return round((norte - sur) / resolucion), round((este - oeste) / resolucion)
+
+
+def celda(lat, lon, bbox=BBOX, resolucion=RESOLUCION):
+    """Índice plano de la celda (fila * columnas + columna), o None fuera del bbox"""
+    filas, columnas = dimensiones(bbox, resolucion)
+    oeste, sur, _, _ = bbox
+    fila = math.floor((lat - sur) / resolucion)
+    columna = math.floor((lon - oeste) / resolucion)
+    if 0 <= fila < filas and 0 <= columna < columnas:
+        return fila * columnas + columna
+    return None
+
+
+class EscritorHorarios:
+    """Recibe los mismos features que EscritorGeoJSON y suma cada uno en su casilla de los cubos"""
+
+    def __init__(self, output_file, continuar=False, fragmento=False):
+        self.output_file = output_file
+        self.fragmento = fragmento
+        filas, columnas = dimensiones()
+        self.celdas = np.zeros((filas * columnas, len(TIPOS), 7, 24), dtype=np.uint32)
+        self.alcaldias = {}  # nombre -> renglón de self.por_alcaldia
+        self.por_alcaldia = np.zeros((0, len(TIPOS), 7, 24), dtype=np.uint32)
+        self.sin_hora = 0
+        self.fuera = 0
+        if continuar:
+            self._cargar()
+
+    @property
+    def ruta_cubos(self):
+        return os.path.splitext(self.output_file)[0] + '.npz'
+
+    def _cargar(self):
+        with open(self.output_file, encoding='utf-8') as f:
+            previo = json.load(f)
+        with np.load(self.ruta_cubos) as cubos:
+            self.celdas = cubos['celdas'].copy()
+            self.por_alcaldia = cubos['alcaldias'].copy()
+        self.alcaldias = {nombre: i for i, nombre in enumerate(previo['alcaldias'])}
+        self.sin_hora = previo['sin_hora']
+        self.fuera = previo['fuera_del_bbox']
+
+    def _renglon(self, alcaldia):
+        renglon = self.alcaldias.get(alcaldia)
+        if renglon is None:
+            renglon = self.alcaldias[alcaldia] = len(self.alcaldias)
+            if renglon == len(self.por_alcaldia):
+                extra = np.zeros((max(16, renglon),) + self.por_alcaldia.shape[1:], dtype=np.uint32)
+                self.por_alcaldia = np.concatenate([self.por_alcaldia, extra])
+        return renglon
+
+    def escribir(self, feature):
+        props = feature['properties']
+        hora = hora_del_dia(props['hora'])
+        if hora is None:
+            self.sin_hora += 1
+            return
+        dia = (dia_fecha(props['fecha']) - 1) % 7  # date.fromordinal(1) es lunes
+        tipo = TIPOS.index(props['tipo'])
+        renglon = self._renglon(props['alcaldia'])  # antes de indexar: puede crecer el arreglo
+        self.por_alcaldia[renglon, tipo, dia, hora] += 1
+        lon, lat = feature['geometry']['coordinates']
+        indice = celda(lat, lon)
+        if indice is None:
+            self.fuera += 1
+        else:
+            self.celdas[indice, tipo, dia, hora] += 1
+
+    def combinar(self, fragmento):
+        self.celdas += fragmento.celdas
+        for alcaldia, renglon in fragmento.alcaldias.items():
+            propio = self._renglon(alcaldia)
+            self.por_alcaldia[propio] += fragmento.por_alcaldia[renglon]
+        self.sin_hora += fragmento.sin_hora
+        self.fuera += fragmento.fuera
+
+    def cerrar(self):
+        if self.fragmento:
+            return
+        # Alcaldías en orden alfabético para que la salida no dependa del orden de lectura
+        nombres = sorted(self.alcaldias)
+        por_alcaldia = self.por_alcaldia[[self.alcaldias[n] for n in nombres]]
+        filas, columnas = dimensiones()
+        ocupadas = np.flatnonzero(self.celdas.reshape(len(self.celdas), -1).any(axis=1))
+
+        indice = {
+            'version': VERSION,
+            'dimensiones': ['renglon', 'tipo', 'dia', 'hora'],
+            'tipos': TIPOS,
+            'dias': DIAS,
+            'alcaldias': nombres,
+            'bbox': list(BBOX),
+            'resolucion': RESOLUCION,
+            'filas': filas,
+            'columnas': columnas,
+            'celdas_con_delitos': len(ocupadas),
+            'sin_hora': self.sin_hora,
+            'fuera_del_bbox': self.fuera,
+            # [alcaldía][tipo][día][hora], aplanado en ese orden
+            'por_alcaldia': por_alcaldia.ravel().tolist(),
+        }
+        with open(self.output_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(self.output_file + '.tmp', self.output_file)
+
+        with open(self.ruta_cubos + '.tmp', 'wb') as f:
+            np.savez_compressed(f, alcaldias=por_alcaldia, celdas=self.celdas)
+        os.replace(self.ruta_cubos + '.tmp', self.ruta_cubos)
+
+    def descartar(self):
+        self.celdas = None
+        self.por_alcaldia = None
+
+
+class CubosHorarios:
+    """Consultas sobre los cubos ya exportados"""
+
+    def __init__(self, ruta=RUTA_HORARIOS):
+        with open(ruta, encoding='utf-8') as f:
+            self.indice = json.load(f)
+        with np.load(os.path.splitext(ruta)[0] + '.npz') as cubos:
+            self.por_alcaldia = cubos['alcaldias']
+            self.celdas = cubos['celdas']
+        self.alcaldias = {nombre: i for i, nombre in enumerate(self.indice['alcaldias'])}
+
+    def _sumar(self, cubo, tipos):
+        if tipos:
+            cubo = cubo[[TIPOS.index(t) for t in tipos]]
+        return cubo.sum(axis=0)
+
+    def alcaldia(self, nombre, tipos=None):
+        """Conteos [día][hora] de una alcaldía (todos los tipos si no se dan)"""
+        return self._sumar(self.por_alcaldia[self.alcaldias[nombre]], tipos)
+
+    def punto(self, lat, lon, tipos=None):
+        """Conteos [día][hora] de la celda que contiene el punto"""
+        indice = celda(lat, lon, self.indice['bbox'], self.indice['resolucion'])
+        if indice is None:
+            return np.zeros((7, 24), dtype=np.uint32)
+        return self._sumar(self.celdas[indice], tipos)
+
+    def ciudad(self, tipos=None):
+        return self._sumar(self.por_alcaldia.sum(axis=0), tipos)
+
+
+def imprimir(conteos):
+    print('           ' + ''.join(f'{h:>5}' for h in range(24)))
+    for dia, fila in zip(DIAS, conteos):
+        print(f'{dia:<11}' + ''.join(f'{n:>5}' for n in fila))
+    horas = conteos.sum(axis=0)
+    print(f"\nHora con más delitos: {int(horas.argmax()):02d}:00 ({int(horas.max()):,}); "
+          f"día con más delitos: {DIAS[int(conteos.sum(axis=1).argmax())]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Delitos por día de la semana y hora del día')
+    parser.add_argument('--horarios', default=RUTA_HORARIOS)
+    parser.add_argument('--alcaldia')
+    parser.add_argument('--punto', nargs=2, type=float, metavar=('LAT', 'LON'))
+    parser.add_argument('--tipo', action='append', choices=TIPOS, help='se puede repetir')
+    args = parser.parse_args()
+
+    try:
+        cubos = CubosHorarios(args.horarios)
+    except FileNotFoundError:
+        print(f"Error: No se encontró {args.horarios}. Genéralo con: python scripts/csv_to_geojson.py")
+        sys.exit(1)
+
+    if args.alcaldia:
+        nombre = args.alcaldia.upper()
+        if nombre not in cubos.alcaldias:
+            print(f"Error: alcaldía desconocida: {args.alcaldia}")
+            sys.exit(1)
+        print(f"{nombre}\n")
+        imprimir(cubos.alcaldia(nombre, args.tipo))
+    elif args.punto:
+        lat, lon = args.punto
+        print(f"Celda de {RESOLUCION}° que contiene ({lat}, {lon})\n")
+        imprimir(cubos.punto(lat, lon, args.tipo))
+    else:
+        print("CDMX\n")
+        imprimir(cubos.ciudad(args.tipo))
@@ -0,0 +1,239 @@
+"""
+Zonas críticas (hotspots) precalculadas
+Agrupamiento tipo DBSCAN sobre una rejilla: cada punto cae en una celda de
+EPS grados, las celdas con al menos `umbral` delitos son densas y las celdas
+densas vecinas (8-vecindad) forman un mismo hotspot. Es lineal en el número
+de puntos y no depende de dónde caen los bordes de una sola celda
+
+Salida: FeatureCollection con un polígono (envolvente convexa de las celdas)
+por hotspot, separados por tipo y ventana de tiempo, lista para dibujarse
+"""
+import json
+import os
+import sys
+from array import array
+from collections import deque
+from datetime import date
+
+from fechas import dia_fecha
+from rejilla import indice_celda
+
+EPS = 0.005              # grados (~500 m)
+MIN_PUNTOS = 5           # mínimo absoluto de delitos para que una celda sea densa
+PERCENTIL_DENSO = 0.95   # además, la celda debe estar en el 5% más denso del grupo
+MAX_HOTSPOTS = 100       # por tipo y ventana
+TIPOS = ['robo', 'asalto', 'homicidio']
+PESOS_SEVERIDAD = {'robo': 1, 'asalto': 3, 'homicidio': 10}
+# (nombre, días hacia atrás desde la fecha más reciente; None = todo el periodo)
+VENTANAS = [('todo', None), ('ultimo_año', 365), ('ultimos_90_dias', 90), ('ultimos_30_dias', 30)]
+VERSION = 1
+_VECINOS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj]
+# Columnas que se guardan junto a la salida para poder continuar
+_COLUMNAS = [('lat', 'd'), ('lon', 'd'), ('dia', 'i'), ('tipo', 'b'), ('grave', 'b')]
+
+
+def envolvente_convexa(puntos):
+    """Cadena monótona de Andrew; regresa el anillo cerrado en sentido antihorario"""
+    puntos = sorted(set(puntos))
+    if len(puntos) <= 2:
+        return puntos + puntos[:1]
+
+    def giro(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    inferior, superior = [], []
+    for p in puntos:
+        while len(inferior) >= 2 and giro(inferior[-2], inferior[-1], p) <= 0:
+            inferior.pop()
+        inferior.append(p)
+    for p in reversed(puntos):
+        while len(superior) >= 2 and giro(superior[-2], superior[-1], p) <= 0:
+            superior.pop()
+        superior.append(p)
+    anillo = inferior[:-1] + superior[:-1]
+    return anillo + anillo[:1]
+
+
+def _umbral(conteos):
+    ordenados = sorted(conteos)
+    percentil = ordenados[min(len(ordenados) - 1, int(len(ordenados) * PERCENTIL_DENSO))]
+    return max(MIN_PUNTOS, percentil)
+
+
+def agrupar(celdas):
+    """
+    celdas: {(i, j): [conteo, graves, suma_lat, suma_lon, robo, asalto, homicidio]}
+    Regresa (umbral, lista de componentes), cada componente una lista de celdas densas
+    """
+    if not celdas:
+        return MIN_PUNTOS, []
+    umbral = _umbral(c[0] for c in celdas.values())
+    densas = {clave for clave, c in celdas.items() if c[0] >= umbral}
+    componentes = []
+    vistas = set()
+    for inicio in sorted(densas):
+        if inicio in vistas:
+            continue
+        vistas.add(inicio)
+        componente = []
+        cola = deque([inicio])
+        while cola:
+            i, j = cola.popleft()
+            componente.append((i, j))
+            for di, dj in _VECINOS:
+                vecina = (i + di, j + dj)
+                if vecina in densas and vecina not in vistas:
+                    vistas.add(vecina)
+                    cola.append(vecina)
+        componentes.append(componente)
+    return umbral, componentes
+
+
+def _hotspot(componente, celdas, tipo, ventana):
+    conteo = graves = 0
+    suma_lat = suma_lon = 0.0
+    por_tipo = [0, 0, 0]
+    esquinas = []
+    for i, j in componente:
+        c = celdas[(i, j)]
+        conteo += c[0]
+        graves += c[1]
+        suma_lat += c[2]
+        suma_lon += c[3]
+        for t in range(3):
+            por_tipo[t] += c[4 + t]
+        lat, lon = i * EPS, j * EPS
+        medio = EPS / 2
+        esquinas += [(lon - medio, lat - medio), (lon + medio, lat - medio),
+                     (lon + medio, lat + medio), (lon - medio, lat + medio)]
+
+    anillo = [[round(x, 6), round(y, 6)] for x, y in envolvente_convexa(esquinas)]
+    xs = [p[0] for p in anillo]
+    ys = [p[1] for p in anillo]
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Polygon", "coordinates": [anillo]},
+        "properties": {
+            "tipo": tipo,
+            "ventana": ventana,
+            "conteo": conteo,
+            "graves": graves,
+            "severidad": sum(PESOS_SEVERIDAD[t] * n for t, n in zip(TIPOS, por_tipo)),
+            "por_tipo": dict(zip(TIPOS, por_tipo)),
+            "centroide": [round(suma_lat / conteo, 6), round(suma_lon / conteo, 6)],
+            "celdas": len(componente),
+            "bbox": [min(xs), min(ys), max(xs), max(ys)],
+        }
+    }
+
+
+class EscritorHotspots:
+    """
+    Recibe los mismos features que EscritorGeoJSON; guarda solo lo necesario
+    para agrupar (lat, lon, día, tipo, grave) y calcula los hotspots al cerrar
+    Las columnas se guardan en <salida>.puntos para que continuar no tenga
+    que volver a leer todo el CSV
+    """
+
+    def __init__(self, output_file, continuar=False, fragmento=False):
+        self.output_file = output_file
+        self.fragmento = fragmento
+        self.columnas = {nombre: array(codigo) for nombre, codigo in _COLUMNAS}
+        if continuar:
+            self._cargar()
+
+    @property
+    def ruta_puntos(self):
+        return self.output_file + '.puntos'
+
+    def _cargar(self):
+        with open(self.ruta_puntos, 'rb') as f:
+            total = int.from_bytes(f.read(8), 'little')
+            for nombre, _ in _COLUMNAS:
+                columna = self.columnas[nombre]
+                columna.fromfile(f, total)
+                if sys.byteorder != 'little':
+                    columna.byteswap()
+
+    def escribir(self, feature):
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        c = self.columnas
+        c['lat'].append(lat)
+        c['lon'].append(lon)
+        c['dia'].append(dia_fecha(props['fecha']))
+        c['tipo'].append(TIPOS.index(props['tipo']))
+        c['grave'].append(int(props['es_grave']))
+
+    def combinar(self, fragmento):
+        for nombre, _ in _COLUMNAS:
+            self.columnas[nombre].extend(fragmento.columnas[nombre])
+
+    def _celdas_por_grupo(self):
+        """Estadísticas por celda para cada (tipo, ventana) en una sola pasada"""
+        c = self.columnas
+        hasta = max(c['dia']) if c['dia'] else 0
+        ventanas = [(nombre, hasta - dias if dias else None) for nombre, dias in VENTANAS]
+        grupos = {(tipo, ventana): {} for tipo in ['todos'] + TIPOS for ventana, _ in VENTANAS}
+
+        for lat, lon, dia, tipo, grave in zip(c['lat'], c['lon'], c['dia'], c['tipo'], c['grave']):
+            clave = (indice_celda(lat, EPS), indice_celda(lon, EPS))
+            for ventana, desde in ventanas:
+                if desde is not None and dia <= desde:
+                    break  # las ventanas van de la más larga a la más corta
+                for nombre_tipo in ('todos', TIPOS[tipo]):
+                    celdas = grupos[(nombre_tipo, ventana)]
+                    s = celdas.get(clave)
+                    if s is None:
+                        s = celdas[clave] = [0, 0, 0.0, 0.0, 0, 0, 0]
+                    s[0] += 1
+                    s[1] += grave
+                    s[2] += lat
+                    s[3] += lon
+                    s[4 + tipo] += 1
+        return hasta, grupos
+
+    def cerrar(self):
+        if self.fragmento:
+            return
+
+        hasta, grupos = self._celdas_por_grupo()
+        features = []
+        resumen = []
+        for (tipo, ventana), celdas in grupos.items():
+            umbral, componentes = agrupar(celdas)
+            hotspots = [_hotspot(comp, celdas, tipo, ventana) for comp in componentes]
+            hotspots.sort(key=lambda h: (-h['properties']['severidad'], h['properties']['centroide']))
+            features.extend(hotspots[:MAX_HOTSPOTS])
+            resumen.append({'tipo': tipo, 'ventana': ventana, 'umbral': umbral,
+                            'hotspots': min(len(hotspots), MAX_HOTSPOTS)})
+
+        salida = {
+            "type": "FeatureCollection",
+            "metadata": {
+                "version": VERSION,
+                "eps": EPS,
+                "hasta": date.fromordinal(hasta).isoformat() if hasta else None,
+                "ventanas": {nombre: dias for nombre, dias in VENTANAS},
+                "pesos_severidad": PESOS_SEVERIDAD,
+                "grupos": resumen,
+            },
+            "features": features,
+        }
+        temporal = self.output_file + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(salida, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, self.output_file)
+
+        with open(self.ruta_puntos + '.tmp', 'wb') as f:
+            f.write(len(self.columnas['dia']).to_bytes(8, 'little'))
+            for nombre, codigo in _COLUMNAS:
+                datos = self.columnas[nombre]
+                if sys.byteorder != 'little':
+                    datos = array(codigo, datos)
+                    datos.byteswap()
+                datos.tofile(f)
+        os.replace(self.ruta_puntos + '.tmp', self.ruta_puntos)
+
+    def descartar(self):
+        self.columnas = None
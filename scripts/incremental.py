@@ -0,0 +1,123 @@
+"""
+Reconstrucción incremental de las salidas de csv_to_geojson
+Guarda un manifiesto con el estado de la última lectura del CSV y, si el
+archivo solo creció, procesa únicamente los registros agregados desde entonces
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+VERSION = 3  # 3: huella de muestras más el final del prefijo leído
+BLOQUE = 65536
+MUESTRAS = 16
+COLA = 1 << 18  # bytes antes del punto de continuación que entran completos a la huella
+
+Plan = namedtuple('Plan', ['desde', 'encabezado', 'contador', 'max_fecha'])
+
+
+def ruta_manifiesto(output_file):
+    return output_file + '.manifest.json'
+
+
+def hash_encabezado(input_file):
+    """Hash de la primera línea del CSV (nombres de columnas)"""
+    with open(input_file, 'rb') as f:
+        return hashlib.sha256(f.readline()).hexdigest()
+
+
+def huella_datos(input_file, hasta):
+    """
+    Huella del archivo hasta el byte `hasta` para decidir si se puede continuar
+    Muestras de todo el prefijo más sus últimos COLA bytes completos (ahí caen
+    las correcciones a los registros recientes); lee lo mismo sin importar el
+    tamaño del historial, así que una corrida incremental cuesta lo que lo nuevo
+    """
+    h = hashlib.sha256(huella_muestras(input_file, hasta).encode('ascii'))
+    inicio = max(0, hasta - COLA)
+    with open(input_file, 'rb') as f:
+        f.seek(inicio)
+        h.update(f.read(hasta - inicio))
+    return h.hexdigest()
+
+
+def huella_muestras(input_file, hasta):
+    """
+    Hash de muestras del archivo hasta el byte `hasta` (barato para archivos grandes)
+    Sirve para detectar un archivo distinto, no una corrección puntual
+    """
+    h = hashlib.sha256()
+    with open(input_file, 'rb') as f:
+        if hasta <= BLOQUE * MUESTRAS:
+            h.update(f.read(hasta))
+        else:
+            for i in range(MUESTRAS):
+                f.seek(i * (hasta - BLOQUE) // (MUESTRAS - 1))
+                h.update(f.read(BLOQUE))
+    return h.hexdigest()
+
+
+def _termina_linea(input_file, offset):
+    """El byte anterior a `offset` es un salto de línea (ahí empieza un registro)"""
+    with open(input_file, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+
+def cargar_manifiesto(output_file):
+    try:
+        with open(ruta_manifiesto(output_file), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def guardar_manifiesto(output_file, input_file, parametros, escaneo, contador, max_fecha):
+    """Registra hasta dónde se procesó el CSV"""
+    manifiesto = {
+        'version': VERSION,
+        'entrada': os.path.abspath(input_file),
+        'parametros': parametros,
+        'offset': escaneo.fin,
+        'encabezado': escaneo.encabezado,
+        'hash_encabezado': hash_encabezado(input_file),
+        'huella': huella_datos(input_file, escaneo.fin),
+        'filas': contador['total'],
+        'max_fecha': max_fecha,
+        'contador': contador,
+    }
+    temporal = ruta_manifiesto(output_file) + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta_manifiesto(output_file))
+
+
+def planear(input_file, salidas, parametros):
+    """
+    Decide si se puede continuar la última lectura
+    Regresa (Plan, None) para procesar solo lo nuevo o (None, motivo) para reconstruir todo
+    """
+    manifiesto = cargar_manifiesto(salidas[0])
+    if manifiesto is None:
+        return None, "no hay manifiesto previo"
+    if manifiesto.get('version') != VERSION:
+        return None, "el manifiesto es de otra versión"
+    if manifiesto['entrada'] != os.path.abspath(input_file):
+        return None, "el CSV de entrada cambió"
+    if manifiesto['parametros'] != parametros:
+        return None, "cambiaron los parámetros de salida"
+    if not all(os.path.exists(s) for s in salidas):
+        return None, "falta alguna salida previa"
+
+    offset = manifiesto['offset']
+    if os.path.getsize(input_file) < offset:
+        return None, "el CSV es más chico que en la última lectura"
+    if offset and not _termina_linea(input_file, offset):
+        return None, "la lectura anterior no terminó en un salto de línea"
+    if hash_encabezado(input_file) != manifiesto['hash_encabezado']:
+        return None, "cambió el encabezado del CSV"
+    if huella_datos(input_file, offset) != manifiesto['huella']:
+        return None, "cambiaron registros ya procesados"
+
+    plan = Plan(offset, manifiesto['encabezado'], manifiesto['contador'], manifiesto['max_fecha'])
+    return plan, None
@@ -0,0 +1,230 @@
+"""
+Ingesta columnar del CSV de la Fiscalía con NumPy
+Carga solo las columnas necesarias en arreglos y filtra/clasifica por bloques
+Requiere numpy (pip install numpy)
+"""
+import csv
+import gc
+import io
+from itertools import islice
+from operator import itemgetter
+
+import numpy as np
+
+from escaneo import Escaneo, abrir_entrada
+from fechas import parsear_fecha
+
+COLUMNAS = ['FechaHecho', 'delito', 'longitud', 'latitud', 'AlcaldiaHechos',
+            'colonia_datos', 'HoraHecho', 'categoria_delito']
+
+FILAS_POR_BLOQUE = 200000
+
+_DIAS_POR_MES = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_CERO = ord('0')
+_GUION = ord('-')
+
+
+def _a_flotante(valor):
+    """Conversión individual con la misma tolerancia que es_coordenada_valida"""
+    try:
+        return float(valor) if valor.strip() else 0.0
+    except ValueError:
+        return np.nan
+
+
+def coordenadas(valores):
+    """Convierte una columna de texto a float64 (NaN si no es numérica)"""
+    arr = np.char.strip(np.asarray(valores))
+    vacios = arr == ''
+    no_disponibles = arr == 'NA'
+    try:
+        numeros = np.where(vacios | no_disponibles, '0', arr).astype(np.float64)
+        numeros[no_disponibles] = np.nan
+    except ValueError:
+        # Otros valores no numéricos: se convierten uno por uno
+        numeros = np.fromiter((_a_flotante(v) for v in valores),
+                              dtype=np.float64, count=len(valores))
+    return numeros
+
+
+def mascara_coordenadas(lon, lat):
+    """Equivalente vectorizado de es_coordenada_valida"""
+    with np.errstate(invalid='ignore'):
+        return ((lon != 0) & (lat != 0) &
+                (lon > -100) & (lon < -98) & (lat > 19) & (lat < 20))
+
+
+def fechas(valores):
+    """
+    Parsea una columna de fechas '%Y-%m-%d'
+    Regresa (año, mes, valida); las fechas fuera del formato fijo
+    AAAA-MM-DD se validan con strptime para conservar el mismo criterio
+    """
+    arr = np.char.strip(np.asarray(valores))
+    n = len(arr)
+    año = np.zeros(n, dtype=np.int32)
+    mes = np.zeros(n, dtype=np.int32)
+    valida = np.zeros(n, dtype=bool)
+    if n == 0:
+        return arr, año, mes, valida
+
+    # Camino rápido: códigos de caracteres como enteros
+    largo_fijo = np.char.str_len(arr) == 10
+    codigos = arr.astype('<U10').view(np.uint32).reshape(n, 10).astype(np.int32)
+    digitos = codigos - _CERO
+    posiciones = [0, 1, 2, 3, 5, 6, 8, 9]
+    formato = (largo_fijo &
+               (codigos[:, 4] == _GUION) & (codigos[:, 7] == _GUION) &
+               np.all((digitos[:, posiciones] >= 0) & (digitos[:, posiciones] <= 9), axis=1))
+
+    y = digitos[:, 0] * 1000 + digitos[:, 1] * 100 + digitos[:, 2] * 10 + digitos[:, 3]
+    m = digitos[:, 5] * 10 + digitos[:, 6]
+    d = digitos[:, 8] * 10 + digitos[:, 9]
+    bisiesto = (y % 4 == 0) & ((y % 100 != 0) | (y % 400 == 0))
+    max_dia = _DIAS_POR_MES[np.clip(m, 0, 12)] + ((m == 2) & bisiesto)
+    correcta = formato & (y >= 1) & (m >= 1) & (m <= 12) & (d >= 1) & (d <= max_dia)
+
+    año[correcta] = y[correcta]
+    mes[correcta] = m[correcta]
+    valida[correcta] = True
+
+    # Camino lento: formatos que strptime también acepta (p. ej. 2019-2-3)
+    for i in np.flatnonzero(~formato & (arr != '') & (arr != 'NA')):
+        fecha = parsear_fecha(str(arr[i]))
+        if fecha is None:
+            continue
+        año[i] = fecha.year
+        mes[i] = fecha.month
+        valida[i] = True
+
+    return arr, año, mes, valida
+
+
+def clasificar_unicos(valores, clasificador):
+    """Clasifica solo los valores distintos de delito y los expande por índice"""
+    delitos = np.char.strip(np.asarray(valores))
+    unicos, inverso = np.unique(delitos, return_inverse=True)
+    clasificaciones = clasificador.clasificar_lote(unicos.tolist())
+    tipos_unicos = np.array([c.tipo or '' for c in clasificaciones], dtype=object)
+    graves_unicos = np.array([c.es_grave for c in clasificaciones], dtype=bool)
+    return delitos, tipos_unicos[inverso], graves_unicos[inverso]
+
+
+def leer_bloques(input_file, columnas=COLUMNAS, filas_por_bloque=FILAS_POR_BLOQUE, estado=None):
+    """
+    Lee el CSV por bloques y regresa un dict columna -> tupla de valores
+    Si se pasa `estado` (dict), al terminar guarda el encabezado y el byte final
+    """
+    with abrir_entrada(input_file) as binario:
+        f = io.TextIOWrapper(binario, encoding='utf-8', newline='')
+        reader = csv.reader(f)
+        encabezado = next(reader, [])
+        if estado is not None:
+            estado['encabezado'] = encabezado
+        presentes = [c for c in columnas if c in encabezado]
+        posiciones = [encabezado.index(c) for c in presentes]
+        extraer = itemgetter(*posiciones) if len(posiciones) > 1 else (lambda fila: (fila[posiciones[0]],))
+        # csv.reader regresa [] en las líneas en blanco; csv.DictReader (la lectura por filas) las salta
+        no_vacias = filter(None, reader)
+
+        while True:
+            filas = list(islice(no_vacias, filas_por_bloque))
+            if not filas:
+                if estado is not None:
+                    estado['fin'] = f.buffer.tell()
+                break
+            vacia = ('',) * len(filas)
+            if not posiciones:
+                yield {c: vacia for c in columnas}
+                continue
+
+            # Solo las columnas necesarias, transpuestas en C
+            try:
+                seleccion = list(map(extraer, filas))
+            except IndexError:
+                # Filas incompletas: las columnas faltantes quedan vacías
+                seleccion = [tuple(fila[i] if i < len(fila) else '' for i in posiciones)
+                             for fila in filas]
+            transpuesta = dict(zip(presentes, zip(*seleccion)))
+            yield {c: transpuesta.get(c, vacia) for c in columnas}
+
+
+def procesar_bloques(input_file, generador, clasificador):
+    """
+    Llena el contador y los features de un GeneradorGeoJSON de forma columnar
+    Regresa Escaneo(filas, fin, encabezado) igual que escanear_csv
+    """
+    # Los bloques crean millones de objetos de vida larga: el recolector
+    # de ciclos solo agrega tiempo aquí
+    gc.disable()
+    try:
+        estado = {}
+        filas = _procesar_bloques(input_file, generador, clasificador, estado)
+    finally:
+        gc.enable()
+    return Escaneo(filas, estado.get('fin', 0), estado.get('encabezado'))
+
+
+def _procesar_bloques(input_file, generador, clasificador, estado):
+    contador = generador.contador
+    filas = 0
+
+    for bloque in leer_bloques(input_file, estado=estado):
+        n = len(bloque['FechaHecho'])
+        contador['total'] += n
+        filas += n
+
+        # Coordenadas
+        lon = coordenadas(bloque['longitud'])
+        lat = coordenadas(bloque['latitud'])
+        con_coordenadas = mascara_coordenadas(lon, lat)
+        contador['con_coordenadas'] += int(con_coordenadas.sum())
+
+        # Fechas y clasificación
+        fecha_str, año, mes, fecha_valida = fechas(bloque['FechaHecho'])
+        delitos, tipos, graves = clasificar_unicos(bloque['delito'], clasificador)
+
+        seleccion = con_coordenadas & fecha_valida & (año >= generador.año_minimo) & (tipos != '')
+        if generador.año_maximo is not None:
+            seleccion &= año <= generador.año_maximo
+        if generador.tipos:
+            seleccion &= np.isin(tipos, list(generador.tipos))
+        indices = np.flatnonzero(seleccion)
+        contador['filtrados'] += len(indices)
+        for tipo in ('robo', 'asalto', 'homicidio'):
+            contador[tipo + 's'] += int((tipos[indices] == tipo).sum())
+
+        # Solo las filas seleccionadas se convierten a objetos de Python
+        lon_sel = lon[indices].tolist()
+        lat_sel = lat[indices].tolist()
+        año_sel = año[indices].tolist()
+        mes_sel = mes[indices].tolist()
+        categorias = bloque['categoria_delito']
+        alcaldias = bloque['AlcaldiaHechos']
+        colonias = bloque['colonia_datos']
+        horas = bloque['HoraHecho']
+
+        for k, i in enumerate(indices.tolist()):
+            generador.agregar({
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [lon_sel[k], lat_sel[k]]
+                },
+                "properties": {
+                    "fecha": str(fecha_str[i]),
+                    "delito": str(delitos[i]),
+                    "categoria": categorias[i].strip(),
+                    "alcaldia": alcaldias[i].strip(),
+                    "colonia": colonias[i].strip(),
+                    "tipo": tipos[i],
+                    "es_grave": bool(graves[i]),
+                    "hora": horas[i].strip(),
+                    "año": año_sel[k],
+                    "mes": mes_sel[k]
+                }
+            })
+
+        print(f"  Procesados: {contador['total']:,} registros ({contador['filtrados']:,} delitos válidos)...")
+
+    return filas
@@ -0,0 +1,252 @@
+"""
+Instrumentación del escaneo del CSV
+Tiempos por etapa, filas y bytes por segundo, desglose de registros rechazados
+y, opcionalmente, un perfil (cProfile o muestreo de pila) de la corrida
+
+Se activa desde la línea de comandos de cualquier script:
+  --metricas RUTA.json      guarda las métricas en JSON
+  --perfil cprofile         guarda RUTA.prof (abrir con pstats o snakeviz)
+  --perfil muestreo         guarda RUTA.folded (pilas colapsadas para flamegraph/speedscope)
+"""
+import cProfile
+import json
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from clasificador import CLASIFICADOR
+from escaneo import Agregador
+
+VERSION = 1
+INTERVALO_PROGRESO = 5.0   # segundos entre líneas de progreso
+INTERVALO_MUESTREO = 0.005  # segundos de CPU entre muestras de pila
+MOTIVOS = ['coordenadas_invalidas', 'fecha_invalida', 'antes_del_año_minimo', 'despues_del_año_maximo',
+           'sin_clasificar', 'tipo_excluido', 'duplicado']
+
+
+class ConteoRechazos(Agregador):
+    """
+    Desglose de por qué un registro no llega a la salida
+    Cada registro cuenta una sola vez, por el primer filtro que no pasa y en el
+    mismo orden que GeneradorGeoJSON: coordenadas, fecha, año mínimo, año máximo,
+    clasificación, tipo; los duplicados se descuentan al final (descontar_duplicados)
+    """
+
+    def __init__(self, año_minimo=None, año_maximo=None, tipos=None, clasificador=CLASIFICADOR):
+        self.año_minimo = año_minimo
+        self.año_maximo = año_maximo
+        self.tipos = tipos
+        self.clasificador = clasificador
+        self.conteo = Counter()
+
+    def procesar(self, registro):
+        if not registro.coordenadas_validas:
+            self.conteo['coordenadas_invalidas'] += 1
+        elif registro.fecha is None:
+            self.conteo['fecha_invalida'] += 1
+        elif self.año_minimo and registro.fecha.year < self.año_minimo:
+            self.conteo['antes_del_año_minimo'] += 1
+        elif self.año_maximo is not None and registro.fecha.year > self.año_maximo:
+            self.conteo['despues_del_año_maximo'] += 1
+        else:
+            tipo = self.clasificador.clasificar(registro.campo('delito')).tipo
+            if not tipo:
+                self.conteo['sin_clasificar'] += 1
+            elif self.tipos and tipo not in self.tipos:
+                self.conteo['tipo_excluido'] += 1
+            else:
+                self.conteo['aceptados'] += 1
+
+    def descontar_duplicados(self, duplicados):
+        """ControlCalidad descarta los duplicados después de los filtros: pasan de aceptados a duplicado"""
+        self.conteo['duplicado'] += duplicados
+        self.conteo['aceptados'] -= duplicados
+
+    def nuevo_parcial(self, indice):
+        return ConteoRechazos(self.año_minimo, self.año_maximo, self.tipos, self.clasificador)
+
+    def combinar(self, parcial):
+        self.conteo.update(parcial.conteo)
+
+    def resumen(self):
+        return {motivo: self.conteo[motivo] for motivo in MOTIVOS + ['aceptados']}
+
+
+class MuestreadorPila:
+    """
+    Perfil por muestreo: cada INTERVALO_MUESTREO segundos de CPU guarda la pila
+    del hilo principal. Mucho menos costoso que cProfile en corridas largas
+    (solo Unix; los procesos de escanear_paralelo no se muestrean)
+    """
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self.pilas = Counter()
+
+    def _muestra(self, signum, frame):
+        pila = []
+        while frame is not None:
+            codigo = frame.f_code
+            pila.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+            frame = frame.f_back
+        self.pilas[';'.join(reversed(pila))] += 1
+
+    def enable(self):
+        signal.signal(signal.SIGPROF, self._muestra)
+        signal.setitimer(signal.ITIMER_PROF, self.intervalo, self.intervalo)
+
+    def disable(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def dump_stats(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for pila, muestras in self.pilas.most_common():
+                f.write(f'{pila} {muestras}\n')
+
+
+class Metricas:
+    """
+    Acumula las métricas de una corrida
+    Se usa como contexto alrededor del trabajo y se pasa a escanear_csv,
+    escanear_paralelo o procesar_csv en el parámetro `metricas`
+    """
+
+    def __init__(self, ruta=None, perfil=None, ruta_perfil=None, intervalo=INTERVALO_PROGRESO):
+        if perfil not in (None, 'cprofile', 'muestreo'):
+            raise ValueError(f"Perfil desconocido: {perfil} (usa cprofile o muestreo)")
+        self.ruta = ruta
+        self.perfil = perfil
+        base = os.path.splitext(ruta)[0] if ruta else 'perfil'
+        self.ruta_perfil = ruta_perfil or base + ('.prof' if perfil == 'cprofile' else '.folded')
+        self.intervalo = intervalo
+        self.etapas = Counter()
+        self.rechazos = None
+        self.entrada = None
+        self.filas = 0
+        self.bytes = 0
+        self.fecha = None
+        self._perfilador = None
+        self._inicio = None
+        self._fin = None
+        self._ultimo_progreso = None
+
+    @classmethod
+    def desde_argv(cls, argv=None):
+        """Metricas configuradas con --metricas/--perfil, o None si no se pidieron"""
+        argv = sys.argv if argv is None else argv
+
+        def valor(opcion):
+            if opcion not in argv:
+                return None
+            i = argv.index(opcion)
+            if i + 1 >= len(argv):
+                raise ValueError(f"Falta el valor de {opcion}")
+            return argv[i + 1]
+
+        ruta, perfil = valor('--metricas'), valor('--perfil')
+        if ruta is None and perfil is None:
+            return None
+        return cls(ruta, perfil)
+
+    def __enter__(self):
+        self._inicio = self._ultimo_progreso = time.perf_counter()
+        self.fecha = datetime.now().isoformat(timespec='seconds')
+        if self.perfil == 'cprofile':
+            self._perfilador = cProfile.Profile()
+        elif self.perfil == 'muestreo':
+            self._perfilador = MuestreadorPila()
+        if self._perfilador:
+            self._perfilador.enable()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self._fin = time.perf_counter()
+        if self._perfilador:
+            self._perfilador.disable()
+            self._perfilador.dump_stats(self.ruta_perfil)
+        self.guardar()
+        return False
+
+    def rechazos_para(self, año_minimo=None, año_maximo=None, tipos=None):
+        """Agregador de rechazos a agregar al escaneo (uno por corrida)"""
+        if self.rechazos is None:
+            self.rechazos = ConteoRechazos(año_minimo, año_maximo, tipos)
+        return self.rechazos
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nombre] += time.perf_counter() - inicio
+
+    def sumar(self, nombre, segundos):
+        self.etapas[nombre] += segundos
+
+    def progreso(self, filas, bytes_leidos):
+        """Línea de progreso con ritmo, como mucho una cada `intervalo` segundos"""
+        ahora = time.perf_counter()
+        if ahora - self._ultimo_progreso < self.intervalo:
+            return
+        self._ultimo_progreso = ahora
+        segundos = ahora - self._inicio
+        print(f"  [{segundos:7.1f} s] {filas:,} filas, {filas / segundos:,.0f} filas/s, "
+              f"{bytes_leidos / segundos / 1e6:.1f} MB/s", file=sys.stderr)
+
+    def resumen(self):
+        fin = self._fin or time.perf_counter()
+        segundos = fin - self._inicio if self._inicio else 0.0
+        return {
+            'version': VERSION,
+            'fecha': self.fecha,
+            'entrada': self.entrada,
+            'segundos': round(segundos, 4),
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'filas_por_segundo': round(self.filas / segundos) if segundos else None,
+            'bytes_por_segundo': round(self.bytes / segundos) if segundos else None,
+            'etapas': {
+                nombre: {
+                    'segundos': round(duracion, 4),
+                    'fraccion': round(duracion / segundos, 4) if segundos else None,
+                }
+                for nombre, duracion in self.etapas.items()
+            },
+            'rechazos': self.rechazos.resumen() if self.rechazos else None,
+            'perfil': {'modo': self.perfil, 'ruta': self.ruta_perfil} if self.perfil else None,
+        }
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.resumen(), f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta)
+        print(f"Métricas guardadas en: {self.ruta}", file=sys.stderr)
+
+
+@contextmanager
+def instrumentar(metricas):
+    """Entra al contexto de `metricas` si hay; permite escribir `with instrumentar(m):`"""
+    if metricas is None:
+        yield None
+    else:
+        with metricas:
+            yield metricas
+
+
+@contextmanager
+def instrumentar_etapa(metricas, nombre):
+    """metricas.etapa(nombre), o nada si no hay métricas"""
+    if metricas is None:
+        yield
+    else:
+        with metricas.etapa(nombre):
+            yield
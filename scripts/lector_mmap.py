@@ -0,0 +1,141 @@
+"""
+Lector del CSV de la Fiscalía sobre un mapa de memoria
+Una expresión regular recorre el archivo mapeado y captura solo las columnas
+que usan los agregadores (8 de ~21): las demás nunca se copian ni se
+decodifican, y cada valor se decodifica hasta que alguien lo pide. Cada fila es
+un objeto con __slots__ que responde a .get() igual que el dict de
+csv.DictReader, así que Registro y los agregadores no cambian
+"""
+import csv
+import io
+import mmap
+import os
+import re
+
+# Columnas que leen Registro y los agregadores (Registro.campo / fila.get)
+COLUMNAS = ('FechaHecho', 'HoraHecho', 'delito', 'categoria_delito',
+            'AlcaldiaHechos', 'colonia_datos', 'latitud', 'longitud')
+
+_CAMPO = rb'[^,\r\n"]*'
+
+
+def patron_columnas(total, indices):
+    """
+    Expresión para una línea sin comillas con exactamente `total` columnas que
+    captura las de `indices` (en orden creciente); las demás solo se saltan
+    """
+    partes = [b'^']
+    anterior = -1
+    for indice in indices:
+        saltar = indice - anterior - 1
+        if saltar:
+            partes.append(b'(?:' + _CAMPO + b',){%d}' % saltar)
+        partes.append(b'(' + _CAMPO + b')' + (b',' if indice < total - 1 else b''))
+        anterior = indice
+    resto = total - 1 - anterior
+    if resto:
+        partes.append(b'(?:' + _CAMPO + b',){%d}' % (resto - 1) + _CAMPO)
+    partes.append(rb'\r?$')
+    return re.compile(b''.join(partes), re.MULTILINE)
+
+
+class Fila:
+    """Valores de las columnas seleccionadas; posiciones es compartido por todas las filas"""
+    __slots__ = ('valores', 'posiciones', 'encoding')
+
+    def __init__(self, valores, posiciones, encoding):
+        self.valores = valores
+        self.posiciones = posiciones
+        self.encoding = encoding
+
+    def get(self, nombre, default=None):
+        i = self.posiciones.get(nombre)
+        if i is None:
+            return default
+        valor = self.valores[i]
+        if valor is None:
+            return default
+        return valor.decode(self.encoding) if type(valor) is bytes else valor
+
+
+class LectorMmap:
+    """
+    Itera las filas de [desde, hasta) de un CSV mapeado en memoria
+    posicion es el byte donde empieza el siguiente registro (para el progreso
+    y para continuar); encabezado se lee del archivo si no se da
+    Las líneas que la expresión no reconoce (comillas, saltos de línea dentro
+    de un campo, filas cortas) se leen con el módulo csv, así que el resultado
+    es el mismo que con csv.DictReader
+    """
+
+    def __init__(self, mapa, desde=0, hasta=None, encabezado=None, columnas=COLUMNAS, encoding='utf-8'):
+        self.mapa = mapa
+        self.encoding = encoding
+        self.hasta = len(mapa) if hasta is None else hasta
+        self.posicion = desde
+        if encabezado is None:
+            salto = mapa.find(b'\n', desde, self.hasta)
+            fin = self.hasta if salto == -1 else salto
+            encabezado = next(csv.reader([mapa[desde:fin].decode(encoding)]), [])
+            self.posicion = fin + 1 if salto != -1 else fin
+        self.encabezado = encabezado
+        presentes = sorted((encabezado.index(c), c) for c in columnas if c in encabezado)
+        self.indices = [i for i, _ in presentes]
+        self.posiciones = {c: k for k, (_, c) in enumerate(presentes)}
+        self.patron = patron_columnas(len(encabezado), self.indices)
+
+    def _filas_csv(self, inicio, fin):
+        """Registros de un tramo que la expresión no reconoció"""
+        texto = io.StringIO(self.mapa[inicio:fin].decode(self.encoding), newline=None)
+        indices = self.indices
+        for campos in csv.reader(texto):
+            if campos:
+                yield Fila([campos[i] if i < len(campos) else None for i in indices],
+                           self.posiciones, self.encoding)
+
+    def __iter__(self):
+        mapa = self.mapa
+        posiciones = self.posiciones
+        encoding = self.encoding
+        pendiente = self.posicion  # inicio del tramo aún no entregado
+        revisado = pendiente       # hasta dónde se contaron las comillas del tramo
+        impar = False              # paridad de comillas en [pendiente, revisado)
+        for coincidencia in self.patron.finditer(mapa, self.posicion, self.hasta):
+            inicio = coincidencia.start()
+            if inicio > pendiente:
+                # Tramo con líneas especiales; si deja comillas abiertas, esta línea
+                # es la continuación de un campo y se queda en el tramo. Solo se
+                # cuenta lo nuevo desde la última coincidencia (el tramo puede ser largo)
+                impar ^= mapa[revisado:inicio].count(b'"') % 2 == 1
+                revisado = inicio
+                if impar:
+                    continue
+                yield from self._filas_csv(pendiente, inicio)
+            pendiente = revisado = min(coincidencia.end() + 1, self.hasta)
+            self.posicion = pendiente
+            yield Fila(coincidencia.groups(), posiciones, encoding)
+        if pendiente < self.hasta:
+            yield from self._filas_csv(pendiente, self.hasta)
+        self.posicion = self.hasta
+
+
+class MapaCSV:
+    """Context manager que abre y mapea el archivo (solo lectura)"""
+
+    def __init__(self, input_file):
+        self.input_file = input_file
+        self.archivo = None
+        self.mapa = None
+
+    def __enter__(self):
+        self.archivo = open(self.input_file, 'rb')
+        if os.path.getsize(self.input_file) == 0:
+            self.mapa = b''
+        else:
+            self.mapa = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.mapa
+
+    def __exit__(self, *exc):
+        if isinstance(self.mapa, mmap.mmap):
+            self.mapa.close()
+        self.archivo.close()
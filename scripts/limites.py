@@ -0,0 +1,282 @@
+"""
+Límites de CDMX precalculados para el mapa
+Disuelve las alcaldías en el contorno de la ciudad y simplifica la geometría
+por zoom sin romper la topología: los bordes compartidos entre alcaldías se
+parten en arcos y cada arco se simplifica una sola vez, así dos alcaldías
+vecinas siguen coincidiendo y el contorno sale de las mismas aristas
+
+Salida en data/limites/:
+  cdmx-z<zoom>.json        contorno (un Feature Polygon/MultiPolygon)
+  alcaldias-z<zoom>.json   alcaldías simplificadas (mismas propiedades)
+  indice.json              zooms, tolerancias, vértices y archivos
+"""
+import json
+import math
+import os
+from collections import defaultdict
+
+from alcaldias import RUTA_LIMITES
+
+DIRECTORIO = 'data/limites'
+# (zoom, tolerancia en grados ~ 1 píxel a ese zoom); None = geometría completa
+ZOOMS = [(10, 360 / (256 << 10)), (12, 360 / (256 << 12)), (14, 360 / (256 << 14)), ('completo', None)]
+VERSION = 1
+_COS_LAT = math.cos(math.radians(19.4))  # escala de longitud en CDMX para medir distancias
+
+
+def _distancia(p, a, b):
+    """Distancia de p al segmento ab (en grados de latitud)"""
+    px, py = (p[0] - a[0]) * _COS_LAT, p[1] - a[1]
+    bx, by = (b[0] - a[0]) * _COS_LAT, b[1] - a[1]
+    largo = bx * bx + by * by
+    if largo == 0:
+        return math.hypot(px, py)
+    t = max(0.0, min(1.0, (px * bx + py * by) / largo))
+    return math.hypot(px - t * bx, py - t * by)
+
+
+def douglas_peucker(puntos, tolerancia):
+    """Simplifica una línea conservando sus extremos"""
+    if len(puntos) <= 2:
+        return list(puntos)
+    conservar = [False] * len(puntos)
+    conservar[0] = conservar[-1] = True
+    pila = [(0, len(puntos) - 1)]
+    while pila:
+        inicio, fin = pila.pop()
+        maxima, indice = 0.0, None
+        for k in range(inicio + 1, fin):
+            d = _distancia(puntos[k], puntos[inicio], puntos[fin])
+            if d > maxima:
+                maxima, indice = d, k
+        if indice is not None and maxima > tolerancia:
+            conservar[indice] = True
+            pila.append((inicio, indice))
+            pila.append((indice, fin))
+    return [p for p, c in zip(puntos, conservar) if c]
+
+
+def area(anillo):
+    """Área con signo (positiva en sentido antihorario)"""
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(anillo, anillo[1:])) / 2
+
+
+def _contiene(anillo, punto):
+    x, y = punto
+    dentro = False
+    for (x1, y1), (x2, y2) in zip(anillo, anillo[1:]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            dentro = not dentro
+    return dentro
+
+
+def _arista(a, b):
+    return (a, b) if a <= b else (b, a)
+
+
+def _abrir(anillo):
+    vertices = [tuple(c) for c in anillo]
+    if vertices[0] == vertices[-1]:
+        vertices.pop()
+    return vertices
+
+
+def _todos(partes):
+    return [anillo for parte in partes for anillo in parte]
+
+
+class Topologia:
+    """Alcaldías como anillos de vértices y el uso de cada arista"""
+
+    def __init__(self, features):
+        self.features = features
+        # poligonos[f] = partes [exterior, agujeros...], cada anillo como lista de
+        # tuplas sin repetir el primer vértice
+        self.poligonos = []
+        for feature in features:
+            geometria = feature['geometry']
+            partes = [geometria['coordinates']] if geometria['type'] == 'Polygon' else geometria['coordinates']
+            self.poligonos.append([[_abrir(anillo) for anillo in parte] for parte in partes])
+
+        self.usos = defaultdict(set)
+        for f, partes in enumerate(self.poligonos):
+            for vertices in _todos(partes):
+                for a, b in zip(vertices, vertices[1:] + vertices[:1]):
+                    self.usos[_arista(a, b)].add(f)
+
+    def _arcos(self, vertices):
+        """Parte un anillo donde cambian los polígonos que usan sus aristas"""
+        n = len(vertices)
+        claves = [frozenset(self.usos[_arista(vertices[k], vertices[(k + 1) % n])]) for k in range(n)]
+        cortes = [k for k in range(n) if claves[k] != claves[k - 1]]
+        if not cortes:
+            # Anillo sin vecinos distintos: anclas deterministas en el mínimo y el máximo
+            cortes = sorted({vertices.index(min(vertices)), vertices.index(max(vertices))})
+        arcos = []
+        for inicio, fin in zip(cortes, cortes[1:] + [cortes[0] + n]):
+            arcos.append([vertices[k % n] for k in range(inicio, fin + 1)])
+        return arcos
+
+    def simplificar(self, tolerancia):
+        """Anillos simplificados por polígono; cada arco compartido se simplifica una vez"""
+        cache = {}
+
+        def arco_simplificado(arco):
+            invertido = arco[0] > arco[-1] or (arco[0] == arco[-1] and arco[1] > arco[-2])
+            canonico = tuple(reversed(arco)) if invertido else tuple(arco)
+            if canonico not in cache:
+                cache[canonico] = douglas_peucker(canonico, tolerancia)
+            resultado = cache[canonico]
+            return resultado[::-1] if invertido else resultado
+
+        poligonos = []
+        for partes in self.poligonos:
+            simplificadas = []
+            for parte in partes:
+                anillos = []
+                for vertices in parte:
+                    anillo = []
+                    for arco in self._arcos(vertices):
+                        anillo.extend(arco_simplificado(arco)[:-1])
+                    if len(anillo) >= 3:
+                        anillos.append(anillo)
+                    elif not anillos:
+                        break  # el exterior se colapsó: la parte completa es menor a la tolerancia
+                if anillos:
+                    simplificadas.append(anillos)
+            poligonos.append(simplificadas)
+        return poligonos
+
+
+def disolver(poligonos, agujeros=False):
+    """
+    Une los polígonos eliminando las aristas compartidas
+    Regresa una lista de partes [exterior, agujeros...] con anillos cerrados
+    Los límites oficiales dejan rendijas entre alcaldías vecinas que salen como
+    agujeros del contorno; por defecto se descartan (la ciudad no tiene huecos)
+    """
+    conteo = defaultdict(int)
+    for partes in poligonos:
+        for vertices in _todos(partes):
+            for a, b in zip(vertices, vertices[1:] + vertices[:1]):
+                if a != b:
+                    conteo[_arista(a, b)] += 1
+
+    vecinos = defaultdict(list)
+    for (a, b), n in conteo.items():
+        if n == 1:
+            vecinos[a].append(b)
+            vecinos[b].append(a)
+
+    usadas = set()
+    anillos = []
+    for inicio in sorted(vecinos):
+        for siguiente in sorted(vecinos[inicio]):
+            if _arista(inicio, siguiente) in usadas:
+                continue
+            anillo = [inicio]
+            previo, actual = inicio, siguiente
+            usadas.add(_arista(inicio, siguiente))
+            while actual != inicio:
+                anillo.append(actual)
+                candidatos = [v for v in vecinos[actual] if _arista(actual, v) not in usadas]
+                if not candidatos:
+                    break
+                previo, actual = actual, candidatos[0]
+                usadas.add(_arista(previo, actual))
+            anillo.append(inicio)
+            if len(anillo) >= 4:
+                anillos.append(anillo)
+
+    # Del más grande al más chico: cada anillo es agujero del primero que lo contiene
+    anillos.sort(key=lambda a: -abs(area(a)))
+    resultado = []
+    for anillo in anillos:
+        contenedor = next((p for p in resultado if _contiene(p[0], anillo[0])), None)
+        if contenedor is None:
+            resultado.append([_orientar(anillo, antihorario=True)])
+        elif agujeros:
+            contenedor.append(_orientar(anillo, antihorario=False))
+    return resultado
+
+
+def _orientar(anillo, antihorario):
+    return anillo if (area(anillo) > 0) == antihorario else anillo[::-1]
+
+
+def _geometria(partes, decimales):
+    def redondear(anillo):
+        return [[round(x, decimales), round(y, decimales)] for x, y in anillo]
+
+    partes = [[redondear(anillo) for anillo in parte] for parte in partes]
+    if len(partes) == 1:
+        return {'type': 'Polygon', 'coordinates': partes[0]}
+    return {'type': 'MultiPolygon', 'coordinates': partes}
+
+
+def _escribir(ruta, datos):
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(ruta + '.tmp', ruta)
+    return os.path.getsize(ruta)
+
+
+def generar(ruta_limites=RUTA_LIMITES, directorio=DIRECTORIO, zooms=ZOOMS):
+    with open(ruta_limites, encoding='utf-8') as f:
+        limites = json.load(f)
+    features = [f for f in limites['features']
+                if f.get('geometry') and f['geometry']['type'] in ('Polygon', 'MultiPolygon')]
+    topologia = Topologia(features)
+    os.makedirs(directorio, exist_ok=True)
+
+    indice = {'version': VERSION, 'fuente': os.path.basename(ruta_limites), 'zooms': []}
+    for zoom, tolerancia in zooms:
+        if tolerancia is None:
+            poligonos = topologia.poligonos
+            decimales = 7
+        else:
+            poligonos = topologia.simplificar(tolerancia)
+            # Suficientes decimales para una décima de la tolerancia
+            decimales = max(4, math.ceil(-math.log10(tolerancia)) + 1)
+
+        alcaldias = {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'properties': feature['properties'],
+                 'geometry': _geometria([[_orientar(anillo + anillo[:1], antihorario=(k == 0))
+                                          for k, anillo in enumerate(parte)] for parte in partes],
+                                        decimales)}
+                for feature, partes in zip(features, poligonos)
+            ],
+        }
+        contorno = disolver(poligonos)
+        cdmx = {
+            'type': 'FeatureCollection',
+            'features': [{'type': 'Feature', 'properties': {'nombre': 'Ciudad de México'},
+                          'geometry': _geometria(contorno, decimales)}],
+        }
+
+        sufijo = f'z{zoom}' if isinstance(zoom, int) else zoom
+        archivo_cdmx = f'cdmx-{sufijo}.json'
+        archivo_alcaldias = f'alcaldias-{sufijo}.json'
+        bytes_cdmx = _escribir(os.path.join(directorio, archivo_cdmx), cdmx)
+        bytes_alcaldias = _escribir(os.path.join(directorio, archivo_alcaldias), alcaldias)
+        vertices_cdmx = sum(len(a) for p in contorno for a in p)
+        vertices = sum(len(a) + 1 for partes in poligonos for a in _todos(partes))
+        indice['zooms'].append({
+            'zoom': zoom,
+            'tolerancia': tolerancia,
+            'cdmx': {'archivo': archivo_cdmx, 'vertices': vertices_cdmx, 'bytes': bytes_cdmx},
+            'alcaldias': {'archivo': archivo_alcaldias, 'vertices': vertices, 'bytes': bytes_alcaldias},
+        })
+        print(f"  {sufijo:>9}: contorno {vertices_cdmx:>6,} vértices ({bytes_cdmx / 1024:7.1f} KB), "
+              f"alcaldías {vertices:>6,} vértices ({bytes_alcaldias / 1024:7.1f} KB)")
+
+    _escribir(os.path.join(directorio, 'indice.json'), indice)
+    return indice
+
+
+if __name__ == '__main__':
+    print(f"Generando límites simplificados en {DIRECTORIO}/ a partir de {RUTA_LIMITES}...")
+    generar()
+    print("Listo")
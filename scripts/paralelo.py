@@ -0,0 +1,154 @@
+"""
+Procesamiento paralelo del CSV de la Fiscalía
+Divide el archivo en rangos de bytes alineados a inicios de registro, procesa
+cada rango en un proceso distinto y combina los resultados en orden
+"""
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from escaneo import Escaneo, Registro
+from lector_mmap import LectorMmap, MapaCSV
+
+BLOQUE = 1 << 20
+BYTES_POR_PARTE = 64 << 20
+
+
+def limites_registros(input_file, partes):
+    """
+    Regresa (encabezado, limites) con partes+1 offsets de inicio de registro
+    Un salto de línea solo cierra un registro si el número de comillas antes
+    de él es par (las comillas escapadas "" no cambian la paridad), así que
+    los saltos de línea dentro de campos entre comillas nunca parten un registro
+    """
+    tamaño = os.path.getsize(input_file)
+    with open(input_file, 'rb') as f:
+        primera = f.readline()
+        encabezado = next(csv.reader([primera.decode('utf-8')]), [])
+        inicio = f.tell()
+
+        limites = [inicio]
+        objetivos = [inicio + i * (tamaño - inicio) // partes for i in range(1, partes)]
+        k = 0
+        impar = False     # paridad de comillas desde `inicio` hasta base + i
+        base = inicio
+        while k < len(objetivos):
+            bloque = f.read(BLOQUE)
+            if not bloque:
+                break
+            i = 0
+            while k < len(objetivos):
+                desde = max(objetivos[k], limites[-1]) - base
+                if desde >= len(bloque):
+                    break
+                desde = max(desde, i)
+                salto = bloque.find(b'\n', desde)
+                if salto == -1:
+                    # Seguir buscando en el siguiente bloque
+                    objetivos[k] = base + len(bloque)
+                    break
+                impar ^= bloque.count(b'"', i, salto) % 2 == 1
+                i = salto
+                if not impar:
+                    limites.append(base + salto + 1)
+                    k += 1
+                else:
+                    objetivos[k] = base + salto + 1
+            impar ^= bloque.count(b'"', i) % 2 == 1
+            base += len(bloque)
+
+    if limites[-1] < tamaño:
+        limites.append(tamaño)
+    return encabezado, limites
+
+
+def _filas_rango(input_file, inicio, fin, encabezado, encoding, lector):
+    if lector == 'mmap':
+        with MapaCSV(input_file) as mapa:
+            yield from LectorMmap(mapa, inicio, fin, encabezado, encoding=encoding)
+        return
+    with open(input_file, 'rb') as f:
+        f.seek(inicio)
+        datos = f.read(fin - inicio)
+    texto = io.TextIOWrapper(io.BytesIO(datos), encoding=encoding)
+    yield from csv.DictReader(texto, fieldnames=encabezado)
+
+
+def _procesar_rango(input_file, inicio, fin, encabezado, agregadores, encoding, lector='csv'):
+    """Trabajo de un proceso: alimenta a sus agregadores con los registros del rango"""
+    filas = 0
+    for fila in _filas_rango(input_file, inicio, fin, encabezado, encoding, lector):
+        filas += 1
+        registro = Registro(fila)
+        for agregador in agregadores:
+            agregador.procesar(registro)
+    for agregador in agregadores:
+        agregador.finalizar()
+    return filas, agregadores
+
+
+def escanear_paralelo(input_file, agregadores, procesos=None, encoding='utf-8', metricas=None,
+                      lector='csv'):
+    """
+    Igual que escanear_csv pero repartiendo el archivo entre varios procesos
+    Cada agregador crea sus copias parciales con nuevo_parcial() y las recibe
+    de vuelta con combinar() en el orden del archivo, así que el resultado es
+    el mismo que el de una sola lectura
+    """
+    procesos = procesos or os.cpu_count() or 1
+    tamaño = os.path.getsize(input_file)
+    partes = max(procesos * 4, tamaño // BYTES_POR_PARTE)
+    inicio_division = time.perf_counter()
+    encabezado, limites = limites_registros(input_file, partes)
+    if metricas is not None:
+        metricas.sumar('division_rangos', time.perf_counter() - inicio_division)
+
+    rangos = list(zip(limites[:-1], limites[1:]))
+    parciales = [[a.nuevo_parcial(n) for a in agregadores] for n in range(len(rangos))]
+    total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            trabajos = [
+                pool.submit(_procesar_rango, input_file, inicio, fin, encabezado, parciales[n], encoding, lector)
+                for n, (inicio, fin) in enumerate(rangos)
+            ]
+            try:
+                # Combinar en el orden del archivo
+                for trabajo, (_, fin) in zip(trabajos, rangos):
+                    espera = time.perf_counter()
+                    filas, recibidos = trabajo.result()
+                    combinacion = time.perf_counter()
+                    total += filas
+                    for agregador, parcial in zip(agregadores, recibidos):
+                        agregador.combinar(parcial)
+                    if metricas is not None:
+                        metricas.sumar('espera_procesos', combinacion - espera)
+                        metricas.sumar('combinar_parciales', time.perf_counter() - combinacion)
+                        metricas.progreso(metricas.filas + total, fin - limites[0])
+            except BaseException:
+                # No arrancar los rangos pendientes; el pool espera a los que están en curso
+                for trabajo in trabajos:
+                    trabajo.cancel()
+                raise
+    except BaseException:
+        # Sin esto quedarían los .parteN de los rangos que no se llegaron a combinar
+        for parcial in (p for grupo in parciales for p in grupo):
+            if hasattr(parcial, 'descartar'):
+                parcial.descartar()
+        raise
+
+    for agregador in agregadores:
+        if metricas is None:
+            agregador.finalizar()
+        else:
+            with metricas.etapa(f'finalizar {type(agregador).__name__}'):
+                agregador.finalizar()
+
+    if metricas is not None:
+        metricas.entrada = input_file
+        metricas.filas += total
+        metricas.bytes += limites[-1]
+
+    return Escaneo(total, limites[-1], encabezado)
@@ -0,0 +1,172 @@
+"""
+Exportación particionada por tiempo
+Un archivo NDJSON por año (un feature por línea) ordenado por fecha, con un
+índice de offsets por mes: un filtro de fechas descarga solo los meses que
+necesita (HTTP Range con byte/bytes) y busca por bisección dentro de ellos
+
+Estructura de <directorio>:
+  <año>.ndjson    features ordenados por fecha (estable: empates en orden del CSV)
+  indice.json     por año y mes: registro y byte de inicio, registros, bytes, desde/hasta
+"""
+import json
+import os
+import shutil
+
+from escritor_geojson import PRECISION_COMPACTA
+from fechas import dia_fecha
+
+VERSION = 1
+_FECHA = b'"fecha":"'
+
+
+def _fecha_linea(linea):
+    """Texto de la fecha de una línea, sin parsear todo el JSON"""
+    inicio = linea.index(_FECHA) + len(_FECHA)
+    return linea[inicio:linea.index(b'"', inicio)].decode('utf-8')
+
+
+def _dia_linea(linea):
+    return dia_fecha(_fecha_linea(linea))
+
+
+class EscritorParticiones:
+    """
+    Recibe los mismos features que EscritorGeoJSON
+    Mientras se lee el CSV cada feature va sin ordenar a un temporal por mes;
+    al cerrar se ordena un mes a la vez (memoria acotada por el mes más grande)
+    """
+
+    def __init__(self, directorio, continuar=False, fragmento=False):
+        self.directorio = directorio
+        self.continuar = continuar
+        self.fragmento = fragmento
+        self.temporales = os.path.join(directorio, '.meses') if fragmento else directorio + '.tmp'
+        self.meses = {}      # (año, mes) -> registros nuevos
+        self._archivos = {}  # (año, mes) -> archivo temporal abierto
+        self.indice_previo = None
+        if continuar:
+            with open(os.path.join(directorio, 'indice.json'), encoding='utf-8') as f:
+                self.indice_previo = json.load(f)
+        if os.path.exists(self.temporales):
+            shutil.rmtree(self.temporales)
+        os.makedirs(self.temporales)
+
+    def __getstate__(self):
+        estado = dict(self.__dict__)
+        estado['_archivos'] = {}
+        return estado
+
+    def _temporal(self, año, mes):
+        return os.path.join(self.temporales, f'{año}-{mes:02d}.ndjson')
+
+    def escribir(self, feature):
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        feature = {**feature, 'geometry': {**feature['geometry'], 'coordinates': [
+            round(lon, PRECISION_COMPACTA), round(lat, PRECISION_COMPACTA)]}}
+        clave = (props['año'], props['mes'])
+        archivo = self._archivos.get(clave)
+        if archivo is None:
+            archivo = self._archivos[clave] = open(self._temporal(*clave), 'ab')
+        archivo.write(json.dumps(feature, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        archivo.write(b'\n')
+        self.meses[clave] = self.meses.get(clave, 0) + 1
+
+    def _cerrar_temporales(self):
+        for archivo in self._archivos.values():
+            archivo.close()
+        self._archivos = {}
+
+    def combinar(self, fragmento):
+        """Agrega al final de cada mes los registros de un fragmento y borra su directorio"""
+        for clave, registros in fragmento.meses.items():
+            archivo = self._archivos.get(clave)
+            if archivo is None:
+                archivo = self._archivos[clave] = open(self._temporal(*clave), 'ab')
+            with open(fragmento._temporal(*clave), 'rb') as f:
+                shutil.copyfileobj(f, archivo)
+            self.meses[clave] = self.meses.get(clave, 0) + registros
+        shutil.rmtree(fragmento.directorio, ignore_errors=True)
+
+    def _lineas_previas(self, año):
+        """Líneas ya publicadas del año, por mes (solo en modo continuar)"""
+        previos = {}
+        if not self.indice_previo:
+            return previos
+        particion = next((p for p in self.indice_previo['años'] if p['año'] == año), None)
+        if particion is None:
+            return previos
+        with open(os.path.join(self.directorio, particion['archivo']), 'rb') as f:
+            for mes in particion['meses']:
+                f.seek(mes['byte'])
+                previos[mes['mes']] = f.read(mes['bytes']).splitlines(keepends=True)
+        return previos
+
+    def _escribir_año(self, año, meses):
+        """Ordena y escribe <año>.ndjson; regresa su entrada del índice"""
+        previos = self._lineas_previas(año)
+        archivo = f'{año}.ndjson'
+        ruta = os.path.join(self.directorio, archivo)
+        entrada = {'año': año, 'archivo': archivo, 'registros': 0, 'bytes': 0, 'meses': []}
+        with open(ruta + '.tmp', 'wb') as salida:
+            for mes in sorted(set(meses) | set(previos)):
+                lineas = previos.get(mes, [])
+                if mes in meses:
+                    with open(self._temporal(año, mes), 'rb') as f:
+                        lineas = lineas + f.readlines()
+                # sorted es estable: los empates quedan en el orden de lectura del CSV
+                lineas.sort(key=_dia_linea)
+                datos = b''.join(lineas)
+                entrada['meses'].append({
+                    'mes': mes,
+                    'registro': entrada['registros'],
+                    'registros': len(lineas),
+                    'byte': entrada['bytes'],
+                    'bytes': len(datos),
+                    'desde': _fecha_linea(lineas[0]),
+                    'hasta': _fecha_linea(lineas[-1]),
+                })
+                salida.write(datos)
+                entrada['registros'] += len(lineas)
+                entrada['bytes'] += len(datos)
+        os.replace(ruta + '.tmp', ruta)
+        return entrada
+
+    def cerrar(self):
+        self._cerrar_temporales()
+        if self.fragmento:
+            return
+
+        os.makedirs(self.directorio, exist_ok=True)
+        particiones = {}
+        if self.indice_previo:
+            particiones = {p['año']: p for p in self.indice_previo['años']}
+        años = sorted({año for año, _ in self.meses})
+        for año in años:
+            meses = [mes for a, mes in self.meses if a == año]
+            particiones[año] = self._escribir_año(año, meses)
+        shutil.rmtree(self.temporales, ignore_errors=True)
+
+        ordenadas = [particiones[año] for año in sorted(particiones)]
+        indice = {
+            'version': VERSION,
+            'formato': 'ndjson',
+            'registros': sum(p['registros'] for p in ordenadas),
+            'desde': ordenadas[0]['meses'][0]['desde'] if ordenadas else None,
+            'hasta': ordenadas[-1]['meses'][-1]['hasta'] if ordenadas else None,
+            'años': ordenadas,
+        }
+        ruta = os.path.join(self.directorio, 'indice.json')
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=1)
+        os.replace(ruta + '.tmp', ruta)
+
+        # Años de corridas anteriores que ya no están en el índice
+        vigentes = {p['archivo'] for p in ordenadas}
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.ndjson') and nombre not in vigentes:
+                os.remove(os.path.join(self.directorio, nombre))
+
+    def descartar(self):
+        self._cerrar_temporales()
+        shutil.rmtree(self.directorio if self.fragmento else self.temporales, ignore_errors=True)
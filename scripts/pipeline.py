@@ -0,0 +1,145 @@
+"""
+Punto de entrada único del procesamiento del CSV de la Fiscalía
+Una sola lectura (en streaming) de uno o varios CSV, .gz o .zip alimenta todas
+las salidas pedidas. Termina con estado distinto de cero si algo falla
+
+Uso:
+  python scripts/pipeline.py                                  # mismas salidas que csv_to_geojson.py
+  python scripts/pipeline.py datos.csv.gz --desde 2022 --hasta 2024 --tipo asalto \
+      --salida geojson=/tmp/asaltos.geojson --salida rejilla --salida reporte
+  python scripts/pipeline.py 2019.zip 2020.zip --salida binario --salida horarios
+
+Salidas (--salida nombre[=ruta], se puede repetir):
+  geojson, binario, rejilla, teselas, particiones, hotspots, riesgo, horarios,
+  sqlite, calidad y reporte (los análisis de analyze_*.py en la misma lectura)
+"""
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+import zipfile
+
+from alcaldias import RUTA_LIMITES
+from almacen import RUTA_SQLITE
+from escaneo import RUTA_CSV_PGJ
+
+# Nombre de la salida -> (argumento de procesar_csv, ruta por omisión)
+SALIDAS = {
+    'geojson': ('output_file', 'data/delitos-cdmx.geojson'),
+    'binario': ('salida_binaria', 'data/delitos-cdmx.bin'),
+    'rejilla': ('salida_rejilla', 'data/delitos-rejilla.json'),
+    'teselas': ('salida_teselas', 'data/teselas'),
+    'particiones': ('salida_particiones', 'data/particiones'),
+    'hotspots': ('salida_hotspots', 'data/hotspots.geojson'),
+    'riesgo': ('salida_riesgo', 'data/riesgo'),
+    'horarios': ('salida_horarios', 'data/horarios.json'),
+    'sqlite': ('salida_sqlite', RUTA_SQLITE),
+    'calidad': ('salida_calidad', 'data/delitos-cdmx.calidad.json'),
+    'reporte': (None, None),
+}
+# Lo que escribía csv_to_geojson.py sin opciones
+SALIDAS_POR_OMISION = ['geojson', 'binario', 'rejilla', 'teselas', 'particiones', 'hotspots', 'riesgo',
+                       'horarios']
+SALIDAS_NUMPY = ['riesgo', 'horarios']
+TIPOS = ['robo', 'asalto', 'homicidio']
+
+
+def salida(texto):
+    """'nombre' o 'nombre=ruta' -> (nombre, ruta)"""
+    nombre, _, ruta = texto.partition('=')
+    if nombre not in SALIDAS:
+        raise argparse.ArgumentTypeError(f"salida desconocida: {nombre} (opciones: {', '.join(SALIDAS)})")
+    if ruta and nombre == 'reporte':
+        raise argparse.ArgumentTypeError("la salida reporte no lleva ruta")
+    return nombre, ruta or SALIDAS[nombre][1]
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description='Convierte el CSV de la Fiscalía en las salidas del mapa con una sola lectura')
+    parser.add_argument('entradas', nargs='*', default=[RUTA_CSV_PGJ], metavar='CSV',
+                        help='CSV, .csv.gz o .zip; varios se leen en orden como uno solo')
+    parser.add_argument('--desde', type=int, default=2019, metavar='AÑO')
+    parser.add_argument('--hasta', type=int, metavar='AÑO')
+    parser.add_argument('--tipo', action='append', choices=TIPOS, help='se puede repetir (todos por omisión)')
+    parser.add_argument('--salida', action='append', type=salida, metavar='NOMBRE[=RUTA]',
+                        help=f"se puede repetir; por omisión {', '.join(SALIDAS_POR_OMISION)}")
+    parser.add_argument('--limites', default=RUTA_LIMITES,
+                        help='límites de alcaldías para asignar CVEGEO ("" para no asignar)')
+    parser.add_argument('--columnar', action='store_true', help='ingesta con NumPy')
+    parser.add_argument('--compacto', action='store_true')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--paralelo', action='store_true')
+    parser.add_argument('--mmap', action='store_true')
+    # Atajos que ya aceptaba csv_to_geojson.py
+    parser.add_argument('--sqlite', action='store_true', help='igual que --salida sqlite')
+    parser.add_argument('--deduplicar', action='store_true', help='igual que --salida calidad')
+    parser.add_argument('--metricas', metavar='RUTA')
+    parser.add_argument('--perfil', choices=['cprofile', 'muestreo'])
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+
+    salidas = dict(args.salida or [(nombre, SALIDAS[nombre][1]) for nombre in SALIDAS_POR_OMISION])
+    if not args.salida and importlib.util.find_spec('numpy') is None:
+        # Sin NumPy las salidas por omisión son las que no lo necesitan
+        for nombre in SALIDAS_NUMPY:
+            del salidas[nombre]
+        print(f"NumPy no está instalado: se omiten {', '.join(SALIDAS_NUMPY)}", file=sys.stderr)
+    if args.sqlite:
+        salidas.setdefault('sqlite', RUTA_SQLITE)
+    if args.deduplicar:
+        salidas.setdefault('calidad', SALIDAS['calidad'][1])
+
+    from csv_to_geojson import procesar_csv
+    from instrumentacion import Metricas, instrumentar
+
+    opciones = {SALIDAS[nombre][0]: ruta for nombre, ruta in salidas.items() if nombre != 'reporte'}
+    opciones.setdefault('output_file', None)
+    analisis = None
+    if 'reporte' in salidas:
+        from analyze_2019 import Analisis2019
+        from analyze_csv_detailed import AnalisisDetallado
+        from analyze_seguridad_visitantes import AnalisisVisitantes
+        analisis = [AnalisisDetallado(), Analisis2019(), AnalisisVisitantes()]
+
+    try:
+        metricas = Metricas(args.metricas, args.perfil) if args.metricas or args.perfil else None
+        if len(args.entradas) == 1 and analisis:
+            from cache_analisis import huella_fuente
+            fuente = huella_fuente(args.entradas[0])
+        with instrumentar(metricas):
+            procesar_csv(args.entradas, año_minimo=args.desde, año_maximo=args.hasta, tipos=args.tipo,
+                         modo='columnar' if args.columnar else 'filas', compacto=args.compacto,
+                         incremental=args.incremental, procesos=os.cpu_count() if args.paralelo else None,
+                         limites_alcaldias=args.limites or None, metricas=metricas,
+                         lector='mmap' if args.mmap else 'csv', analisis=analisis, **opciones)
+    except FileNotFoundError as e:
+        print(f"Error: No se encontró el archivo {e.filename}", file=sys.stderr)
+        if RUTA_CSV_PGJ in args.entradas:
+            print("Asegúrate de que el CSV esté en la carpeta data/", file=sys.stderr)
+        return 1
+    except (ValueError, OSError, EOFError, csv.Error, zipfile.BadZipFile, ImportError) as e:
+        # EOFError: .gz truncado; OSError incluye gzip.BadGzipFile y errores de escritura;
+        # ImportError: se pidió una salida (o --columnar) sin NumPy instalado
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\nInterrumpido; las salidas anteriores quedan intactas", file=sys.stderr)
+        return 130
+
+    if analisis:
+        for a in analisis:
+            a.reporte()
+        if len(args.entradas) == 1:
+            # Los análisis no dependen de --desde/--hasta/--tipo: sirven a analyze_*.py sin releer el CSV
+            from cache_analisis import guardar
+            guardar(args.entradas[0], analisis, fuente)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Conteos precalculados por celda de rejilla para el mapa
+Agrupa los delitos en celdas de varias resoluciones, separados por tipo,
+es_grave, año y mes, para que el cliente sume celdas en vez de puntos
+"""
+import json
+import math
+import os
+from collections import Counter
+
+RESOLUCIONES = (0.005, 0.01, 0.02, 0.05)  # grados (~0.5, 1, 2 y 5 km)
+TIPOS = ['robo', 'asalto', 'homicidio']
+VERSION = 1
+
+
+def indice_celda(valor, resolucion):
+    """Igual que Math.round(valor / resolucion) en el frontend"""
+    return math.floor(valor / resolucion + 0.5)
+
+
+class EscritorRejilla:
+    """
+    Recibe los mismos features que EscritorGeoJSON y escribe los conteos al cerrar
+    Formato: por resolución, columnas paralelas i, j, tipo, grave, año, mes, conteo;
+    el centro de la celda es (i * resolucion, j * resolucion) en (lat, lon)
+    """
+
+    def __init__(self, output_file, resoluciones=RESOLUCIONES, continuar=False, fragmento=False):
+        self.output_file = output_file
+        self.resoluciones = tuple(resoluciones)
+        self.fragmento = fragmento
+        self.conteos = Counter()
+        if continuar:
+            self._cargar()
+
+    def _cargar(self):
+        """Carga los conteos de una corrida anterior para sumarles lo nuevo"""
+        with open(self.output_file, encoding='utf-8') as f:
+            previo = json.load(f)
+        for r, resolucion in enumerate(self.resoluciones):
+            celdas = previo['resoluciones'][str(resolucion)]
+            for fila in zip(celdas['i'], celdas['j'], celdas['tipo'], celdas['grave'],
+                            celdas['año'], celdas['mes'], celdas['conteo']):
+                self.conteos[(r,) + fila[:-1]] += fila[-1]
+
+    def escribir(self, feature):
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        tipo = TIPOS.index(props['tipo'])
+        grave = int(props['es_grave'])
+        año = props['año']
+        mes = props['mes']
+        for r, resolucion in enumerate(self.resoluciones):
+            clave = (r, indice_celda(lat, resolucion), indice_celda(lon, resolucion),
+                     tipo, grave, año, mes)
+            self.conteos[clave] += 1
+
+    def combinar(self, fragmento):
+        self.conteos.update(fragmento.conteos)
+
+    def cerrar(self):
+        if self.fragmento:
+            return
+        resoluciones = {}
+        for r, resolucion in enumerate(self.resoluciones):
+            columnas = {'i': [], 'j': [], 'tipo': [], 'grave': [], 'año': [], 'mes': [], 'conteo': []}
+            for clave in sorted(k for k in self.conteos if k[0] == r):
+                for nombre, valor in zip(columnas, clave[1:] + (self.conteos[clave],)):
+                    columnas[nombre].append(valor)
+            resoluciones[str(resolucion)] = columnas
+
+        salida = {
+            'version': VERSION,
+            'tipos': TIPOS,
+            'resoluciones': resoluciones,
+        }
+        temporal = self.output_file + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(salida, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, self.output_file)
+
+    def descartar(self):
+        self.conteos = None
@@ -0,0 +1,203 @@
+"""
+Superficie de riesgo precalculada (estimación de densidad por kernel)
+Cada delito suma su peso de severidad (homicidio > asalto > robo, multiplicado
+si es grave) en una rejilla fija sobre CDMX; la densidad es la convolución de
+esa rejilla con un kernel gaussiano vía FFT, así el costo depende del tamaño
+de la rejilla y no del número de puntos
+
+Estructura de <directorio>:
+  todo.png, <año>-<mes>.png   raster en escala de grises (0 = sin riesgo, 255 = máximo
+                              de la rebanada; valor = maximo * (gris / 255) ** 2)
+  indice.json                 bbox, resolución, kernel, pesos y máximo de cada rebanada
+  celdas.npz                  pesos por celda y mes para poder continuar
+"""
+import json
+import math
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from hotspots import PESOS_SEVERIDAD
+
+BBOX = (-99.37, 19.04, -98.94, 19.60)  # oeste, sur, este, norte
+RESOLUCION = 0.0025                    # grados (~270 m)
+BANDA_METROS = 400                     # desviación estándar del kernel gaussiano
+FACTOR_GRAVE = 2                       # multiplicador del peso si es_grave
+VERSION = 1
+_METROS_GRADO = 111320
+_TRUNCAR = 3  # el kernel se corta a 3 desviaciones estándar
+
+
+def dimensiones(bbox=BBOX, resolucion=RESOLUCION):
+    """(filas, columnas) de la rejilla; la fila 0 es la del sur"""
+    oeste, sur, este, norte = bbox
+    return round((norte - sur) / resolucion), round((este - oeste) / resolucion)
+
+
+def kernel_gaussiano(resolucion=RESOLUCION, banda=BANDA_METROS, latitud=(BBOX[1] + BBOX[3]) / 2):
+    """Kernel normalizado (suma 1) en celdas; las celdas son más angostas en longitud"""
+    sigma_filas = banda / (resolucion * _METROS_GRADO)
+    sigma_columnas = banda / (resolucion * _METROS_GRADO * math.cos(math.radians(latitud)))
+    filas = np.arange(-math.ceil(_TRUNCAR * sigma_filas), math.ceil(_TRUNCAR * sigma_filas) + 1)
+    columnas = np.arange(-math.ceil(_TRUNCAR * sigma_columnas), math.ceil(_TRUNCAR * sigma_columnas) + 1)
+    kernel = np.outer(np.exp(-0.5 * (filas / sigma_filas) ** 2),
+                      np.exp(-0.5 * (columnas / sigma_columnas) ** 2))
+    return kernel / kernel.sum()
+
+
+def convolucionar(rejilla, kernel):
+    """Convolución 'same' por FFT (con relleno para que no dé la vuelta en los bordes)"""
+    forma = (rejilla.shape[0] + kernel.shape[0] - 1, rejilla.shape[1] + kernel.shape[1] - 1)
+    completa = np.fft.irfft2(np.fft.rfft2(rejilla, forma) * np.fft.rfft2(kernel, forma), forma)
+    f0, c0 = kernel.shape[0] // 2, kernel.shape[1] // 2
+    recortada = completa[f0:f0 + rejilla.shape[0], c0:c0 + rejilla.shape[1]]
+    return np.clip(recortada, 0, None)
+
+
+def cuantizar(densidad):
+    """uint8 con raíz cuadrada (más contraste en las zonas de riesgo bajo) y el máximo usado"""
+    maximo = float(densidad.max()) if densidad.size else 0.0
+    if maximo <= 0:
+        return np.zeros(densidad.shape, dtype=np.uint8), 0.0
+    return np.rint(np.sqrt(densidad / maximo) * 255).astype(np.uint8), maximo
+
+
+def escribir_png(ruta, gris):
+    """PNG en escala de grises de 8 bits; la primera fila de `gris` es la de arriba"""
+    def bloque(tipo, datos):
+        return (struct.pack('>I', len(datos)) + tipo + datos +
+                struct.pack('>I', zlib.crc32(tipo + datos) & 0xFFFFFFFF))
+
+    alto, ancho = gris.shape
+    # Cada fila va precedida del filtro 0 (ninguno)
+    crudo = np.hstack([np.zeros((alto, 1), dtype=np.uint8), gris]).tobytes()
+    with open(ruta + '.tmp', 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(bloque(b'IHDR', struct.pack('>IIBBBBB', ancho, alto, 8, 0, 0, 0, 0)))
+        f.write(bloque(b'IDAT', zlib.compress(crudo, 9)))
+        f.write(bloque(b'IEND', b''))
+    os.replace(ruta + '.tmp', ruta)
+
+
+class EscritorRiesgo:
+    """
+    Recibe los mismos features que EscritorGeoJSON y suma su peso en la celda
+    de su mes; al cerrar convoluciona cada mes y el periodo completo
+    """
+
+    def __init__(self, directorio, continuar=False, fragmento=False):
+        self.directorio = directorio
+        self.fragmento = fragmento
+        self.forma = dimensiones()
+        self.meses = {}  # (año, mes) -> rejilla de pesos
+        self.registros = {}
+        self.fuera = 0
+        if continuar:
+            self._cargar()
+
+    @property
+    def ruta_celdas(self):
+        return os.path.join(self.directorio, 'celdas.npz')
+
+    def _cargar(self):
+        with np.load(self.ruta_celdas) as previo:
+            for clave in previo.files:
+                if clave.startswith('registros_'):
+                    continue
+                año, mes = map(int, clave.split('-'))
+                self.meses[(año, mes)] = previo[clave].copy()
+                self.registros[(año, mes)] = int(previo['registros_' + clave])
+            self.fuera = int(previo['registros_fuera'])
+
+    def _rejilla(self, clave):
+        rejilla = self.meses.get(clave)
+        if rejilla is None:
+            rejilla = self.meses[clave] = np.zeros(self.forma)
+            self.registros[clave] = 0
+        return rejilla
+
+    def escribir(self, feature):
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        oeste, sur, _, _ = BBOX
+        fila = math.floor((lat - sur) / RESOLUCION)
+        columna = math.floor((lon - oeste) / RESOLUCION)
+        if not (0 <= fila < self.forma[0] and 0 <= columna < self.forma[1]):
+            self.fuera += 1
+            return
+        clave = (props['año'], props['mes'])
+        peso = PESOS_SEVERIDAD[props['tipo']] * (FACTOR_GRAVE if props['es_grave'] else 1)
+        self._rejilla(clave)[fila, columna] += peso
+        self.registros[clave] += 1
+
+    def combinar(self, fragmento):
+        for clave, rejilla in fragmento.meses.items():
+            self._rejilla(clave)
+            self.meses[clave] += rejilla
+            self.registros[clave] += fragmento.registros[clave]
+        self.fuera += fragmento.fuera
+
+    def _rebanada(self, nombre, rejilla, registros, kernel, area_celda):
+        densidad = convolucionar(rejilla, kernel) / area_celda
+        # La fila 0 es la del sur; en la imagen va arriba el norte
+        gris, maximo = cuantizar(densidad[::-1])
+        archivo = f'{nombre}.png'
+        escribir_png(os.path.join(self.directorio, archivo), gris)
+        return {'clave': nombre, 'archivo': archivo, 'registros': registros,
+                'peso': float(rejilla.sum()), 'maximo': maximo}
+
+    def cerrar(self):
+        if self.fragmento:
+            return
+
+        os.makedirs(self.directorio, exist_ok=True)
+        kernel = kernel_gaussiano()
+        latitud = math.radians((BBOX[1] + BBOX[3]) / 2)
+        area_celda = (RESOLUCION * _METROS_GRADO / 1000) ** 2 * math.cos(latitud)  # km²
+
+        total = np.zeros(self.forma)
+        rebanadas = []
+        for año, mes in sorted(self.meses):
+            rejilla = self.meses[(año, mes)]
+            total += rejilla
+            rebanadas.append(self._rebanada(f'{año}-{mes:02d}', rejilla, self.registros[(año, mes)],
+                                            kernel, area_celda))
+        todo = self._rebanada('todo', total, sum(self.registros.values()), kernel, area_celda)
+
+        indice = {
+            'version': VERSION,
+            'bbox': list(BBOX),
+            'resolucion': RESOLUCION,
+            'filas': self.forma[0],
+            'columnas': self.forma[1],
+            'banda_metros': BANDA_METROS,
+            'pesos_severidad': PESOS_SEVERIDAD,
+            'factor_grave': FACTOR_GRAVE,
+            'unidad': 'peso por km²',
+            'escala': 'raiz',
+            'fuera_del_bbox': self.fuera,
+            'todo': todo,
+            'meses': rebanadas,
+        }
+        ruta = os.path.join(self.directorio, 'indice.json')
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=1)
+        os.replace(ruta + '.tmp', ruta)
+
+        celdas = {f'{año}-{mes:02d}': rejilla for (año, mes), rejilla in self.meses.items()}
+        celdas.update({f'registros_{año}-{mes:02d}': np.array(n) for (año, mes), n in self.registros.items()})
+        celdas['registros_fuera'] = np.array(self.fuera)
+        with open(self.ruta_celdas + '.tmp', 'wb') as f:
+            np.savez_compressed(f, **celdas)
+        os.replace(self.ruta_celdas + '.tmp', self.ruta_celdas)
+
+        # Meses de corridas anteriores que ya no están en el índice
+        vigentes = {r['archivo'] for r in rebanadas} | {'todo.png'}
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.png') and nombre not in vigentes:
+                os.remove(os.path.join(self.directorio, nombre))
+
+    def descartar(self):
+        self.meses = None
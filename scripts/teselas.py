@@ -0,0 +1,171 @@
+"""
+Exportación del GeoJSON partido por alcaldía y por tesela de mapa (quadkey)
+Así el mapa descarga solo la alcaldía seleccionada o las teselas visibles en
+vez del archivo completo de la ciudad
+
+Estructura de <directorio>:
+  alcaldia/<clave>.geojson    clave = CVEGEO si se asignó por geometría, si no el nombre
+  quadkey/<quadkey>.geojson   teselas Web Mercator (XYZ) del zoom ZOOM
+  manifest.json               cada shard con su archivo, registros y bbox
+"""
+import json
+import math
+import os
+import re
+import shutil
+import unicodedata
+
+from escritor_geojson import EscritorGeoJSON, PRECISION_COMPACTA
+
+ZOOM = 12  # ~10 km por tesela en CDMX, unas pocas decenas de archivos
+VERSION = 1
+
+
+def tesela(lon, lat, zoom):
+    """(x, y) de la tesela XYZ que contiene al punto"""
+    n = 1 << zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def quadkey(x, y, zoom):
+    """Clave de Bing Maps: un dígito 0-3 por nivel de zoom"""
+    digitos = []
+    for nivel in range(zoom, 0, -1):
+        mascara = 1 << (nivel - 1)
+        digitos.append(str((1 if x & mascara else 0) + (2 if y & mascara else 0)))
+    return ''.join(digitos)
+
+
+def limites_tesela(x, y, zoom):
+    """[oeste, sur, este, norte] de una tesela XYZ"""
+    n = 1 << zoom
+
+    def latitud(fila):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * fila / n))))
+
+    return [x / n * 360.0 - 180.0, latitud(y + 1), (x + 1) / n * 360.0 - 180.0, latitud(y)]
+
+
+def clave_archivo(texto):
+    """Nombre de archivo estable para una alcaldía sin CVEGEO ('ÁLVARO OBREGÓN' -> 'alvaro-obregon')"""
+    sin_acentos = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', sin_acentos.lower()).strip('-') or 'sin-alcaldia'
+
+
+class EscritorTeselas:
+    """
+    Recibe los mismos features que EscritorGeoJSON y los reparte en un
+    EscritorGeoJSON compacto por shard; el manifiesto se escribe al cerrar
+    """
+
+    def __init__(self, directorio, zoom=ZOOM, continuar=False, fragmento=False):
+        self.directorio = directorio
+        self.zoom = zoom
+        self.continuar = continuar
+        self.fragmento = fragmento
+        self.escritores = {}  # (capa, clave) -> EscritorGeoJSON
+        self.shards = {}      # (capa, clave) -> {'registros', 'bbox', ...}
+        self._previos = set()
+        if continuar:
+            self._cargar()
+
+    def _cargar(self):
+        """Retoma los conteos y bboxes de la corrida anterior"""
+        with open(os.path.join(self.directorio, 'manifest.json'), encoding='utf-8') as f:
+            previo = json.load(f)
+        if previo['zoom'] != self.zoom:
+            raise ValueError(f"{self.directorio} se generó con zoom {previo['zoom']}")
+        for capa in ('alcaldia', 'quadkey'):
+            for shard in previo[capa]:
+                clave = (capa, shard['clave'])
+                self.shards[clave] = {k: v for k, v in shard.items() if k != 'clave'}
+                self._previos.add(clave)
+
+    def _ruta(self, capa, clave):
+        return os.path.join(self.directorio, capa, f'{clave}.geojson')
+
+    def _escritor(self, capa, clave):
+        escritor = self.escritores.get((capa, clave))
+        if escritor is None:
+            os.makedirs(os.path.join(self.directorio, capa), exist_ok=True)
+            escritor = EscritorGeoJSON(self._ruta(capa, clave), compacto=True,
+                                       continuar=(capa, clave) in self._previos,
+                                       fragmento=self.fragmento)
+            self.escritores[(capa, clave)] = escritor
+        return escritor
+
+    def _sumar(self, capa, clave, registros, bbox, **extra):
+        shard = self.shards.get((capa, clave))
+        if shard is None:
+            self.shards[(capa, clave)] = {'registros': registros, 'bbox': list(bbox), **extra}
+            return
+        shard['registros'] += registros
+        actual = shard['bbox']
+        shard['bbox'] = [min(actual[0], bbox[0]), min(actual[1], bbox[1]),
+                         max(actual[2], bbox[2]), max(actual[3], bbox[3])]
+
+    def escribir(self, feature):
+        props = feature['properties']
+        lon, lat = feature['geometry']['coordinates']
+        # Mismo redondeo que las coordenadas escritas en los shards
+        lon_r, lat_r = round(lon, PRECISION_COMPACTA), round(lat, PRECISION_COMPACTA)
+        punto = (lon_r, lat_r, lon_r, lat_r)
+
+        if 'cvegeo' in props:
+            # Asignada por geometría: el nombre oficial está en los límites de alcaldías
+            clave = props['cvegeo'] or 'sin-alcaldia'
+            extra = {'cvegeo': props['cvegeo']}
+        else:
+            clave = clave_archivo(props['alcaldia'])
+            extra = {'nombre': props['alcaldia']}
+        self._escritor('alcaldia', clave).escribir(feature)
+        self._sumar('alcaldia', clave, 1, punto, **extra)
+
+        x, y = tesela(lon, lat, self.zoom)
+        clave = quadkey(x, y, self.zoom)
+        self._escritor('quadkey', clave).escribir(feature)
+        self._sumar('quadkey', clave, 1, punto, x=x, y=y, z=self.zoom,
+                    limites=limites_tesela(x, y, self.zoom))
+
+    def combinar(self, fragmento):
+        """Agrega los shards de un fragmento (en el orden del archivo) y borra su directorio"""
+        for (capa, clave), escritor in fragmento.escritores.items():
+            self._escritor(capa, clave).combinar(escritor)
+        for (capa, clave), shard in fragmento.shards.items():
+            extra = {k: v for k, v in shard.items() if k not in ('registros', 'bbox')}
+            self._sumar(capa, clave, shard['registros'], shard['bbox'], **extra)
+        shutil.rmtree(fragmento.directorio, ignore_errors=True)
+
+    def cerrar(self):
+        for escritor in self.escritores.values():
+            escritor.cerrar()
+        if self.fragmento:
+            return
+
+        manifiesto = {'version': VERSION, 'zoom': self.zoom, 'alcaldia': [], 'quadkey': []}
+        for (capa, clave), shard in sorted(self.shards.items()):
+            manifiesto[capa].append({
+                'clave': clave,
+                'archivo': f'{capa}/{clave}.geojson',
+                **shard,
+            })
+        ruta = os.path.join(self.directorio, 'manifest.json')
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(ruta + '.tmp', ruta)
+
+        # Shards de corridas anteriores que ya no están en el manifiesto
+        for capa in ('alcaldia', 'quadkey'):
+            carpeta = os.path.join(self.directorio, capa)
+            vigentes = {f'{clave}.geojson' for c, clave in self.shards if c == capa}
+            for nombre in os.listdir(carpeta) if os.path.isdir(carpeta) else []:
+                if nombre.endswith('.geojson') and nombre not in vigentes:
+                    os.remove(os.path.join(carpeta, nombre))
+
+    def descartar(self):
+        for escritor in self.escritores.values():
+            escritor.descartar()
@@ -6,6 +6,7 @@ import ReportForm from './components/ReportForm/ReportForm'
 import { ReporteCiudadano, Coordinates, FiltrosMapa, TipoDelito } from './types/map'
 import { guardarReporte, obtenerReportes, eliminarReporte } from './utils/reportes'
 import { useDelitosData } from './hooks/useDelitosData'
+import { rebanadaRiesgo } from './components/Map/RiskSurfaceLayer'
 
 function App() {
   const [sidebarOpen, setSidebarOpen] = useState(false)
@@ -45,18 +46,17 @@ function App() {
     return filtrarDelitos(filtros)
   }, [delitos, filtros, filtrarDelitos])
 
-  // Obtener datos para el mapa de calor
+  // Puntos para el mapa de calor, solo si ninguna superficie precalculada cubre los filtros
   const heatmapData = useMemo(() => {
-    if (!filtros.mostrarCalor || delitosFiltrados.length === 0) {
+    if (!filtros.mostrarCalor || rebanadaRiesgo(filtros) !== null || delitosFiltrados.length === 0) {
       return []
     }
-    const data = getHeatmapData(
+    return getHeatmapData(
       delitosFiltrados,
       filtros.calorSoloZonasCriticas || false,
       filtros.calorMuestreo !== false // true por defecto
     )
-    return data
-  }, [delitosFiltrados, filtros.mostrarCalor, filtros.calorSoloZonasCriticas, filtros.calorMuestreo, getHeatmapData])
+  }, [delitosFiltrados, filtros, getHeatmapData])
 
   // Filtrar reportes según los filtros activos
   const reportesFiltrados = useMemo(() => {
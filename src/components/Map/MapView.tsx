@@ -7,6 +7,7 @@ import CdmxBoundary from './CdmxBoundary'
 import ReportMarkers from './ReportMarkers'
 import MapClickHandler from './MapClickHandler'
 import HeatmapLayer from './HeatmapLayer'
+import RiskSurfaceLayer, { rebanadaRiesgo } from './RiskSurfaceLayer'
 import SafetyZonesLayer from './SafetyZonesLayer'
 import { ReporteCiudadano, Coordinates, FiltrosMapa, Delito } from '../../types/map'
 
@@ -68,6 +69,8 @@ export default function MapView({
   calorIntensidad = 50,
   delitos = []
 }: MapViewProps) {
+  const periodoRiesgo = filtros ? rebanadaRiesgo(filtros) : null
+
   return (
     <div className="h-full w-full relative">
       <MapContainer
@@ -85,7 +88,15 @@ export default function MapView({
         {mapSelectionMode && <SelectionZoomController enabled={mapSelectionMode} />}
         <CdmxBoundary />
         <ReportMarkers reportes={reportes} onDeleteReport={onDeleteReport} />
-        {filtros?.mostrarCalor === true && heatmapData.length > 0 && (
+        {filtros?.mostrarCalor === true && periodoRiesgo !== null && (
+          <RiskSurfaceLayer
+            enabled={true}
+            periodo={periodoRiesgo}
+            intensidad={calorIntensidad || 50}
+            soloZonasCriticas={filtros.calorSoloZonasCriticas || false}
+          />
+        )}
+        {filtros?.mostrarCalor === true && periodoRiesgo === null && heatmapData.length > 0 && (
           <HeatmapLayer 
             data={heatmapData} 
             enabled={true}
@@ -0,0 +1,145 @@
+import { useEffect } from 'react'
+import { useMap } from 'react-leaflet'
+import L from 'leaflet'
+import { FiltrosMapa } from '../../types/map'
+
+// Superficie de riesgo precalculada por scripts/riesgo.py: un PNG en grises por
+// rebanada (todo el periodo o un mes) que aquí se colorea y se sobrepone al mapa
+const RUTA_RIESGO = '/data/riesgo'
+const TOTAL_TIPOS = 3
+
+// Las rebanadas suman todos los tipos y todas las alcaldías: solo sirven si los
+// filtros piden exactamente eso, sin fechas o un mes completo. Regresa 'todo',
+// 'AAAA-MM' o null (entonces el mapa de calor se arma con los puntos filtrados)
+export function rebanadaRiesgo(filtros: FiltrosMapa): string | null {
+  if (filtros.tiposDelito.length !== TOTAL_TIPOS || filtros.alcaldia) return null
+  const { fechaInicio, fechaFin } = filtros
+  if (!fechaInicio && !fechaFin) return 'todo'
+  if (!fechaInicio || !fechaFin) return null
+  const mes = fechaInicio.slice(0, 7)
+  const [anio, numeroMes] = mes.split('-').map(Number)
+  const ultimoDia = new Date(Date.UTC(anio, numeroMes, 0)).getUTCDate()
+  return fechaInicio === `${mes}-01` && fechaFin === `${mes}-${ultimoDia}` ? mes : null
+}
+
+interface RebanadaRiesgo {
+  clave: string
+  archivo: string
+  registros: number
+  maximo: number
+}
+
+interface IndiceRiesgo {
+  bbox: [number, number, number, number] // oeste, sur, este, norte
+  todo: RebanadaRiesgo
+  meses: RebanadaRiesgo[]
+}
+
+interface RiskSurfaceLayerProps {
+  enabled: boolean
+  periodo?: string // 'todo' o 'AAAA-MM' (ver rebanadaRiesgo)
+  intensidad?: number // 0-100 para ajustar opacidad
+  soloZonasCriticas?: boolean
+}
+
+// Misma rampa que usaba el mapa de calor de leaflet.heat: [posición, r, g, b, alfa]
+const GRADIENTE: Array<[number, number, number, number, number]> = [
+  [0.0, 0, 0, 255, 0],
+  [0.3, 0, 255, 255, 0.3],
+  [0.5, 255, 255, 0, 0.5],
+  [0.7, 255, 165, 0, 0.7],
+  [1.0, 255, 0, 0, 0.9],
+]
+
+// El raster usa escala de raíz: gris = 255 * sqrt(valor / máximo)
+const UMBRAL_CRITICO = Math.round(255 * Math.sqrt(0.5))
+
+function color(t: number): [number, number, number, number] {
+  for (let k = 1; k < GRADIENTE.length; k++) {
+    const [p1, ...c1] = GRADIENTE[k]
+    if (t <= p1) {
+      const [p0, ...c0] = GRADIENTE[k - 1]
+      const f = (t - p0) / (p1 - p0)
+      return c0.map((v, i) => v + (c1[i] - v) * f) as [number, number, number, number]
+    }
+  }
+  const [, ...ultimo] = GRADIENTE[GRADIENTE.length - 1]
+  return ultimo as [number, number, number, number]
+}
+
+// Tabla de 256 colores RGBA, uno por nivel de gris
+function paleta(soloZonasCriticas: boolean): Uint8ClampedArray {
+  const tabla = new Uint8ClampedArray(256 * 4)
+  for (let gris = 1; gris < 256; gris++) {
+    if (soloZonasCriticas && gris < UMBRAL_CRITICO) continue
+    const [r, g, b, a] = color(gris / 255)
+    tabla.set([r, g, b, Math.round(a * 255)], gris * 4)
+  }
+  return tabla
+}
+
+function colorear(imagen: HTMLImageElement, soloZonasCriticas: boolean): string {
+  const canvas = document.createElement('canvas')
+  canvas.width = imagen.width
+  canvas.height = imagen.height
+  const ctx = canvas.getContext('2d')!
+  ctx.drawImage(imagen, 0, 0)
+  const pixeles = ctx.getImageData(0, 0, canvas.width, canvas.height)
+  const tabla = paleta(soloZonasCriticas)
+  const datos = pixeles.data
+  for (let i = 0; i < datos.length; i += 4) {
+    const gris = datos[i]
+    datos[i] = tabla[gris * 4]
+    datos[i + 1] = tabla[gris * 4 + 1]
+    datos[i + 2] = tabla[gris * 4 + 2]
+    datos[i + 3] = tabla[gris * 4 + 3]
+  }
+  ctx.putImageData(pixeles, 0, 0)
+  return canvas.toDataURL()
+}
+
+export default function RiskSurfaceLayer({
+  enabled,
+  periodo = 'todo',
+  intensidad = 50,
+  soloZonasCriticas = false,
+}: RiskSurfaceLayerProps) {
+  const map = useMap()
+
+  useEffect(() => {
+    if (!enabled) return
+
+    let capa: L.ImageOverlay | null = null
+    let cancelado = false
+
+    fetch(`${RUTA_RIESGO}/indice.json`)
+      .then((response) => response.json())
+      .then((indice: IndiceRiesgo) => {
+        // Un mes sin registros no tiene rebanada: no se dibuja nada
+        const rebanada = periodo === 'todo' ? indice.todo : indice.meses.find((m) => m.clave === periodo)
+        if (!rebanada || cancelado) return
+        const imagen = new Image()
+        imagen.onload = () => {
+          if (cancelado) return
+          const [oeste, sur, este, norte] = indice.bbox
+          capa = L.imageOverlay(colorear(imagen, soloZonasCriticas), [[sur, oeste], [norte, este]], {
+            opacity: 0.3 + (intensidad / 100) * 0.6,
+          })
+          capa.addTo(map)
+        }
+        imagen.src = `${RUTA_RIESGO}/${rebanada.archivo}`
+      })
+      .catch((error) => {
+        console.error('Error cargando superficie de riesgo:', error)
+      })
+
+    return () => {
+      cancelado = true
+      if (capa) {
+        map.removeLayer(capa)
+      }
+    }
+  }, [map, enabled, periodo, intensidad, soloZonasCriticas])
+
+  return null
+}
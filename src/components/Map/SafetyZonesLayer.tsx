@@ -42,52 +42,12 @@ export default function SafetyZonesLayer({
   useEffect(() => {
     if (cdmxPolygon) return // Ya está cargado
 
-    fetch('/data/limite-de-las-alcaldas.json')
+    // Contorno ya disuelto en scripts/limites.py; z14 basta para clasificar celdas de ~1 km
+    fetch('/data/limites/cdmx-z14.json')
       .then((response) => response.json())
       .then((data) => {
-        if (!data.features || data.features.length === 0) {
-          return
-        }
-
-        // Filtrar solo polígonos
-        const polygons = data.features.filter((f: any) => 
-          f.geometry && (f.geometry.type === 'Polygon' || f.geometry.type === 'MultiPolygon')
-        )
-
-        if (polygons.length === 0) {
-          return
-        }
-
-        // Unir todos los polígonos para obtener el límite completo de CDMX
-        let union: any = null
-
-        for (const feature of polygons) {
-          let polygon: any
-          
-          if (feature.geometry.type === 'Polygon') {
-            polygon = turf.polygon(feature.geometry.coordinates)
-          } else if (feature.geometry.type === 'MultiPolygon') {
-            // Convertir MultiPolygon a Polygon(s)
-            for (const coords of feature.geometry.coordinates) {
-              polygon = turf.polygon(coords)
-              if (!union) {
-                union = polygon
-              } else {
-                union = turf.union(union, polygon)
-              }
-            }
-            continue
-          }
-
-          if (!union) {
-            union = polygon
-          } else {
-            union = turf.union(union, polygon)
-          }
-        }
-
-        if (union) {
-          setCdmxPolygon(union)
+        if (data.features && data.features.length > 0) {
+          setCdmxPolygon(data.features[0])
         }
       })
       .catch((error) => {
@@ -161,7 +161,7 @@ export default function Sidebar({ isOpen, onClose, filtros, onFiltrosChange, est
                         <span className="text-xs text-gray-700">Solo zonas críticas</span>
                       </label>
                       
-                      {/* Muestreo */}
+                      {/* Muestreo (solo aplica cuando el mapa se arma con los puntos filtrados) */}
                       <label className="flex items-center space-x-2 cursor-pointer">
                         <input
                           type="checkbox"
@@ -15,6 +15,7 @@ interface DelitoGeoJSON extends GeoJSON.Feature {
     hora?: string
     año?: number
     mes?: number
+    cvegeo?: string | null
   }
 }
 